@@ -0,0 +1,133 @@
+import asyncio
+import inspect
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, update_wrapper
+from typing import Callable, Any, Self
+
+from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.rows import RowFormat
+from advanced_database_project.backend.storage_profiles import StorageProfile, DEFAULT_PROFILE
+
+
+class AsyncDatabaseConnection:
+    """
+    asyncio facade over DatabaseConnection.
+
+    Every public DatabaseConnection method is available as a coroutine with the same name and arguments:
+
+        db = AsyncDatabaseConnection()
+        products = await db.select_products(filter_name="laptop")
+        basket = await db.get_basket_items_by_basket_id(1)
+
+    The calls run on a dedicated thread pool executor. The executor has its own DatabaseConnection, so its own
+    connection pool, and each worker thread reads on a connection checked out of it for the call.
+    A semaphore bounds how many calls can be queued on the executor at once. An asyncio semaphore belongs to one
+    event loop, so each event loop using the facade (e.g. each asyncio.run()) gets its own.
+
+    Generator methods (iter_query) are consumed on the worker thread and return a list.
+    Methods that only make sense on a single thread (transaction, release_connection) are not mirrored,
+    use run_in_transaction() to run a unit of work instead.
+    """
+
+    _NOT_MIRRORED = {"transaction", "current_transaction", "release_connection", "close"}
+
+    def __init__(self, db: str = r".\database.db",
+                 max_workers: int = 4,
+                 max_concurrency: int | None = None,
+                 profile: str | StorageProfile = DEFAULT_PROFILE,
+                 row_format: RowFormat = "dict") -> None:
+        """
+        Args:
+            db (str): The database file
+            max_workers (int): The number of worker threads, each reads on at most one SQLite connection at a time
+            max_concurrency (int | None): The most calls allowed in flight at once, defaults to max_workers
+            profile (str | StorageProfile): The storage profile of the executor's connections
+            row_format (RowFormat): The row format of the executor's connections
+        """
+        # One connection per worker, plus one for the thread that owns the facade (e.g. to run a setup script)
+        self.database = DatabaseConnection(db, pool_size=max_workers + 1, profile=profile, row_format=row_format)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="database")
+        self.max_concurrency = max_workers if max_concurrency is None else max_concurrency
+        self._semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = \
+            weakref.WeakKeyDictionary()
+
+    def __str__(self):
+        return f"asyncio facade for: {self.database.db_file}"
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def run(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking function on the database executor
+
+        Args:
+            function (Callable): The function to run
+            args (Any): Positional arguments for the function
+            kwargs (Any): Keyword arguments for the function
+
+        Returns:
+            Any: The return value of the function
+        """
+        loop = asyncio.get_running_loop()
+        async with self._semaphore(loop):
+            return await loop.run_in_executor(self.executor, partial(function, *args, **kwargs))
+
+    def _semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        """
+        Get the semaphore of an event loop, creating it the first time the loop runs a call
+        """
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def run_in_transaction(self, function: Callable[[DatabaseConnection], Any]) -> Any:
+        """
+        Run a unit of work inside DatabaseConnection.transaction() on a single worker thread
+
+        Args:
+            function (Callable[[DatabaseConnection], Any]): Called with the DatabaseConnection inside the transaction
+
+        Returns:
+            Any: The return value of the function, or the error of the transaction if it was rolled back
+        """
+        def unit_of_work():
+            with self.database.transaction() as transaction:
+                result = function(self.database)
+            return transaction.error if transaction.failed else result
+
+        return await self.run(unit_of_work)
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name.startswith("_") or name in self._NOT_MIRRORED:
+            raise AttributeError(name)
+
+        method = getattr(self.database, name)
+        if not callable(method):
+            raise AttributeError(name)
+
+        if inspect.isgeneratorfunction(getattr(type(self.database), name, None)):
+            def blocking(*args: Any, **kwargs: Any) -> Any:
+                return list(method(*args, **kwargs))
+        else:
+            blocking = method
+
+        async def mirrored(*args: Any, **kwargs: Any) -> Any:
+            return await self.run(blocking, *args, **kwargs)
+
+        update_wrapper(mirrored, method)
+        # Cache the coroutine function so __getattr__ is only called once per method
+        setattr(self, name, mirrored)
+        return mirrored
+
+    async def close(self) -> None:
+        """
+        Wait for the running calls to finish, then shut down the executor and close the connections
+        """
+        await asyncio.get_running_loop().run_in_executor(None, partial(self.executor.shutdown, wait=True))
+        self.database.close()
@@ -0,0 +1,359 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from operator import attrgetter
+from typing import Dict, Iterable, Iterator, List, Literal, Tuple
+
+from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.rows import Record
+
+# The sorts kept as permutations of the products. Each ends on the Product_ID to break ties, like select_products
+SORT_COLUMNS = {
+    "Name": ("Product_Name", "Product_ID"),
+    "Category": ("Category_Name", "Category_ID", "Product_ID"),
+    "Price": ("Price", "Product_ID"),
+}
+# A change to any of these columns moves a product in a sort or between filters
+INDEXED_COLUMNS = ("Product_Name", "Category_ID", "Category_Name", "Price")
+
+
+def bitmap(positions: Iterable[int], size: int) -> int:
+    """
+    Build a bitmap of product positions
+
+    Args:
+        positions (Iterable[int]): The positions to set
+        size (int): The number of products
+
+    Returns:
+        int: The bitmap, bit n is set if the product at position n is included
+    """
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, "little")
+
+
+class Catalog:
+    """
+    An in-memory copy of the product listing, so ProductsPage can filter and sort without querying SQLite.
+
+    The products are loaded once, in Product_ID order, and a product is referred to by its position in that list.
+    - Each sort (name, category, price) is kept as a permutation of the positions, with its inverse, so a sort
+      toggle only walks a list and a page can carry on after any product (like select_products' keyset pages).
+      Descending is the ascending permutation walked backwards.
+    - Each category has a bitmap of its products, and is a run of ranks in the category sort.
+      Filters are combined by ANDing bitmaps.
+    - The price permutation doubles as a price-sorted array: a price range is found with two binary searches.
+
+    The name search is still answered by the Product_Search full-text index, which has its own tokenizer and
+    ranks matches by bm25. Each distinct search is run once, its matches are kept as a bitmap with their ranking,
+    so changing the other filters or the sort while searching does not query again.
+
+    Before answering, the catalog checks the database's data_version (see SqlWrapper.data_version). When the
+    database has changed, the products are read again (without their images) and only the indexes the changes
+    affect are rebuilt: a stock change replaces the products only, a price or name change re-sorts the existing
+    permutations, and only adding or removing products rebuilds everything.
+
+    data_version is read on the calling thread's connection, so a catalog should be used from one thread.
+    """
+
+    def __init__(self, db: DatabaseConnection) -> None:
+        """
+        Args:
+            db (DatabaseConnection): The database the products are loaded from
+        """
+        self.db = db
+        self.products: List[Record] = []
+        self.positions: Dict[int, int] = {}
+        self.orders: Dict[str, List[int]] = {}
+        self.ranks: Dict[str, List[int]] = {}
+        self.prices: List[float] = []
+        self.category_bitmaps: Dict[Tuple[int, str], int] = {}
+        self.category_ranks: Dict[Tuple[int, str], Tuple[int, int]] = {}
+        self.all_products = 0
+        self._data_version = None
+        self._searches: Dict[str, Tuple[int, List[int]]] = {}
+        self._price_filter: Tuple[Tuple[float, float], int] | None = None
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """
+        Reload the products if the database has changed since they were last loaded
+
+        Returns:
+            bool: True if the database had changed
+        """
+        data_version = self.db.data_version()
+        if data_version == self._data_version:
+            return False
+        self._data_version = data_version
+        self.load(self.db.select_catalog_products())
+        return True
+
+    def load(self, products: List[Record]) -> None:
+        """
+        Replace the products, rebuilding only the indexes affected by what changed
+
+        Args:
+            products (List[Record]): Every product, in Product_ID order (see select_catalog_products)
+        """
+        previous, self.products = self.products, products
+        # The full-text ranking depends on every product, so searches are always run again
+        self._searches.clear()
+
+        product_id = attrgetter("Product_ID")
+        if not self.orders or list(map(product_id, products)) != list(map(product_id, previous)):
+            self._build()
+            return
+
+        indexed = attrgetter(*INDEXED_COLUMNS)
+        changed = {column for old, new in zip(previous, products) if old != new
+                   for column, old_value, new_value in zip(INDEXED_COLUMNS, indexed(old), indexed(new))
+                   if old_value != new_value}
+        if not changed:
+            return
+        for sort_by, columns in SORT_COLUMNS.items():
+            # The previous order is almost sorted, which Python's sort takes advantage of
+            if changed.intersection(columns):
+                self._sort(sort_by, self.orders[sort_by])
+        if "Price" in changed:
+            self._index_prices()
+        if changed & {"Category_ID", "Category_Name"}:
+            self._index_categories()
+
+    def _build(self) -> None:
+        """
+        Build every index from scratch
+        """
+        self.positions = {product.Product_ID: position for position, product in enumerate(self.products)}
+        self.all_products = (1 << len(self.products)) - 1
+        for sort_by in SORT_COLUMNS:
+            self._sort(sort_by, range(len(self.products)))
+        self._index_prices()
+        self._index_categories()
+
+    def _sort(self, sort_by: str, order: Iterable[int]) -> None:
+        # Records are named tuples, reading the fields as attributes skips Record's lookup by name
+        keys = list(map(attrgetter(*SORT_COLUMNS[sort_by]), self.products))
+        self.orders[sort_by] = sorted(order, key=keys.__getitem__)
+        ranks = [0] * len(self.products)
+        for rank, position in enumerate(self.orders[sort_by]):
+            ranks[position] = rank
+        self.ranks[sort_by] = ranks
+
+    def _index_prices(self) -> None:
+        prices = [product.Price for product in self.products]
+        self.prices = [prices[position] for position in self.orders["Price"]]
+        self._price_filter = None
+
+    def _index_categories(self) -> None:
+        members: Dict[Tuple[int, str], List[int]] = {}
+        for position, category in enumerate(map(attrgetter("Category_ID", "Category_Name"), self.products)):
+            members.setdefault(category, []).append(position)
+        self.category_bitmaps = {category: bitmap(positions, len(self.products))
+                                 for category, positions in members.items()}
+        # Each category is a run of the category sort, so sorting by category within a category filter
+        # only walks the runs of the categories that match
+        category_ranks = self.ranks["Category"]
+        self.category_ranks = {category: (min(map(category_ranks.__getitem__, positions)),
+                                          max(map(category_ranks.__getitem__, positions)) + 1)
+                               for category, positions in members.items()}
+
+    def _price_range(self, filter_price: Tuple[float, float]) -> Tuple[int, int]:
+        """
+        Find the products in a price range in the price-sorted array
+
+        Returns:
+            Tuple[int, int]: The first rank in the range and the rank after the last one, in the price sort
+        """
+        return bisect_left(self.prices, filter_price[0]), bisect_right(self.prices, filter_price[1])
+
+    def _price_bitmap(self, filter_price: Tuple[float, float]) -> int:
+        """
+        Get the bitmap of the products in a price range, the last one is kept as the price fields are typed in
+        """
+        if self._price_filter is None or self._price_filter[0] != filter_price:
+            start, stop = self._price_range(filter_price)
+            order = self.orders["Price"]
+            if stop - start > len(order) // 2:
+                # Usually most products are in the range, so set the bits of the few outside it instead
+                price_bitmap = self.all_products ^ bitmap(order[:start] + order[stop:], len(self.products))
+            else:
+                price_bitmap = bitmap(order[start:stop], len(self.products))
+            self._price_filter = (filter_price, price_bitmap)
+        return self._price_filter[1]
+
+    def _categories(self, filter_category: str) -> List[Tuple[int, str]]:
+        """
+        Get every category whose name contains the filter, like select_products
+        """
+        filter_category = filter_category.lower()
+        return [category for category in self.category_bitmaps if filter_category in category[1].lower()]
+
+    def _search(self, search: str) -> Tuple[int, List[int]]:
+        """
+        Find the products matching a search with the full-text index, once per distinct search
+
+        Returns:
+            Tuple[int, List[int]]: The bitmap of the matching products, and their positions best match first
+        """
+        if search not in self._searches:
+            ranked = [self.positions[row["Product_ID"]] for row in self.db.search_products(search)
+                      if row["Product_ID"] in self.positions]
+            self._searches[search] = (bitmap(ranked, len(self.products)), ranked)
+        return self._searches[search]
+
+    def select_products(self, filter_name: str = "",
+                        filter_category: str = "",
+                        filter_price: Tuple[float, float] = (0, 5000),
+                        sort_by: Literal["Name", "Category", "Price", "Relevance"] = "Name",
+                        sort_order: Literal["ASC", "DSC"] = "ASC",
+                        limit: int | None = None,
+                        after: int | None = None) -> List[Record]:
+        """
+        Filter and sort the products in memory.
+        Takes the same arguments and returns the same products in the same order as
+        DatabaseConnection.select_products, with the category name added to each product.
+
+        Args:
+            filter_name (str): Searches the products by product, category and supplier name.
+            filter_category (str):  Filters the products by Category.
+            filter_price (Tuple[float, float]): Filters the products by Price.
+            sort_by (Literal["Name", "Category", "Price", "Relevance"]): Sorts by either the Name, Category or Price
+                                                                         field, or by how well the search matches
+            sort_order (Literal["ASC", "DSC"]): Sorts the sort_by field by either ASC or DESC order
+            limit (int | None): The most products to return, or None for all of them
+            after (int | None): The Product ID of the last product of the previous page, or None for the first page
+
+        Returns:
+            List[Record]: Returns a List of Records of all the results found. List will be empty if nothing is found.
+        """
+        self.refresh()
+        walk, _ = self._match(filter_name, filter_category, filter_price, sort_by, sort_order, after)
+        return [self.products[position] for position in islice(walk, limit)]
+
+    def listing(self, filter_name: str = "",
+                filter_category: str = "",
+                filter_price: Tuple[float, float] = (0, 5000),
+                sort_by: Literal["Name", "Category", "Price", "Relevance"] = "Name",
+                sort_order: Literal["ASC", "DSC"] = "ASC") -> "Listing":
+        """
+        Filter and sort the products in memory, for a view that reads the products by index rather than by page,
+        e.g. a virtual grid that only reads the rows on screen. Takes the same filters as select_products.
+
+        Returns:
+            Listing: The matching products, in order. The number of products is known straight away, the order
+                     is only worked out as far as the products read.
+        """
+        self.refresh()
+        walk, included = self._match(filter_name, filter_category, filter_price, sort_by, sort_order)
+        return Listing(self.products, walk, (included & self._price_bitmap(filter_price)).bit_count())
+
+    def _match(self, filter_name: str, filter_category: str, filter_price: Tuple[float, float], sort_by: str,
+               sort_order: str, after: int | None = None) -> Tuple[Iterator[int], int]:
+        """
+        Find the products matching the filters, see select_products
+
+        Returns:
+            Tuple[Iterator[int], int]: The positions of the matching products in order, and the bitmap of the
+                                       products walked (the price filter is left out when sorting by price)
+        """
+        descending = sort_order.upper() != "ASC"
+
+        included = self.all_products
+        if filter_category:
+            categories = self._categories(filter_category)
+            category_bitmap = 0
+            for category in categories:
+                category_bitmap |= self.category_bitmaps[category]
+            included &= category_bitmap
+
+        search = self.db.search_expression(filter_name)
+        if search is None:
+            # Without a search there is nothing to rank by relevance
+            sort_by = "Name" if sort_by == "Relevance" else sort_by
+        else:
+            search_bitmap, ranked = self._search(search)
+            included &= search_bitmap
+
+        if sort_by == "Relevance":
+            order = ranked
+            rank = {position: i for i, position in enumerate(ranked)}.get
+        else:
+            order = self.orders[sort_by]
+            rank = self.ranks[sort_by].__getitem__
+
+        if sort_by == "Price":
+            # The price range is a slice of the price sort, so only the products in it are walked
+            start, stop = self._price_range(filter_price)
+        else:
+            start, stop = 0, len(order)
+            included &= self._price_bitmap(filter_price)
+        if sort_by == "Category" and filter_category:
+            runs = [self.category_ranks[category] for category in categories]
+            start = max(start, min((first for first, _ in runs), default=0))
+            stop = min(stop, max((last for _, last in runs), default=0))
+
+        if after is not None:
+            position = self.positions.get(after)
+            after_rank = rank(position) if position is not None else None
+            if after_rank is None:
+                return iter(()), 0
+            if descending:
+                stop = min(stop, after_rank)
+            else:
+                start = max(start, after_rank + 1)
+
+        ranks = range(stop - 1, start - 1, -1) if descending else range(start, stop)
+        return self._walk(order, ranks, included), included
+
+    def _walk(self, order: List[int], ranks: range, included: int) -> Iterator[int]:
+        """
+        Yield the positions of the included products, in the order of the ranks walked
+        """
+        bits = included.to_bytes((len(self.products) + 7) // 8, "little")
+        for rank in ranks:
+            position = order[rank]
+            if bits[position >> 3] >> (position & 7) & 1:
+                yield position
+
+
+class Listing:
+    """
+    The products matching a set of filters, read by index.
+
+    Only the positions of the products are kept, in a compact array, and they are only worked out as far as the
+    furthest product read, so showing the first screen of a large listing does not sort out the rest of it.
+    The listing keeps the products it was made from, so it stays consistent if the catalog reloads.
+    """
+
+    def __init__(self, products: List[Record], walk: Iterator[int], count: int) -> None:
+        """
+        Args:
+            products (List[Record]): The catalog's products
+            walk (Iterator[int]): The positions of the matching products, in order
+            count (int): The number of matching products
+        """
+        self.products = products
+        self._walk = walk
+        self._count = count
+        self._positions = array("q")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: slice) -> List[Record]:
+        """
+        Get a slice of the products
+
+        Args:
+            index (slice): The products to read, e.g. listing[30:60]
+
+        Returns:
+            List[Record]: The products in the slice
+        """
+        start, stop, _ = index.indices(self._count)
+        if stop > len(self._positions):
+            self._positions.extend(islice(self._walk, stop - len(self._positions)))
+        return [self.products[position] for position in self._positions[start:stop]]
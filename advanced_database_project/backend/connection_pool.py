@@ -0,0 +1,198 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Iterator
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of SQLite connections to a single database file.
+
+    Connections are created lazily up to the configured size. Checked out connections are owned by one caller until
+    they are checked back in, so two callers never share a cursor or its lastrowid.
+    Connections are opened with check_same_thread=False so a connection can be handed to a different thread once
+    it has been checked back in.
+    """
+
+    def __init__(self, db_file: str,
+                 size: int = 5,
+                 timeout: float = 30.0,
+                 on_connect: Callable[[sqlite3.Connection], None] | None = None,
+                 **connect_kwargs: Any) -> None:
+        """
+        Args:
+            db_file (str): The database file (or URI if uri=True is passed in connect_kwargs) to connect to
+            size (int): The maximum number of connections the pool will open
+            timeout (float): How long checkout() waits for a free connection before raising a TimeoutError
+            on_connect (Callable): Called with every new connection, used to set the row factory and PRAGMAs
+            connect_kwargs (Any): Extra keyword arguments passed to sqlite3.connect
+        """
+        if size < 1:
+            raise ValueError("The connection pool size must be at least 1.")
+
+        self.db_file = db_file
+        self.size = size
+        self.timeout = timeout
+        self.on_connect = on_connect
+        self.connect_kwargs = connect_kwargs
+
+        self._idle = deque()
+        self._in_use = set()
+        self._condition = threading.Condition()
+        self._closed = False
+
+        self._stats = {
+            "created": 0,
+            "checkouts": 0,
+            "checkins": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "health_check_failures": 0,
+            "peak_in_use": 0,
+        }
+
+    def __str__(self):
+        return f"Connection pool ({self.size} connections) for: {self.db_file}"
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a new connection and apply the on_connect configuration
+
+        Returns:
+            sqlite3.Connection: The new connection
+        """
+        connection = sqlite3.connect(self.db_file, check_same_thread=False, **self.connect_kwargs)
+        if self.on_connect is not None:
+            self.on_connect(connection)
+        self._stats["created"] += 1
+        return connection
+
+    @staticmethod
+    def health_check(connection: sqlite3.Connection) -> bool:
+        """
+        Check a connection is still usable
+
+        Args:
+            connection (sqlite3.Connection): The connection to check
+
+        Returns:
+            bool: True if the connection can still run a query, False if it is closed or broken
+        """
+        try:
+            connection.execute("SELECT 1").fetchone()
+        except sqlite3.Error:
+            return False
+        return True
+
+    def checkout(self, timeout: float | None = None) -> sqlite3.Connection:
+        """
+        Take a connection out of the pool. Idle connections are health checked before being handed out,
+        broken connections are discarded and replaced.
+
+        Args:
+            timeout (float | None): How long to wait for a free connection, defaults to the pool timeout
+
+        Returns:
+            sqlite3.Connection: A connection owned by the caller until it is checked back in
+
+        Raises:
+            TimeoutError: If no connection became free in time
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Cannot checkout a connection from a closed pool.")
+
+                if self._idle:
+                    connection = self._idle.pop()
+                    if not self.health_check(connection):
+                        self._stats["health_check_failures"] += 1
+                        connection.close()
+                        continue
+                    break
+
+                if len(self._in_use) < self.size:
+                    connection = self._connect()
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No database connection became available within {timeout} seconds.")
+                self._stats["waits"] += 1
+                wait_start = time.perf_counter()
+                self._condition.wait(remaining)
+                self._stats["wait_time"] += time.perf_counter() - wait_start
+
+            self._in_use.add(connection)
+            self._stats["checkouts"] += 1
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], len(self._in_use))
+            return connection
+
+    def checkin(self, connection: sqlite3.Connection) -> None:
+        """
+        Return a connection to the pool. Any transaction left open is rolled back so the next owner starts clean.
+
+        Args:
+            connection (sqlite3.Connection): A connection previously returned by checkout()
+        """
+        with self._condition:
+            if connection not in self._in_use:
+                return
+            self._in_use.discard(connection)
+            self._stats["checkins"] += 1
+
+            if self._closed:
+                connection.close()
+            else:
+                try:
+                    if connection.in_transaction:
+                        connection.rollback()
+                    self._idle.append(connection)
+                except sqlite3.Error:
+                    self._stats["health_check_failures"] += 1
+                    connection.close()
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self, timeout: float | None = None) -> Iterator[sqlite3.Connection]:
+        """
+        Checkout a connection for the duration of a with block
+
+        Args:
+            timeout (float | None): How long to wait for a free connection, defaults to the pool timeout
+        """
+        connection = self.checkout(timeout)
+        try:
+            yield connection
+        finally:
+            self.checkin(connection)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the pool statistics
+
+        Returns:
+            Dict[str, Any]: The pool size, how many connections are idle / in use, and the running counters
+        """
+        with self._condition:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                **self._stats,
+            }
+
+    def close(self) -> None:
+        """
+        Close every idle connection. Connections still checked out are closed when they are checked back in.
+        """
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                self._idle.pop().close()
+            self._condition.notify_all()
@@ -0,0 +1,49 @@
+from datetime import date, datetime
+
+# Dates are stored as ISO-8601 text, which sorts in date order, so ORDER BY and range queries can use an index
+DATE_FORMAT = "%Y-%m-%d"
+# The format the pages show dates in, and the format older versions of the application stored them in
+DISPLAY_FORMAT = "%d/%m/%Y"
+
+DateLike = str | date | datetime
+
+
+def to_iso_date(value: DateLike | None) -> str | None:
+    """
+    Normalise a date to the format it is stored in
+
+    Args:
+        value (DateLike | None): A date, datetime, or a string in the ISO (2024-01-13) or display (13/01/2024) format
+
+    Returns:
+        str: The date as YYYY-MM-DD
+        None: If the value is None
+
+    Raises:
+        ValueError: If the string is not a date in either format
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    try:
+        return datetime.strptime(value, DATE_FORMAT).date().isoformat()
+    except ValueError:
+        return datetime.strptime(value, DISPLAY_FORMAT).date().isoformat()
+
+
+def display_date(value: str | None) -> str:
+    """
+    Format a stored date the way the pages show it
+
+    Args:
+        value (str | None): A date as stored in the database
+
+    Returns:
+        str: The date as DD/MM/YYYY, or an empty string if there is no date
+    """
+    if not value:
+        return ""
+    return datetime.strptime(to_iso_date(value), DATE_FORMAT).strftime(DISPLAY_FORMAT)
@@ -1,11 +1,21 @@
 import sqlite3
 
 from advanced_database_project.backend.sql import SqlWrapper
+from advanced_database_project.backend.migrations import Migration, SCHEMA_VERSION, ROLLUPS, get_schema_version, \
+    image_hash, migrate
+from advanced_database_project.backend.storage_profiles import StorageProfile, DEFAULT_PROFILE
+from advanced_database_project.backend.rows import RowFormat, Record
+from advanced_database_project.backend.renditions import RENDITION_SIZES, make_rendition
+from advanced_database_project.backend.dates import DateLike, to_iso_date
 
 import hashlib
+import json
+import re
+from itertools import groupby
 from pathlib import Path
-from typing import Tuple, Literal, List, Dict, Any
-from xml.etree.ElementTree import Element, SubElement, tostring, ElementTree
+from typing import Tuple, Literal, List, Dict, Any, Iterable
+from xml.etree.ElementTree import Element, SubElement, tostring
+from xml.sax.saxutils import quoteattr
 import xml.etree.ElementTree as ET
 
 
@@ -14,12 +24,24 @@ class DatabaseConnection(SqlWrapper):
     Database Connection to handle the SQL Logic
     """
 
-    def __init__(self, db: str = r".\database.db") -> None:
-        super().__init__(db)
+    def __init__(self, db: str = r".\database.db", pool_size: int = 5,
+                 profile: str | StorageProfile = DEFAULT_PROFILE,
+                 row_format: RowFormat = "dict",
+                 **options: Any) -> None:
+        """
+        Args:
+            db (str): The database file
+            pool_size (int): The number of read-only connections
+            profile (str | StorageProfile): The storage profile of the connections
+            row_format (RowFormat): The default row format
+            options (Any): Further SqlWrapper options (slow_query_threshold, busy_timeout, retry_policy,
+                           lookup_cache_size, lookup_cache_ttl)
+        """
+        super().__init__(db, pool_size=pool_size, profile=profile, row_format=row_format, **options)
 
         # Hard code the tables. This stops SQL injection attacks if these are pre-defined
-        self.tables = ["Customers", "Category", "Suppliers", "Products", "Customer_Basket", "Basket_Contents",
-                       "Reviews", "Shipping", "Billing", "Orders"]
+        self.tables = ["Customers", "Category", "Suppliers", "Images", "Products", "Customer_Basket", "Basket_Contents",
+                       "Reviews", "Shipping", "Billing", "Order_Headers", "Order_Lines"]
 
     def clear_database(self) -> List[None | Exception]:
         """
@@ -35,6 +57,172 @@ class DatabaseConnection(SqlWrapper):
             results.append(self.update_table(f"DROP TABLE IF EXISTS {table}"))
         return results
 
+    def create_database(self, sql_file_path: Path) -> List[Migration]:
+        """
+        Build the database from scratch with the .sql script, then migrate it to the latest schema version
+
+        Args:
+            sql_file_path (Path): The file path to the sql script
+
+        Returns:
+            List[Migration]: The migrations that were applied
+        """
+        # The script only drops the tables it creates. The tables and views added by migrations are dropped first
+        # (Orders is now a view), with the foreign keys off so the tables can be dropped in any order
+        with self.write_lock:
+            self.execute("PRAGMA foreign_keys = OFF")
+            try:
+                self.drop_schema()
+                self.run_sql_script(sql_file_path)
+            finally:
+                self.execute("PRAGMA foreign_keys = ON")
+        return self.migrate()
+
+    def drop_schema(self) -> List[None | Exception]:
+        """
+        Drop every view, trigger and table in the database, including the ones added by migrations.
+        The foreign keys must be off, so the tables can be dropped in any order.
+
+        Returns:
+            List[None | Exception]: Returns a list of the DROP SQL Query's executed.
+                                    None is returned if the query is successful
+                                    An exception is returned if an error occurs.
+        """
+        # Dropping a virtual table drops its shadow tables with it, and the sqlite_ tables can't be dropped
+        drop_order = ["view", "trigger", "virtual", "table"]
+        schema = self.select_query("""
+                                   SELECT type, name
+                                   FROM pragma_table_list
+                                   WHERE schema = 'main' AND type IN ('view', 'virtual', 'table')
+                                   AND name NOT LIKE 'sqlite_%'
+                                   UNION ALL
+                                   SELECT type, name
+                                   FROM sqlite_master
+                                   WHERE type = 'trigger'
+                                   """)
+        results = []
+        for schema_object in sorted(schema, key=lambda schema_object: drop_order.index(schema_object["type"])):
+            object_type = "TABLE" if schema_object["type"] == "virtual" else schema_object["type"].upper()
+            results.append(self.update_table(f'DROP {object_type} IF EXISTS "{schema_object["name"]}"'))
+        return results
+
+    def migrate(self) -> List[Migration]:
+        """
+        Upgrade the database in place to the latest schema version
+
+        Returns:
+            List[Migration]: The migrations that were applied, empty if the database was already up to date
+        """
+        return migrate(self)
+
+    def schema_version(self) -> int:
+        """
+        Get the schema version of the database
+
+        Returns:
+            int: The PRAGMA user_version of the database
+        """
+        return get_schema_version(self.db)
+
+    def check_schema_version(self) -> bool:
+        """
+        Check the database is at the schema version of the application
+
+        Returns:
+            bool: Returns True if the database is up to date
+                  Returns False if the database needs migrating
+        """
+        return self.schema_version() == SCHEMA_VERSION
+
+    def is_new_database(self) -> bool:
+        """
+        Check the database is new: it has no tables and has never been migrated.
+        Connecting creates an empty file, so checking the file exists isn't enough.
+
+        Returns:
+            bool: Returns True if the database has no tables and a schema version of 0
+        """
+        return self.schema_version() == 0 and not self.select_query("""
+                                                                    SELECT name
+                                                                    FROM sqlite_master
+                                                                    WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+                                                                    """)
+
+    def open_database(self, sql_file_path: Path, image_paths: Iterable[Path], reload: bool = False) -> List[Migration]:
+        """
+        Get the database ready to use when the application starts.
+        A new database is created with the .sql script and its images, an existing one is migrated in place.
+        An existing database is only recreated if reload is set, it is never recreated because it failed to open.
+
+        Args:
+            sql_file_path (Path): The file path to the sql script
+            image_paths (Iterable[Path]): The product images to insert into a new database
+            reload (bool): Recreate the database even if it already exists, deleting its data
+
+        Returns:
+            List[Migration]: The migrations applied to an existing database
+
+        Raises:
+            sqlite3.Error: If the database could not be migrated (it is left at its previous version),
+                           or is still missing tables after migrating. Nothing is deleted.
+        """
+        if reload or self.is_new_database():
+            self.create_database(sql_file_path)
+            self.insert_images(image_paths)
+            return []
+
+        # Migrations run before the tables are checked, as they create some of the tables (e.g. Images)
+        migrations = self.migrate()
+        if not self.check_tables():
+            raise sqlite3.DatabaseError("The database is missing some of its tables.")
+        if migrations:
+            # Images stored before the renditions were added are resized once, here
+            self.backfill_renditions()
+        return migrations
+
+    def rebuild_rollups(self) -> None | Exception:
+        """
+        Rebuild the trigger-maintained rollup tables from the tables they summarise.
+        The triggers keep the rollups up to date, this repairs them if they were changed by hand or restored.
+        - Product_Sales: the total quantity ordered of each product, from Order_Lines
+        - Basket_Totals: the item count and value of each basket, from Basket_Contents and Products
+        - Product_Search: the full-text index of the product, category and supplier names
+
+        Returns:
+            None: If the rollups were rebuilt
+            Exception: If the rebuild failed, nothing is changed
+        """
+        with self.transaction() as transaction:
+            for rollup in ROLLUPS:
+                self.update_table(f"DELETE FROM {rollup.table}")
+                self.update_table(f"INSERT INTO {rollup.table} ({', '.join(rollup.columns)}) {rollup.query}")
+        return transaction.error
+
+    def check_rollups(self, repair: bool = False) -> Dict[str, List[Any]]:
+        """
+        Recompute every rollup table in bulk and compare it with the stored rows
+
+        Args:
+            repair (bool): Rebuild the rollups if any row is wrong
+
+        Returns:
+            Dict[str, List[Any]]: The keys of the wrong rows in each rollup table, e.g. {"Basket_Totals": [3]}.
+                                  Tables with no wrong rows are left out, so an empty dict means every total is right.
+        """
+        mismatches = {}
+        for rollup in ROLLUPS:
+            # A row that has gone back to zero is the same as no row at all
+            stored = {row[0]: row[1:] for row in self.iter_query(
+                f"SELECT {', '.join(rollup.columns)} FROM {rollup.table}", row_format="tuple") if any(row[1:])}
+            expected = {row[0]: row[1:] for row in self.iter_query(rollup.query, row_format="tuple")}
+            wrong = sorted(key for key in stored.keys() | expected.keys() if stored.get(key) != expected.get(key))
+            if wrong:
+                mismatches[rollup.table] = wrong
+
+        if mismatches and repair:
+            self.rebuild_rollups()
+        return mismatches
+
     def check_tables(self) -> bool:
         """
         Check all the tables exists in the database
@@ -56,69 +244,166 @@ class DatabaseConnection(SqlWrapper):
         """
         Generate an XML file to create a backup of the database
 
+        The table data is streamed from the database and written one row at a time,
+        so memory use stays flat no matter how large the tables are.
+
         Args:
             xml_output_path (Path): The file location of where to generate the XML file
             include_images (bool): Whether to save the image BLOB data to the xml file. This makes teh XML file quite large.
         """
-        root = Element("DatabaseBackup")
-
-        for table_name in self.tables:
-            table_elem = SubElement(root, "Table", name=table_name)
-
-            schema_info = self.select_query(f"PRAGMA table_info({table_name})")
-            unique_list = []
-            index_list = self.select_query(f"PRAGMA index_list({table_name})")
-            for index in index_list:
-                if index["origin"] == "u":
-                    for constraint in self.select_query(f"PRAGMA index_info({index["name"]})"):
-                        unique_list.append(constraint["name"])
-
-            schema_element = ET.SubElement(table_elem, "Schema")
-            for column in schema_info:
-                col_element = ET.SubElement(schema_element, "Column",
-                                            name=column["name"], type=column["type"],
-                                            notnull=str(column["notnull"]),
-                                            pk=str(column["pk"]), unique="1" if column["name"] in unique_list else "0")
-                if column["dflt_value"] is not None:
-                    col_element.set("default", column["dflt_value"])
-
-            constraints_element = ET.SubElement(table_elem, "Constraints")
-            foreign_keys = self.select_query(f"PRAGMA foreign_key_list({table_name})")
-
-            for fk in foreign_keys:
-                ET.SubElement(constraints_element, "ForeignKey",
-                              column=fk["from"], ref_table=fk["table"], ref_column=fk["to"])
-
-            data_element = ET.SubElement(table_elem, "Data")
-            rows = self.select_query(f"SELECT * FROM {table_name}")
-
-            for row in rows:
-                row_elem = SubElement(data_element, "Row")
-                for col_name, col_value in row.items():
-                    if not include_images and "Image" in col_name:
-                        continue
-                    col_elem = SubElement(row_elem, col_name)
-                    if isinstance(col_value, bytes):
-                        col_elem.text = col_value.hex() if col_value is not None else "NULL"
-                    else:
-                        col_elem.text = str(col_value) if col_value is not None else "NULL"
-
-        tree = ElementTree(root)
         with open(xml_output_path, "wb") as f:
-            tree.write(f, encoding="utf-8", xml_declaration=True)
+            f.write(f"<?xml version='1.0' encoding='utf-8'?>\n"
+                    f"<DatabaseBackup schema_version=\"{self.schema_version()}\">".encode("utf-8"))
+
+            for table_name in self.tables:
+                f.write(f"<Table name={quoteattr(table_name)}>".encode("utf-8"))
+
+                schema_info = self.select_query(f"PRAGMA table_info({table_name})")
+                unique_list = []
+                index_list = self.select_query(f"PRAGMA index_list({table_name})")
+                for index in index_list:
+                    if index["origin"] == "u":
+                        for constraint in self.select_query(f"PRAGMA index_info({index["name"]})"):
+                            unique_list.append(constraint["name"])
+
+                schema_element = Element("Schema")
+                for column in schema_info:
+                    col_element = ET.SubElement(schema_element, "Column",
+                                                name=column["name"], type=column["type"],
+                                                notnull=str(column["notnull"]),
+                                                pk=str(column["pk"]), unique="1" if column["name"] in unique_list else "0")
+                    if column["dflt_value"] is not None:
+                        col_element.set("default", column["dflt_value"])
+                f.write(tostring(schema_element, encoding="utf-8", xml_declaration=False))
+
+                constraints_element = Element("Constraints")
+                foreign_keys = self.select_query(f"PRAGMA foreign_key_list({table_name})")
+
+                for fk in foreign_keys:
+                    ET.SubElement(constraints_element, "ForeignKey",
+                                  column=fk["from"], ref_table=fk["table"], ref_column=fk["to"],
+                                  on_delete=fk["on_delete"])
+                f.write(tostring(constraints_element, encoding="utf-8", xml_declaration=False))
+
+                # The indexes added by migrations, the implicit PRIMARY KEY/UNIQUE indexes have no SQL
+                indexes_element = Element("Indexes")
+                for index in self.select_query("""
+                                               SELECT name, sql
+                                               FROM sqlite_master
+                                               WHERE type='index' AND tbl_name=? AND sql IS NOT NULL
+                                               """, sql_parameters=table_name):
+                    SubElement(indexes_element, "Index", name=index["name"]).text = index["sql"]
+                f.write(tostring(indexes_element, encoding="utf-8", xml_declaration=False))
+
+                triggers_element = Element("Triggers")
+                for trigger in self.select_query("""
+                                                 SELECT name, sql
+                                                 FROM sqlite_master
+                                                 WHERE type='trigger' AND tbl_name=?
+                                                 """, sql_parameters=table_name):
+                    SubElement(triggers_element, "Trigger", name=trigger["name"]).text = trigger["sql"]
+                f.write(tostring(triggers_element, encoding="utf-8", xml_declaration=False))
+
+                # Only select the columns being backed up, so image BLOBs are never read if they are not wanted.
+                # Without images the Images table has no columns left, and Products.Image_ID is left out with it
+                columns = [column["name"] for column in schema_info
+                           if include_images or "Image" not in column["name"]]
+
+                f.write(b"<Data>")
+                rows = self.iter_query(f"SELECT {', '.join(columns)} FROM {table_name}") if columns else []
+                for row in rows:
+                    row_elem = Element("Row")
+                    for col_name, col_value in row.items():
+                        col_elem = SubElement(row_elem, col_name)
+                        if isinstance(col_value, bytes):
+                            col_elem.text = col_value.hex() if col_value is not None else "NULL"
+                        else:
+                            col_elem.text = str(col_value) if col_value is not None else "NULL"
+                    f.write(tostring(row_elem, encoding="utf-8", xml_declaration=False))
+                f.write(b"</Data></Table>")
+
+            # Only how to create the derived tables (rollups, the search index, renditions) and the views is backed up,
+            # their rows are rebuilt from the restored tables
+            derived_element = Element("DerivedSchema")
+            for schema_object in self._derived_schema():
+                SubElement(derived_element, "Object",
+                           type=schema_object["type"], name=schema_object["name"]).text = schema_object["sql"]
+            f.write(tostring(derived_element, encoding="utf-8", xml_declaration=False))
+
+            f.write(b"</DatabaseBackup>")
+
+    def _derived_schema(self) -> List[Dict[str, Any]]:
+        """
+        Get the schema objects that are not part of a backed up table: the tables derived from them,
+        with their indexes and triggers, and the views. FTS5 shadow tables are left out, they belong to their
+        virtual table.
 
-    def restore_database_from_xml(self, xml_input_path: Path) -> None:
+        Returns:
+            List[Dict[str, Any]]: The type, name and SQL of each object, in the order they can be created in
         """
-        Restore a database from an XML backup
+        shadow_tables = {table["name"] for table in self.select_query("PRAGMA table_list") if table["type"] == "shadow"}
+        return [schema_object for schema_object in self.select_query("""
+                                                                     SELECT type, name, tbl_name, sql
+                                                                     FROM sqlite_master
+                                                                     WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+                                                                     ORDER BY CASE type WHEN 'table' THEN 0
+                                                                                        WHEN 'index' THEN 1
+                                                                                        WHEN 'view' THEN 2
+                                                                                        ELSE 3 END, rowid
+                                                                     """)
+                if schema_object["tbl_name"] not in self.tables and schema_object["tbl_name"] not in shadow_tables]
+
+    def restore_database_from_xml(self, xml_input_path: Path) -> None | Exception:
+        """
+        Restore a database from an XML backup.
+        The database is left at the schema version of the backup, then migrated to the latest version.
+        Triggers are created once all the data is loaded, so they don't fire for the restored rows.
+        The derived tables and views are created from the backup's DerivedSchema, and the rollup tables, search index
+        and image renditions are rebuilt from the restored data, so a backup can be restored into a new file.
+
+        The whole schema is dropped first, and the restore runs in one transaction, so if any part of it fails
+        (a migration of an old backup included) the database is left as it was.
 
         Args:
             xml_input_path (str): The path to the XML file
-        """
-        self.clear_database()
 
+        Returns:
+            None: If the database was restored
+            Exception: If the restore failed, nothing is changed
+        """
         tree = ET.parse(xml_input_path)
         root = tree.getroot()
 
+        with self.write_lock:
+            self.execute("PRAGMA foreign_keys = OFF")
+            try:
+                with self.transaction() as transaction:
+                    self.drop_schema()
+                    self._restore_schema(root)
+                    if not transaction.failed:
+                        try:
+                            self.migrate()
+                        except sqlite3.Error as error:
+                            transaction.error = transaction.error or error
+                    if not transaction.failed:
+                        self.rebuild_rollups()
+            finally:
+                self.execute("PRAGMA foreign_keys = ON")
+        if transaction.failed:
+            return transaction.error
+        return next((result for result in self.backfill_renditions() if result is not None), None)
+
+    def _restore_schema(self, root: Element) -> None:
+        """
+        Create the tables of an XML backup with their rows, then its derived schema, indexes and triggers,
+        and set the schema version to the backup's
+
+        Args:
+            root (Element): The DatabaseBackup element of the backup
+        """
+        indexes = []
+        triggers = []
+
         for table_element in root.findall('Table'):
             table_name = table_element.get('name')
 
@@ -144,35 +429,75 @@ class DatabaseConnection(SqlWrapper):
                 column = fk_element.get('column')
                 ref_table = fk_element.get('ref_table')
                 ref_column = fk_element.get('ref_column')
-                columns.append(f"CONSTRAINT {column}_fk FOREIGN KEY ({column}) REFERENCES {ref_table}({ref_column})")
+                on_delete = fk_element.get('on_delete', 'NO ACTION')
+                on_delete = f"ON DELETE {on_delete}" if on_delete in ("CASCADE", "SET NULL", "RESTRICT") else ""
+                columns.append(f"CONSTRAINT {column}_fk FOREIGN KEY ({column}) "
+                               f"REFERENCES {ref_table}({ref_column}) {on_delete}")
 
             self.update_table(f"CREATE TABLE {table_name} ({', '.join(columns)})")
 
+            column_types = {column_element.get('name'): column_element.get('type').upper()
+                            for column_element in schema_element.findall('Column')}
+
+            # Rows are written in bulk, grouped by the columns they contain (images may have been left out the backup)
             data_element = table_element.find('Data')
-            for row_element in data_element.findall('Row'):
-                columns_str = ', '.join([f"{v.tag}" for v in row_element])  # Column names
-                values_str = []
-                for v in row_element:
-                    col_name = v.tag
-                    col_type = schema_element.find(f"Column[@name='{col_name}']").get('type')
-
-                    if col_type.upper() == 'BLOB':
-                        value = f"X'{v.text}'" if v.text else 'NULL'
-                    else:
-                        value = f"'{v.text}'" if v.text and v.text != 'NULL' else 'NULL'
-
-                    values_str.append(value)
-                values_str = ', '.join(values_str)
-                self.update_table(f"INSERT INTO {table_name} ({columns_str}) VALUES ({values_str})")
+            for column_names, row_elements in groupby(data_element.findall('Row'),
+                                                      key=lambda row: tuple(v.tag for v in row)):
+                placeholders = ', '.join('?' for _ in column_names)
+                self.update_many(f"INSERT INTO {table_name} ({', '.join(column_names)}) VALUES ({placeholders})",
+                                 (self._xml_row_values(row_element, column_types) for row_element in row_elements))
+
+            # Backups made before the schema was versioned have no indexes
+            indexes_element = table_element.find('Indexes')
+            if indexes_element is not None:
+                indexes.extend(index_element.text for index_element in indexes_element.findall('Index'))
+            triggers_element = table_element.find('Triggers')
+            if triggers_element is not None:
+                triggers.extend(trigger_element.text for trigger_element in triggers_element.findall('Trigger'))
+
+        # Backups made before the derived schema was backed up get it from the migrations
+        derived_element = root.find('DerivedSchema')
+        if derived_element is not None:
+            for object_element in derived_element.findall('Object'):
+                self.update_table(object_element.text)
+
+        # Indexes are built once the data is loaded, rather than updated for every row
+        for object_sql in indexes + triggers:
+            self.update_table(object_sql)
+        self.update_table(f"PRAGMA user_version = {int(root.get('schema_version', 0))}")
+
+    @staticmethod
+    def _xml_row_values(row_element: Element, column_types: Dict[str, str]) -> Tuple:
+        """
+        Convert a Row element from an XML backup into the parameters to insert it with
+
+        Args:
+            row_element (Element): The Row element
+            column_types (Dict[str, str]): The SQL type of each column in the table
+
+        Returns:
+            Tuple: The value of each column, BLOBs are converted back from hex and "NULL" is converted to None
+        """
+        values = []
+        for v in row_element:
+            if not v.text or v.text == 'NULL':
+                values.append(None)
+            elif column_types.get(v.tag) == 'BLOB':
+                values.append(bytes.fromhex(v.text))
+            else:
+                values.append(v.text)
+        return tuple(values)
 
     def insert_image(self, image_path: Path) -> None | Exception:
         """
-        Insert an Image into the products table.
+        Insert an Image into the images table and link it to its product.
         This takes the images stored in the assets file, and adds the BLOB data to the database.
         Storing binary hex for the images in the .sql script file is too large.
+        Images are stored once by the hash of their contents, so the same image is never stored twice,
+        and the renditions the pages draw are generated for new images (see backfill_renditions).
 
         Args:
-            image_path (Path): _description_
+            image_path (Path): The path to the image, the file name must match the product name
 
         Returns:
             None: If the SQL Query is successful
@@ -182,11 +507,124 @@ class DatabaseConnection(SqlWrapper):
         with open(image_path, 'rb') as img_file:
             binary_data = img_file.read()
 
-        return self.update_table("""
-                                 UPDATE Products 
-                                 SET Product_Image = ? 
-                                 WHERE Product_Name = ?
-                                 """, sql_parameters=(binary_data, image_path.stem))
+        with self.transaction() as transaction:
+            self.update_table("INSERT OR IGNORE INTO Images (Image_Hash, Image_Data) VALUES (?, ?)",
+                              sql_parameters=(image_hash(binary_data), binary_data))
+            self.update_table("""
+                              UPDATE Products 
+                              SET Image_ID = (SELECT Image_ID FROM Images WHERE Image_Hash = ?) 
+                              WHERE Product_Name = ?
+                              """, sql_parameters=(image_hash(binary_data), image_path.stem))
+        if transaction.failed:
+            return transaction.error
+        return next((result for result in self.backfill_renditions() if result is not None), None)
+
+    def insert_images(self, image_paths: Iterable[Path]) -> List[None | Exception]:
+        """
+        Insert many Images into the images table in one bulk write, and link them to their products.
+        Each image is stored against the product with the same name as the image file.
+        The renditions of the new images are generated afterwards (see backfill_renditions).
+
+        Args:
+            image_paths (Iterable[Path]): The paths to the images
+
+        Returns:
+            List[None | Exception]: The result of each chunk written, see SqlWrapper.update_many,
+                                    followed by the result of each image's renditions
+        """
+        links = []
+
+        def read_images() -> Iterable[Tuple[str, bytes]]:
+            # Only the hash is kept to link the products, the image contents are streamed into the table
+            for image_path in image_paths:
+                data = image_path.read_bytes()
+                links.append((image_hash(data), image_path.stem))
+                yield links[-1][0], data
+
+        results = self.update_many("INSERT OR IGNORE INTO Images (Image_Hash, Image_Data) VALUES (?, ?)",
+                                   sql_parameters=read_images())
+        results += self.update_many("""
+                                    UPDATE Products 
+                                    SET Image_ID = (SELECT Image_ID FROM Images WHERE Image_Hash = ?) 
+                                    WHERE Product_Name = ?
+                                    """, sql_parameters=links)
+        return results + self.backfill_renditions()
+
+    def backfill_renditions(self) -> List[None | Exception]:
+        """
+        Generate the missing renditions of every image (see renditions.RENDITION_SIZES).
+        The images are resized once here, when they are added, rather than by the pages every time they are drawn.
+        Each image's renditions are written and committed together, so the backfill can be stopped and run again.
+
+        Returns:
+            List[None | Exception]: The result of each image's renditions.
+                                    None if they were stored, the exception if the image could not be resized or stored
+        """
+        missing = self.select_query("""
+                                    SELECT i.Image_ID, s.value AS Size
+                                    FROM Images AS i, json_each(?) AS s
+                                    WHERE NOT EXISTS (SELECT 1 FROM Image_Renditions AS r
+                                                      WHERE r.Image_ID = i.Image_ID AND r.Size = s.value)
+                                    ORDER BY i.Image_ID
+                                    """, sql_parameters=json.dumps(RENDITION_SIZES), row_format="tuple")
+
+        results = []
+        for image_id, rows in groupby(missing, key=lambda row: row[0]):
+            image = self.get_image(image_id)
+            try:
+                renditions = [(image_id, size, make_rendition(image, size)) for _, size in rows]
+            except (OSError, ValueError) as e:
+                # PIL raises an OSError if the file is not an image it can read
+                results.append(e)
+                continue
+            results.extend(self.update_many("""
+                                            INSERT OR REPLACE INTO Image_Renditions (Image_ID, Size, Rendition_Data)
+                                            VALUES (?, ?, ?)
+                                            """, sql_parameters=renditions))
+        return results
+
+    def get_image(self, image_id: int | None, size: int | None = None) -> bytes | None:
+        """
+        Load the contents of an image.
+        Product listings only carry the Image_ID, the pages call this when they draw the image.
+
+        If the rendition has not been generated yet (the image was added without backfill_renditions), it is made
+        from the original image, and stored if it is one of the RENDITION_SIZES, so the image is still drawn.
+
+        Args:
+            image_id (int | None): The Image ID of the product
+            size (int | None): The rendition to load (see renditions.RENDITION_SIZES), already resized to fit a
+                               size x size square. None loads the original image
+
+        Returns:
+            bytes: The image file contents, renditions are PPM files
+            None: If the product has no image, no image is found with that Image ID, or it can't be resized
+        """
+        if image_id is None:
+            return None
+        if size is not None:
+            rendition = self.select_query("""
+                                          SELECT Rendition_Data FROM Image_Renditions WHERE Image_ID = ? AND Size = ?
+                                          """, sql_parameters=(image_id, size), fetch="one", row_format="tuple")
+            if rendition is not None:
+                return rendition[0]
+
+        image = self.select_query("SELECT Image_Data FROM Images WHERE Image_ID = ?",
+                                  sql_parameters=image_id, fetch="one", row_format="tuple")
+        if image is None or size is None:
+            return image[0] if image is not None else None
+
+        try:
+            rendition = make_rendition(image[0], size)
+        except (OSError, ValueError):
+            # PIL raises an OSError if the file is not an image it can read
+            return None
+        if size in RENDITION_SIZES:
+            self.update_table("""
+                              INSERT OR REPLACE INTO Image_Renditions (Image_ID, Size, Rendition_Data)
+                              VALUES (?, ?, ?)
+                              """, sql_parameters=(image_id, size, rendition))
+        return rendition
 
     def get_customer_by_login(self, username: str, password: str) -> Dict[str, Any] | False | None:
         """
@@ -227,11 +665,33 @@ class DatabaseConnection(SqlWrapper):
         else:
             return None
 
+    @staticmethod
+    def search_expression(search: str) -> str | None:
+        """
+        Turn what the user typed into an FTS5 query. Every word must match the start of a word in the product,
+        category or supplier name, so "gam lap" finds "Gaming Laptop".
+        The words are quoted, so FTS5 syntax typed by the user (AND, OR, NEAR, *, ...) is searched for literally.
+
+        Args:
+            search (str): The search text
+
+        Returns:
+            str: The FTS5 query
+            None: If there are no words to search for
+        """
+        words = re.findall(r"\w+", search)
+        if not words:
+            return None
+        return " ".join(f'"{word}"*' for word in words)
+
     def select_products(self, filter_name: str = "",
                         filter_category: str = "",
                         filter_price: Tuple[float, float] = (0, 5000),
-                        sort_by: Literal["Name", "Category", "Price"] = "Name",
-                        sort_order: Literal["ASC", "DSC"] = "ASC") -> List[Dict[str, Any]]:
+                        sort_by: Literal["Name", "Category", "Price", "Relevance"] = "Name",
+                        sort_order: Literal["ASC", "DSC"] = "ASC",
+                        limit: int | None = None,
+                        after: int | None = None,
+                        row_format: RowFormat | None = None) -> List[Dict[str, Any]] | List[Record]:
         """
         Select Products from the products table, with the option to filter and sort the results.
         To avoid SQL injection attacks I have used SQL parametrization.
@@ -239,26 +699,71 @@ class DatabaseConnection(SqlWrapper):
         Instead, the ORDER BY paramters are generated from a controlled dict.
         Since these values are not from direct user input, they are safe from SQL injection. 
         Only the actual filtered values are passed as parameters to the query execution.
+        This is the largest listing in the app, row_format="record" returns compact records rather than dicts.
+
+        The name search uses the Product_Search full-text index (see search_expression), so it never scans the
+        products. Relevance sorts by bm25, with matches in the product name ranked above category and supplier matches.
+
+        The results can be read a page at a time by passing a limit, and the Product ID of the last product of the
+        previous page as after. Every sort ends on the Product ID, so the order is total and the next page seeks
+        straight past that product in the sort's index (keyset pagination), rather than skipping an OFFSET of rows.
+        This keeps the cost of a page the same however far into the listing it is.
 
         Args:
-            filter_name (str): Filters the products by Name.
+            filter_name (str): Searches the products by product, category and supplier name.
             filter_category (str):  Filters the products by Category.
             filter_price (Tuple[float, float]): Filters the products by Price.
-            sort_by (Literal["Name", "Category", "Price"]): Sorts by either the Name, Category or Price field
+            sort_by (Literal["Name", "Category", "Price", "Relevance"]): Sorts by either the Name, Category or Price
+                                                                         field, or by how well the search matches
             sort_order (Literal["ASC", "DSC"]): Sorts the sort_by field by either ASC or DESC order
+            limit (int | None): The most products to return, or None for all of them
+            after (int | None): The Product ID of the last product of the previous page, or None for the first page
+            row_format (RowFormat | None): The format of each product, defaults to the row format of the wrapper
 
         Returns:
-            List[Dict[str, Any]]: Returns a List of Dicts of all the results found. List will be empty if nothing is found.
+            List[Dict[str, Any]]: Returns a List of dicts of all the results found. Empty if nothing is found.
+            List[Record]: With row_format="record", each Record can be indexed by column name like a dict.
         """
-        # Controlled Dict to store what to sort by
+        # Controlled Dict to store what to sort by. Each sort ends on the Product ID to break ties.
         sort_by_map = {
-            "Name": "p.Product_Name",
-            "Category": "c.Category_Name",
-            "Price": "p.Price",
+            "Name": ("p.Product_Name", "p.Product_ID"),
+            "Category": ("c.Category_Name", "c.Category_ID", "p.Product_ID"),
+            "Price": ("p.Price", "p.Product_ID"),
+            "Relevance": ("bm25(Product_Search, 10.0, 2.0, 1.0)", "p.Product_ID"),
         }
         # Validation to ensure only ASC and DESC can be entered
         sort_order = "ASC" if sort_order.upper() == "ASC" else "DESC"
 
+        search = self.search_expression(filter_name)
+        if search is None:
+            # Without a search there is nothing to rank by relevance
+            sort_by = "Name" if sort_by == "Relevance" else sort_by
+            source = """
+                     products as p
+                     INNER JOIN category c ON p.Category_ID = c.Category_ID
+                     """
+            search_filter, search_parameters = "", ()
+        else:
+            source = """
+                     Product_Search
+                     INNER JOIN products as p ON p.Product_ID = Product_Search.rowid
+                     INNER JOIN category c ON p.Category_ID = c.Category_ID
+                     """
+            search_filter, search_parameters = "Product_Search MATCH ? AND", (search,)
+
+        sort_columns = ", ".join(sort_by_map[sort_by])
+        # The unary + stops the price filter using Products_Price_idx when sorting by something else,
+        # so the products are read in the order of the sort's index and reading stops at the limit
+        price = "p.Price" if sort_by == "Price" else "+p.Price"
+
+        page_filter, page_parameters = "", ()
+        if after is not None:
+            page_filter = f"""
+                          AND ({sort_columns}) {">" if sort_order == "ASC" else "<"} (
+                              SELECT {sort_columns} FROM {source} WHERE {search_filter} p.Product_ID = ?)
+                          """
+            page_parameters = search_parameters + (after,)
+
         return self.select_query(f"""
                                  SELECT
                                      p.Product_ID,
@@ -267,19 +772,89 @@ class DatabaseConnection(SqlWrapper):
                                      p.Price,
                                      p.Stock_Level,
                                      p.Supplier_ID,
-                                     p.Product_Image
-                                 FROM products as p
-                                 INNER JOIN category c ON p.Category_ID = c.Category_ID
-                                 WHERE p.Product_Name LIKE ? AND
+                                     p.Image_ID
+                                 FROM {source}
+                                 WHERE {search_filter}
                                        c.Category_Name LIKE ? AND
-                                       p.Price >= ? AND
-                                       p.Price <= ?
-                                 ORDER BY {sort_by_map[sort_by]} {sort_order}
+                                       {price} >= ? AND
+                                       {price} <= ?
+                                       {page_filter}
+                                 ORDER BY {", ".join(f"{column} {sort_order}" for column in sort_by_map[sort_by])}
+                                 LIMIT ?
                                  """,
-                                 sql_parameters=(f"%{filter_name}%",
-                                                 f"%{filter_category}%",
-                                                 filter_price[0],
-                                                 filter_price[1]))
+                                 sql_parameters=search_parameters + (f"%{filter_category}%",
+                                                                     filter_price[0],
+                                                                     filter_price[1]) + page_parameters +
+                                                (-1 if limit is None else limit,),
+                                 row_format=row_format)
+
+    def select_catalog_products(self) -> List[Record]:
+        """
+        Select every product with its category name, for the in-memory catalog (see catalog.py).
+        Only the Image ID is read, never the image.
+
+        Returns:
+            List[Record]: Every product, in Product ID order, as compact records (the catalog keeps them all in
+                          memory) that can be indexed by column name like a dict
+        """
+        return self.select_query("""
+                                 SELECT
+                                     p.Product_ID,
+                                     p.Product_Name,
+                                     p.Category_ID,
+                                     c.Category_Name,
+                                     p.Price,
+                                     p.Stock_Level,
+                                     p.Supplier_ID,
+                                     p.Image_ID
+                                 FROM products as p
+                                 INNER JOIN category c ON p.Category_ID = c.Category_ID
+                                 ORDER BY p.Product_ID
+                                 """, row_format="record")
+
+    def search_products(self, search: str) -> List[Dict[str, Any]]:
+        """
+        Find the products matching a search with the Product_Search full-text index
+
+        Args:
+            search (str): An FTS5 query, see search_expression
+
+        Returns:
+            List[Dict[str, Any]]: The Product ID of every match, ranked like select_products' Relevance sort
+        """
+        return self.select_query("""
+                                 SELECT rowid AS Product_ID
+                                 FROM Product_Search
+                                 WHERE Product_Search MATCH ?
+                                 ORDER BY bm25(Product_Search, 10.0, 2.0, 1.0), rowid
+                                 """, sql_parameters=search)
+
+    def select_product_by_id(self, product_id: int,
+                             row_format: RowFormat | None = None) -> Dict[str, Any] | Record | None:
+        """
+        Select a single product
+
+        Args:
+            product_id (int): The Product ID
+            row_format (RowFormat | None): The format of the product, defaults to the row format of the wrapper
+
+        Returns:
+            Dict[str, Any]: The product
+            Record: With row_format="record", the product indexed by column name like a dict
+            None: If no product is found with that Product ID
+        """
+        return self.select_query("""
+                                 SELECT
+                                     Product_ID,
+                                     Product_Name,
+                                     Category_ID,
+                                     Price,
+                                     Stock_Level,
+                                     Supplier_ID,
+                                     Image_ID
+                                 FROM Products
+                                 WHERE Product_ID = ?
+                                 """, sql_parameters=product_id, fetch="one", row_format=row_format)
 
     def get_basket_by_customer_id(self, customer_id: int) -> Dict[str, Any] | None:
         """
@@ -302,18 +877,38 @@ class DatabaseConnection(SqlWrapper):
                                  sql_parameters=customer_id,
                                  fetch='one')
 
-    def create_basket_by_customer_id(self, customer_id: int, date: str) -> Exception | None:
+    def _invalid_date(self, error: ValueError) -> ValueError:
+        """
+        Handle a date that could not be read, the same way as a failed write:
+        inside a transaction the transaction is marked as failed, so it is rolled back when it ends.
+
+        Args:
+            error (ValueError): The error raised by to_iso_date
+
+        Returns:
+            ValueError: The same error, so it can be returned to the caller
+        """
+        transaction = self.current_transaction()
+        if transaction is not None and transaction.error is None:
+            transaction.error = error
+        return error
+
+    def create_basket_by_customer_id(self, customer_id: int, date: DateLike) -> Exception | None:
         """
         Create a basket for a customer
 
         Args:
             customer_id (int): The Customer ID to create the basket for
-            date (str): The Date the basket was created
+            date (DateLike): The Date the basket was created
 
         Returns:
             None: If the SQL Query is successful
-            Exception: If the SQL Query fails
+            Exception: If the SQL Query fails, or a ValueError if the date can't be read
         """
+        try:
+            date = to_iso_date(date)
+        except ValueError as error:
+            return self._invalid_date(error)
         return self.update_table("""
                                  INSERT INTO Customer_Basket (Customer_ID, Basket_Created_Date) 
                                  VALUES (?, ?)
@@ -344,29 +939,32 @@ class DatabaseConnection(SqlWrapper):
                                  VALUES (?, ?, ?)
                                  """, sql_parameters=(basket_id, product_id, quantity))
 
-    def get_basket_items_by_basket_id(self, basket_id: int) -> List[Dict[str, Any]]:
+    def get_basket_items_by_basket_id(self, basket_id: int,
+                                      row_format: RowFormat | None = None) -> List[Dict[str, Any]] | List[Record]:
         """
         Get all the items in a basket
 
         Args:
             basket_id (int): The Basket ID to get the items for
+            row_format (RowFormat | None): The format of each item, defaults to the row format of the wrapper
 
         Returns:
-             Dict[str, Any]: Returns a dict of the customers basket items
-            None: If no customer basket is found with that Basket ID
+            List[Dict[str, Any]]: Returns a list of the customers basket items.
+                                  List will be empty if no items are found with that Basket ID
+            List[Record]: With row_format="record", each Record can be indexed by column name like a dict
         """
         return self.select_query("""
                                  SELECT 
                                     bc.Product_ID,
                                     p.Product_Name,
                                     p.Price,
-                                    P.Product_Image,
+                                    p.Image_ID,
                                     bc.Quantity,
                                     (p.Price * bc.Quantity) AS Total_Cost
                                  FROM Basket_Contents AS bc
                                  INNER JOIN Products AS p ON bc.Product_ID = p.Product_ID
                                  WHERE bc.Basket_ID = ?
-                                 """, sql_parameters=basket_id)
+                                 """, sql_parameters=basket_id, row_format=row_format)
 
     def remove_basket_item(self, basket_id: int, product_id: int) -> Exception | None:
         """
@@ -424,32 +1022,37 @@ class DatabaseConnection(SqlWrapper):
     def get_customer_basket_value(self, basket_id: int) -> Dict[str, Any] | None:
         """
         Get the total basket value of a customer.
-        Use the SQL View, this is defined in the .sql script.
-        
+        The totals are kept up to date by triggers on Basket_Contents and Products (see Basket_Totals),
+        so this is a primary key lookup instead of adding up the basket.
+
         Args:
             basket_id (int): The Basket ID for the customer
 
         Returns:
-             Dict[str, Any]: Returns a dict of the customers  value
-            None: If no customer basket is found with that Customer ID
+             Dict[str, Any]: Returns a dict of the customers  value, and the number of items in the basket
+            None: If no customer basket is found with that Customer ID, or the basket is empty
         """
         return self.select_query("""
-                                 SELECT 
-                                    Basket_ID,
+                                 SELECT
+                                    Basket_Totals.Basket_ID,
                                     Customer_ID,
+                                    Item_Count,
                                     Total_Basket_Value
-                                 FROM CustomerBasketValue WHERE Basket_ID = ?
+                                 FROM Basket_Totals
+                                 INNER JOIN Customer_Basket ON Basket_Totals.Basket_ID = Customer_Basket.Basket_ID
+                                 WHERE Basket_Totals.Basket_ID = ? AND Item_Count > 0
                                  """, sql_parameters=basket_id, fetch='one')
 
     def select_categories(self) -> List[Dict[str, Any]]:
         """
-        Returns all the product categories
+        Returns all the product categories.
+        Categories rarely change, so the result is cached until the Category table is written (see lookup_cache).
 
         Returns:
             List[Dict[str, Any]]: Returns a List of dicts of all the results found.
                                   List will be empty if nothing is found.
         """
-        return self.select_query("""
+        return self.cached_select_query(["Category"], """
                                  SELECT 
                                     Category_ID,
                                     Category_Name
@@ -458,7 +1061,8 @@ class DatabaseConnection(SqlWrapper):
 
     def select_customer_by_id(self, customer_id: int) -> Dict[str, Any] | None:
         """
-        Returns a customer based on the Customer ID
+        Returns a customer based on the Customer ID.
+        The customer is cached until the Customers table is written (see lookup_cache).
         
         Args:
             customer_id (int): The Customer ID of the customer to get.
@@ -467,7 +1071,7 @@ class DatabaseConnection(SqlWrapper):
             Dict[str, Any]: Returns a dict of the customer
             None: If no customer is found with that Customer ID
         """
-        return self.select_query("""
+        return self.cached_select_query(["Customers"], """
                                  SELECT 
                                     Customer_ID,
                                     Customer_Firstname,
@@ -482,7 +1086,8 @@ class DatabaseConnection(SqlWrapper):
 
     def select_categories_by_id(self, category_id: int) -> Dict[str, Any] | None:
         """
-        Returns a category based on the Category ID
+        Returns a category based on the Category ID.
+        The category is cached until the Category table is written (see lookup_cache).
         
         Args:
             category_id (int): The Category ID of the category to get.
@@ -491,7 +1096,7 @@ class DatabaseConnection(SqlWrapper):
             Dict[str, Any]: Returns a dict of categories
             None: If no categories is found with that Category ID
         """
-        return self.select_query("""
+        return self.cached_select_query(["Category"], """
                                  SELECT 
                                     Category_ID,
                                     Category_Name
@@ -501,7 +1106,8 @@ class DatabaseConnection(SqlWrapper):
 
     def select_suppliers_by_id(self, supplier_id: int) -> Dict[str, Any] | None:
         """
-        Returns a supplier based on the Supplier ID
+        Returns a supplier based on the Supplier ID.
+        The supplier is cached until the Suppliers table is written (see lookup_cache).
         
         Args:
             supplier_id (int): The Supplier ID of the supplier to get.
@@ -510,7 +1116,7 @@ class DatabaseConnection(SqlWrapper):
             Dict[str, Any]: Returns a dict of suppliers
             None: If no suppliers are found with that Supplier ID
         """
-        return self.select_query("""
+        return self.cached_select_query(["Suppliers"], """
                                  SELECT 
                                     Supplier_ID,
                                     Supplier_Name,
@@ -546,8 +1152,37 @@ class DatabaseConnection(SqlWrapper):
                                  WHERE Product_ID = ?
                                  """, sql_parameters=product_id)
 
+    def select_reviews_by_date_range(self, start_date: DateLike, end_date: DateLike) -> List[Dict[str, Any]]:
+        """
+        Returns the reviews left between two dates, inclusive.
+        Dates are stored as ISO-8601 text, so this is a range scan of Reviews_Review_Date_idx.
+
+        Args:
+            start_date (DateLike): The first day to include
+            end_date (DateLike): The last day to include
+
+        Returns:
+            List[Dict[str, Any]]: Returns a List of dicts of all the results found, oldest review first.
+                                  List will be empty if nothing is found.
+
+        Raises:
+            ValueError: If a date can't be read
+        """
+        return self.select_query("""
+                                 SELECT
+                                    Review_ID,
+                                    Customer_ID,
+                                    Product_ID,
+                                    Review_Stars,
+                                    Review_Comment,
+                                    Review_Date
+                                 FROM Reviews
+                                 WHERE Review_Date BETWEEN ? AND ?
+                                 ORDER BY Review_Date, Review_ID
+                                 """, sql_parameters=(to_iso_date(start_date), to_iso_date(end_date)))
+
     def add_review(self, customer_id: int, product_id: int, review_stars: int, review_comment: str,
-                   review_date: str) -> None | Exception:
+                   review_date: DateLike) -> None | Exception:
         """
         Creates a New Review
 
@@ -556,12 +1191,16 @@ class DatabaseConnection(SqlWrapper):
             product_id (int): The Product ID of thr product
             review_stars (int): The number of stars out of 5
             review_comment (str): The review comment
-            review_date (str): The review date
+            review_date (DateLike): The review date
 
         Returns:
             None: If the SQL Query is successful
-            Exception: If the SQL Query fails
+            Exception: If the SQL Query fails, or a ValueError if the date can't be read
         """
+        try:
+            review_date = to_iso_date(review_date)
+        except ValueError as error:
+            return self._invalid_date(error)
         return self.update_table("""
                                  INSERT INTO Reviews (Customer_ID, Product_ID, Review_Stars, Review_Comment, Review_Date)
                                  VALUES
@@ -572,7 +1211,8 @@ class DatabaseConnection(SqlWrapper):
     def select_best_selling_products(self) -> List[Dict[str, Any]]:
         """
         Returns the Top 6 best-selling products.
-        This looks at all the orders and returns the top 6 that have been purchased the most.
+        The total ordered of each product is kept up to date by triggers on Order_Lines (see Product_Sales),
+        so this reads the top 6 in index order instead of grouping every order.
 
         Returns:
             List[Dict[str, Any]]: Returns a List of dicts of all the results found.
@@ -586,8 +1226,12 @@ class DatabaseConnection(SqlWrapper):
                                     Price,
                                     Stock_Level,
                                     Supplier_ID,
-                                    Product_Image
-                                 FROM BestSellingProducts
+                                    Image_ID
+                                 FROM Product_Sales
+                                 INNER JOIN Products USING (Product_ID)
+                                 WHERE Total_Ordered > 0
+                                 ORDER BY Total_Ordered DESC, Product_ID
+                                 LIMIT 6
                                  """)
 
     def insert_customer(self, firstname: str,
@@ -689,7 +1333,7 @@ class DatabaseConnection(SqlWrapper):
         return self.update_table(query, sql_parameters=tuple(parameters))
 
     def create_shipping(self, customer_id: int, shipping_address_street_number: str, shipping_address_street: str,
-                        shipping_address_postcode: str, delivery_date: str):
+                        shipping_address_postcode: str, delivery_date: DateLike):
         """
         Create shipping information for a specific order
 
@@ -698,12 +1342,16 @@ class DatabaseConnection(SqlWrapper):
             shipping_address_street_number (str): The street shipping to ship to
             shipping_address_street (str): The address to ship to
             shipping_address_postcode (str): The postcode to ship to
-            delivery_date: (str) The delivery date the order is due to be delivered
+            delivery_date: (DateLike) The delivery date the order is due to be delivered
 
         Returns:
-            Exception: Returns the SQLite exception if there is an error.
+            Exception: Returns the SQLite exception if there is an error, or a ValueError if the date can't be read.
             None: Returns None of the insertion was successful
         """
+        try:
+            delivery_date = to_iso_date(delivery_date)
+        except ValueError as error:
+            return self._invalid_date(error)
         return self.update_table("""
                                  INSERT INTO Shipping (Customer_ID, Shipping_Address_Street_Number, 
                                                        Shipping_Address_Street,  Shipping_Address_Postcode, 
@@ -741,13 +1389,122 @@ class DatabaseConnection(SqlWrapper):
                                                       billing_address_street, billing_address_postcode, card_number,
                                                       card_expiry, name_on_card, cvc))
 
-    def place_order(self, order_date: str, customer_id: int, product_id: int, shipping_id: int, billing_id: int,
+    def checkout(self, basket_id: int, customer_id: int, order_date: DateLike, delivery_date: DateLike,
+                 shipping_address_street_number: str, shipping_address_street: str, shipping_address_postcode: str,
+                 billing_address_street_number: str, billing_address_street: str, billing_address_postcode: str,
+                 card_number: str, card_expiry: str, name_on_card: str, cvc: str,
+                 order_status: str = "Ordered") -> Exception | None:
+        """
+        Order everything in a basket, as one transaction:
+        - Create the shipping and billing information
+        - Create the order header, and move every basket line into Order_Lines with one INSERT ... SELECT
+        - Take the stock with one UPDATE, that only takes it from products with enough stock left
+        - Clear the basket
+        The number of queries is the same however many products are in the basket.
+        If any product does not have enough stock (or any write fails) nothing is changed.
+
+        Args:
+            basket_id (int): The Basket ID to order
+            customer_id (int): The Customer ID placing the order
+            order_date (DateLike): The date the products were ordered
+            delivery_date (DateLike): The delivery date the order is due to be delivered
+            shipping_address_street_number (str): The street number to ship to
+            shipping_address_street (str): The street to ship to
+            shipping_address_postcode (str): The postcode to ship to
+            billing_address_street_number (str): The street number to bill to
+            billing_address_street (str): The street to bill to
+            billing_address_postcode (str): The postcode to bill to
+            card_number (str): The card number
+            card_expiry (str): The card expiry
+            name_on_card (str): The name on the card
+            cvc (str): The CVC of the card
+            order_status (str): The status of the new orders (Delivered, Dispatched, Out for Delivery, Ordered)
+
+        Returns:
+            Exception: Returns the SQLite exception if there is an error.
+                       An IntegrityError if the basket is empty or a product does not have enough stock
+                       A ValueError if a date can't be read
+            None: Returns None if the order was placed
+        """
+        # Each step reads the ID of the row the step before it created from lastrowid, so a failed step
+        # ends the checkout straight away (the error fails the transaction, so it is rolled back)
+        with self.transaction() as transaction:
+            error = self.create_shipping(customer_id, shipping_address_street_number, shipping_address_street,
+                                         shipping_address_postcode, delivery_date)
+            if error is not None:
+                return error
+            shipping_id = self.cursor.lastrowid
+            error = self.create_billing(customer_id, billing_address_street_number, billing_address_street,
+                                        billing_address_postcode, card_number, card_expiry, name_on_card, cvc)
+            if error is not None:
+                return error
+            billing_id = self.cursor.lastrowid
+
+            error = self.create_order_header(order_date, customer_id, shipping_id, billing_id, order_status)
+            if error is not None:
+                return error
+            error = self.update_table("""
+                                      INSERT INTO Order_Lines (Order_ID, Product_ID, Order_Quantity) 
+                                      SELECT ?, Product_ID, Quantity
+                                      FROM Basket_Contents
+                                      WHERE Basket_ID = ?
+                                      ORDER BY Product_ID
+                                      """, sql_parameters=(self.cursor.lastrowid, basket_id))
+            if error is not None:
+                return error
+            ordered = self.cursor.rowcount
+
+            self.update_table("""
+                              UPDATE Products
+                              SET Stock_Level = Products.Stock_Level - bc.Quantity
+                              FROM Basket_Contents AS bc
+                              WHERE bc.Basket_ID = ? AND
+                                    bc.Product_ID = Products.Product_ID AND
+                                    Products.Stock_Level >= bc.Quantity
+                              """, sql_parameters=basket_id)
+            # Each basket line is a different product, so every line must have taken its stock
+            if not transaction.failed and (ordered < 1 or self.cursor.rowcount != ordered):
+                transaction.error = sqlite3.IntegrityError(
+                    "The basket is empty." if ordered < 1 else "Not enough stock available to place this order.")
+
+            self.clear_basket(basket_id)
+        return transaction.error
+
+    def create_order_header(self, order_date: DateLike, customer_id: int, shipping_id: int, billing_id: int,
+                            order_status: str) -> Exception | None:
+        """
+        Create the header of an order, the details shared by every product in the order.
+        The Order ID of the new order is the cursor's lastrowid.
+
+        Args:
+            order_date (DateLike): The date the order was placed
+            customer_id (int): The Customer ID that placed the order
+            shipping_id (int): The Shipping ID of the order
+            billing_id (int): The Billing ID of the order
+            order_status (str): The current status of the order (Delivered, Dispatched, Out for Delivery, Ordered)
+
+        Returns:
+            Exception: Returns the SQLite exception if there is an error, or a ValueError if the date can't be read.
+            None: Returns None of the insertion was successful
+        """
+        try:
+            order_date = to_iso_date(order_date)
+        except ValueError as error:
+            return self._invalid_date(error)
+        return self.update_table("""
+                                 INSERT INTO Order_Headers (Order_Date, Customer_ID, Shipping_ID, Billing_ID, 
+                                                            Order_Status) 
+                                 VALUES (?, ?, ?, ?, ?)
+                                 """, sql_parameters=(order_date, customer_id, shipping_id, billing_id,
+                                                      order_status))
+
+    def place_order(self, order_date: DateLike, customer_id: int, product_id: int, shipping_id: int, billing_id: int,
                     order_quantity: int, order_status: str) -> Exception | None:
         """
-        Place an order for a product
+        Place an order for a product, and take the quantity ordered from its stock
 
         Args:
-            order_date (str): The date the product was ordered
+            order_date (DateLike): The date the product was ordered
             customer_id (int): The Customer ID that placed the order
             product_id (int): The Product ID that the customer has ordered
             shipping_id (int): The Shipping ID of the order
@@ -757,66 +1514,176 @@ class DatabaseConnection(SqlWrapper):
 
         Returns:
             Exception: Returns the SQLite exception if there is an error.
+                       An IntegrityError if the product does not have enough stock
+                       A ValueError if the date can't be read
             None: Returns None of the insertion was successful
         """
-        return self.update_table("""
-                                 INSERT INTO Orders (Order_Date, Customer_ID, Product_ID, Shipping_ID, Billing_ID, 
-                                                     Order_Quantity, Order_Status) 
-                                 VALUES (?, ?, ?, ?, ?, ?, ?)
-                                 """, sql_parameters=(order_date, customer_id, product_id, shipping_id, billing_id,
-                                                      order_quantity, order_status))
+        results = self.place_orders(order_date, customer_id, shipping_id, billing_id, [(product_id, order_quantity)],
+                                    order_status)
+        return next((result for result in results if result is not None), None)
 
-    def get_orders_by_customer_id(self, customer_id: int) -> List[Dict[str, Any]]:
+    def place_orders(self, order_date: DateLike, customer_id: int, shipping_id: int, billing_id: int,
+                     items: Iterable[Tuple[int, int]], order_status: str) -> List[Exception | None]:
         """
-        Get all the order from a customer
+        Place one order for many products, all sharing the same shipping and billing information.
+        The order header, its lines and the stock taken are written in one transaction,
+        if any product does not have enough stock nothing is written. Use checkout() to order a whole basket.
 
         Args:
+            order_date (DateLike): The date the products were ordered
             customer_id (int): The Customer ID that placed the order
+            shipping_id (int): The Shipping ID of the order
+            billing_id (int): The Billing ID of the order
+            items (Iterable[Tuple[int, int]]): The Product ID and quantity of each product ordered
+            order_status (str): The current status of the order (Delivered, Dispatched, Out for Delivery, Ordered)
 
         Returns:
-            List[Dict[str, Any]]: Returns a List of dicts of all the results found.
+            List[Exception | None]: The result of the header, then each chunk written, see SqlWrapper.update_many.
+                                    The last result is an IntegrityError if a product does not have enough stock.
+                                    The header's result is a ValueError if the date can't be read
+        """
+        items = list(items)
+        with self.transaction() as transaction:
+            results = [self.create_order_header(order_date, customer_id, shipping_id, billing_id, order_status)]
+            if transaction.failed:
+                # There is no order to add the lines to, and the transaction is rolled back
+                return results
+            order_id = self.cursor.lastrowid
+            results += self.update_many("""
+                                        INSERT INTO Order_Lines (Order_ID, Product_ID, Order_Quantity) 
+                                        VALUES (?, ?, ?)
+                                        """, sql_parameters=((order_id, product_id, quantity)
+                                                             for product_id, quantity in items))
+            results += self.update_many("""
+                                        UPDATE Products
+                                        SET Stock_Level = Stock_Level - ?
+                                        WHERE Product_ID = ?
+                                        """, sql_parameters=((quantity, product_id) for product_id, quantity in items))
+            if items and not transaction.failed:
+                short = self.select_query(f"""
+                                          SELECT COUNT(*) FROM Products
+                                          WHERE Stock_Level < 0 AND
+                                                Product_ID IN ({', '.join('?' for _ in items)})
+                                          """, sql_parameters=tuple(product_id for product_id, _ in items),
+                                          fetch="one", row_format="tuple")
+                if short[0]:
+                    transaction.error = sqlite3.IntegrityError("Not enough stock available to place this order.")
+                    results.append(transaction.error)
+        return results
+
+    def get_orders_by_customer_id(self, customer_id: int, sort_order: Literal["ASC", "DESC"] = "ASC",
+                                  limit: int | None = None, after: int | None = None) -> List[Dict[str, Any]]:
+        """
+        Get all the orders from a customer, one row per order.
+        Only the order headers are read, found through Order_Headers_Customer_ID_idx.
+        The orders can be read a page at a time by passing a limit, and the Order ID of the last order of the
+        previous page as after, which seeks straight to the next page in the index (see select_products).
+
+        Args:
+            customer_id (int): The Customer ID that placed the orders
+            sort_order (Literal["ASC", "DESC"]): ASC for the oldest order first, or DESC for the newest first
+            limit (int | None): The most orders to return, or None for all of them
+            after (int | None): The Order ID of the last order of the previous page, or None for the first page
+
+        Returns:
+            List[Dict[str, Any]]: Returns a List of dicts of all the results found, in Order ID order.
                                   List will be empty if nothing is found.
         """
+        # Validation to ensure only ASC and DESC can be entered
+        sort_order = "ASC" if sort_order.upper() == "ASC" else "DESC"
+
+        page_filter, page_parameters = "", ()
+        if after is not None:
+            page_filter = f"AND Order_ID {">" if sort_order == "ASC" else "<"} ?"
+            page_parameters = (after,)
+
+        return self.select_query(f"""
+                                 SELECT
+                                    Order_ID,
+                                    Order_Date,
+                                    Customer_ID,
+                                    Shipping_ID,
+                                    Billing_ID,
+                                    Order_Status
+                                 FROM Order_Headers
+                                 WHERE Customer_ID = ? {page_filter}
+                                 ORDER BY Order_ID {sort_order}
+                                 LIMIT ?
+                                 """, sql_parameters=(customer_id,) + page_parameters + (-1 if limit is None else limit,))
+
+    def get_order_by_order_id(self, order_id: int) -> Dict[str, Any] | None:
+        """
+        Get the order from the Order ID, see get_order_lines_by_order_id for the products ordered
+
+        Args:
+            order_id (int): The Order ID of the order
+
+        Returns:
+            Dict[str, Any]: The order header (date, customer, shipping, billing and status)
+            None: If no order is found with that Order ID
+        """
         return self.select_query("""
                                  SELECT
-                                    o.Order_ID,
-                                    o.Order_Date,
-                                    o.Customer_ID,
-                                    p.Product_Name,
-                                    o.Shipping_ID,
-                                    o.Billing_ID,
-                                    o.Order_Quantity,
-                                    o.Order_Status
-                                 FROM Orders as o
-                                 INNER JOIN products p ON p.Product_ID = o.Product_ID
-                                 WHERE o.Customer_ID = ? 
-                                 """, sql_parameters=customer_id)
+                                    Order_ID,
+                                    Order_Date,
+                                    Customer_ID,
+                                    Shipping_ID,
+                                    Billing_ID,
+                                    Order_Status
+                                 FROM Order_Headers
+                                 WHERE Order_ID = ? 
+                                 """, sql_parameters=order_id, fetch='one')
 
-    def get_order_by_order_id(self, order_id: int) -> List[Dict[str, Any]]:
+    def get_order_lines_by_order_id(self, order_id: int) -> List[Dict[str, Any]]:
         """
-        Get the order from the Order ID
+        Get the products ordered in an order
 
         Args:
             order_id (int): The Order ID of the order
 
         Returns:
-            List[Dict[str, Any]]: Returns a List of dicts of all the results found.
+            List[Dict[str, Any]]: Returns a List of dicts of each product and the quantity ordered.
                                   List will be empty if nothing is found.
         """
         return self.select_query("""
                                  SELECT
-                                    o.Order_ID,
-                                    o.Order_Date,
-                                    o.Customer_ID,
+                                    l.Order_ID,
+                                    l.Product_ID,
                                     p.Product_Name,
-                                    o.Shipping_ID,
-                                    o.Billing_ID,
-                                    o.Order_Quantity,
-                                    o.Order_Status
-                                 FROM Orders as o
-                                 INNER JOIN products p ON p.Product_ID = o.Product_ID
-                                 WHERE o.Order_ID = ? 
-                                 """, sql_parameters=order_id, fetch='one')
+                                    l.Order_Quantity
+                                 FROM Order_Lines AS l
+                                 INNER JOIN Products AS p ON p.Product_ID = l.Product_ID
+                                 WHERE l.Order_ID = ? 
+                                 """, sql_parameters=order_id)
+
+    def get_orders_by_date_range(self, start_date: DateLike, end_date: DateLike) -> List[Dict[str, Any]]:
+        """
+        Get all the orders placed between two dates, inclusive, one row per order.
+        Dates are stored as ISO-8601 text, so this is a range scan of Order_Headers_Order_Date_idx.
+
+        Args:
+            start_date (DateLike): The first day to include
+            end_date (DateLike): The last day to include
+
+        Returns:
+            List[Dict[str, Any]]: Returns a List of dicts of all the results found, oldest order first.
+                                  List will be empty if nothing is found.
+
+        Raises:
+            ValueError: If a date can't be read
+        """
+        return self.select_query("""
+                                 SELECT
+                                    Order_ID,
+                                    Order_Date,
+                                    Customer_ID,
+                                    Shipping_ID,
+                                    Billing_ID,
+                                    Order_Status
+                                 FROM Order_Headers
+                                 WHERE Order_Date BETWEEN ? AND ?
+                                 ORDER BY Order_Date, Order_ID
+                                 """, sql_parameters=(to_iso_date(start_date), to_iso_date(end_date)))
 
 if __name__ == "__main__":
     connection = DatabaseConnection()
@@ -0,0 +1,213 @@
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Set
+
+_WRITTEN_TABLE = re.compile(
+    r"\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+"
+    r"(?:[\"`\[]?\w+[\"`\]]?\s*\.\s*)?[\"`\[]?(\w+)",
+    re.IGNORECASE)
+# Statements that don't change any table
+_NO_WRITE = re.compile(r"\s*(?:SELECT|VALUES|BEGIN|COMMIT|END|ROLLBACK|SAVEPOINT|RELEASE|PRAGMA|EXPLAIN)\b",
+                       re.IGNORECASE)
+# The start of a common table expression: WITH [RECURSIVE] name [(columns)] AS [[NOT] MATERIALIZED] (
+_COMMON_TABLE = re.compile(
+    r"\s*(?:WITH(?:\s+RECURSIVE)?\s+|,)\s*[\"`\[]?\w+[\"`\]]?\s*(?:\([^()]*\))?\s*AS\s*"
+    r"(?:(?:NOT\s+)?MATERIALIZED\s*)?\(",
+    re.IGNORECASE)
+
+# Returned by written_tables for statements that can change any table
+ALL_TABLES = None
+
+
+def _skip_with_clause(sql_query: str) -> str | None:
+    """
+    Skip the WITH clause at the start of a statement
+
+    Args:
+        sql_query (str): The SQL text
+
+    Returns:
+        str: The statement after the WITH clause, or the statement itself if it has no WITH clause
+        None: If the WITH clause could not be read
+    """
+    position = 0
+    while (match := _COMMON_TABLE.match(sql_query, position)) is not None:
+        # Find the bracket that closes the common table's query, brackets inside strings and names don't count
+        depth = 1
+        position = match.end()
+        while depth:
+            if position >= len(sql_query):
+                return None
+            character = sql_query[position]
+            if character in "'\"`[":
+                position = sql_query.find("]" if character == "[" else character, position + 1)
+                if position == -1:
+                    return None
+            elif character == "(":
+                depth += 1
+            elif character == ")":
+                depth -= 1
+            position += 1
+    return sql_query[position:]
+
+
+def written_tables(sql_query: str) -> Set[str] | None:
+    """
+    Find the table a statement writes to, so only the cached lookups that read it are invalidated
+
+    Args:
+        sql_query (str): The SQL text
+
+    Returns:
+        Set[str]: The lower case name of the table an INSERT/REPLACE/UPDATE/DELETE writes to (after any WITH clause),
+                  or an empty set for statements that do not change any table (e.g. SELECT, BEGIN, SAVEPOINT, PRAGMA)
+        None: For schema changes (CREATE/DROP/ALTER) and any statement that isn't recognised,
+              which can change any table
+    """
+    statement = _skip_with_clause(sql_query)
+    if statement is None:
+        return ALL_TABLES
+    match = _WRITTEN_TABLE.match(statement)
+    if match is not None:
+        return {match.group(1).lower()}
+    if _NO_WRITE.match(statement):
+        return set()
+    return ALL_TABLES
+
+
+class _Entry:
+    """
+    A cached result, the tables it was read from and when it expires
+    """
+    __slots__ = ("value", "tables", "expires")
+
+    def __init__(self, value: Any, tables: Set[str], expires: float) -> None:
+        self.value = value
+        self.tables = tables
+        self.expires = expires
+
+
+class LookupCache:
+    """
+    A thread-safe, size-bounded LRU cache of query results, used as a read-through cache for lookups of
+    reference data that is read far more often than it is written (categories, suppliers, customers).
+
+    Each entry is tagged with the tables it was read from, and is dropped as soon as one of those tables is
+    written (see SqlWrapper.execute), or when it is older than the time to live. The time to live only matters
+    for writes made by other processes, writes through the wrapper always invalidate the entries straight away.
+
+    Entries are only tagged with the tables they name, so a cached table must not be written by triggers or
+    foreign key actions of writes to other tables.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float | None = 300.0) -> None:
+        """
+        Args:
+            max_size (int): The most results to keep, the least recently used result is evicted first.
+                            0 turns the cache off.
+            ttl (float | None): The seconds a result is kept for, or None to keep it until it is invalidated
+        """
+        if max_size < 0:
+            raise ValueError("The cache size cannot be negative.")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        # Bumped by every invalidation, so a result read before a write is not cached after it
+        self._version = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_or_load(self, key: Hashable, tables: Iterable[str], load: Callable[[], Any]) -> Any:
+        """
+        Get a cached result, or load it and cache it
+
+        Args:
+            key (Hashable): The key of the result, e.g. the SQL text and parameters
+            tables (Iterable[str]): The tables the result is read from
+            load (Callable[[], Any]): Reads the result from the database
+
+        Returns:
+            Any: A copy of the result, so callers can change it without changing the cached result
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires < time.monotonic():
+                del self._entries[key]
+                self._stats["expired"] += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return copy.deepcopy(entry.value)
+            self._stats["misses"] += 1
+            version = self._version
+
+        value = load()
+
+        with self._lock:
+            # Skip caching if a table was written while the result was being read, it may already be out of date
+            if self.max_size and self._version == version:
+                expires = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+                self._entries[key] = _Entry(value, {table.lower() for table in tables}, expires)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self._stats["evictions"] += 1
+        return copy.deepcopy(value)
+
+    def invalidate(self, tables: Iterable[str] | None = ALL_TABLES) -> None:
+        """
+        Drop the results read from any of the tables
+
+        Args:
+            tables (Iterable[str] | None): The tables that were written, or None (ALL_TABLES) to drop every result
+        """
+        with self._lock:
+            self._version += 1
+            if tables is ALL_TABLES:
+                self._stats["invalidations"] += len(self._entries)
+                self._entries.clear()
+                return
+            tables = {table.lower() for table in tables}
+            stale = [key for key, entry in self._entries.items() if not entry.tables.isdisjoint(tables)]
+            for key in stale:
+                del self._entries[key]
+            self._stats["invalidations"] += len(stale)
+
+    def clear(self) -> None:
+        """
+        Drop every cached result
+        """
+        self.invalidate(ALL_TABLES)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the cache statistics
+
+        Returns:
+            Dict[str, Any]: hits - lookups answered from the cache, misses - lookups read from the database,
+                            expired - results dropped for being older than the time to live,
+                            evictions - results dropped to stay within max_size,
+                            invalidations - results dropped because a table they were read from was written,
+                            size - the results currently cached
+        """
+        with self._lock:
+            return {**self._stats, "size": len(self._entries)}
+
+    def reset(self) -> None:
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
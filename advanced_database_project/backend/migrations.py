@@ -0,0 +1,632 @@
+import hashlib
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from advanced_database_project.backend.sql import SqlWrapper
+
+
+def image_hash(image: bytes) -> str:
+    """
+    Get the key an image is stored under in the Images table
+
+    Args:
+        image (bytes): The image file contents
+
+    Returns:
+        str: The SHA-256 hex digest of the image
+    """
+    return hashlib.sha256(image).hexdigest()
+
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    One step of the schema, applied to databases whose PRAGMA user_version is below its version.
+
+    create_database_script.sql builds version 0, every change to the schema after that is a migration, so existing
+    databases are upgraded in place instead of being dropped and rebuilt.
+    The upgrade is either an SQL script, or a function called with the SqlWrapper for changes that need Python.
+    """
+    version: int
+    description: str
+    upgrade: str | Callable[["SqlWrapper"], None]
+
+
+def move_images_to_store(sql: "SqlWrapper") -> None:
+    """
+    Migration 6, move the image BLOBs out of Products into the Images table.
+    Each distinct image is stored once, keyed by the SHA-256 of its contents, and products reference it by Image_ID,
+    so listing products no longer reads the images off disk.
+
+    Args:
+        sql (SqlWrapper): The database to migrate, inside the migration's transaction
+    """
+    sql.db.create_function("image_hash", 1, image_hash, deterministic=True)
+
+    sql.execute("DROP TABLE IF EXISTS Images")
+    sql.execute("""
+                CREATE TABLE Images
+                (Image_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+                Image_Hash TEXT UNIQUE NOT NULL,
+                Image_Data BLOB NOT NULL
+                )
+                """)
+    sql.execute("ALTER TABLE Products ADD COLUMN Image_ID INTEGER REFERENCES Images (Image_ID)")
+
+    sql.execute("""
+                INSERT OR IGNORE INTO Images (Image_Hash, Image_Data)
+                SELECT image_hash(Product_Image), Product_Image
+                FROM Products
+                WHERE Product_Image IS NOT NULL
+                ORDER BY Product_ID
+                """)
+    sql.execute("""
+                UPDATE Products
+                SET Image_ID = (SELECT Image_ID FROM Images WHERE Image_Hash = image_hash(Products.Product_Image))
+                WHERE Product_Image IS NOT NULL
+                """)
+
+    # The view reads Product_Image, it has to be replaced before the column can be dropped
+    sql.execute("DROP VIEW IF EXISTS BestSellingProducts")
+    sql.execute("""
+                CREATE VIEW BestSellingProducts AS
+                SELECT
+                    p.Product_ID AS Product_ID,
+                    p.Product_Name AS Product_Name,
+                    p.Category_ID AS Category_ID,
+                    p.Price AS Price,
+                    p.Stock_Level AS Stock_Level,
+                    p.Supplier_ID AS Supplier_ID,
+                    p.Image_ID AS Image_ID,
+                    s.Total_Ordered AS Total_Ordered
+                FROM Product_Sales AS s
+                INNER JOIN Products AS p ON s.Product_ID = p.Product_ID
+                WHERE s.Total_Ordered > 0
+                ORDER BY s.Total_Ordered DESC, s.Product_ID
+                LIMIT 6
+                """)
+    sql.execute("ALTER TABLE Products DROP COLUMN Product_Image")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        version=1,
+        description="Index the foreign keys of Orders, Reviews and the baskets",
+        upgrade="""
+                CREATE INDEX IF NOT EXISTS Orders_Customer_ID_idx ON Orders (Customer_ID);
+                CREATE INDEX IF NOT EXISTS Orders_Product_ID_idx ON Orders (Product_ID);
+                CREATE INDEX IF NOT EXISTS Reviews_Product_ID_idx ON Reviews (Product_ID);
+                CREATE INDEX IF NOT EXISTS Customer_Basket_Customer_ID_idx ON Customer_Basket (Customer_ID);
+                CREATE INDEX IF NOT EXISTS Basket_Contents_Product_ID_idx ON Basket_Contents (Product_ID);
+                """,
+    ),
+    Migration(
+        version=2,
+        description="Index the customer of Shipping and Billing",
+        upgrade="""
+                CREATE INDEX IF NOT EXISTS Shipping_Customer_ID_idx ON Shipping (Customer_ID);
+                CREATE INDEX IF NOT EXISTS Billing_Customer_ID_idx ON Billing (Customer_ID);
+                """,
+    ),
+    Migration(
+        version=3,
+        description="Replace the BestSellingProducts view with a trigger-maintained sales rollup",
+        upgrade="""
+                -- Product_Sales is derived from Orders, it survives the .sql script dropping the tables
+                DROP TABLE IF EXISTS Product_Sales;
+                CREATE TABLE Product_Sales
+                (Product_ID INTEGER PRIMARY KEY,
+                Total_Ordered INTEGER NOT NULL
+                );
+                CREATE INDEX Product_Sales_Total_Ordered_idx ON Product_Sales (Total_Ordered DESC, Product_ID);
+
+                INSERT INTO Product_Sales (Product_ID, Total_Ordered)
+                SELECT Product_ID, SUM(Order_Quantity) FROM Orders GROUP BY Product_ID;
+
+                CREATE TRIGGER Product_Sales_Insert
+                AFTER INSERT ON Orders
+                FOR EACH ROW
+                BEGIN
+                    INSERT INTO Product_Sales (Product_ID, Total_Ordered) VALUES (NEW.Product_ID, NEW.Order_Quantity)
+                    ON CONFLICT (Product_ID) DO UPDATE SET Total_Ordered = Total_Ordered + excluded.Total_Ordered;
+                END;
+
+                CREATE TRIGGER Product_Sales_Update
+                AFTER UPDATE OF Product_ID, Order_Quantity ON Orders
+                FOR EACH ROW
+                BEGIN
+                    UPDATE Product_Sales
+                    SET Total_Ordered = Total_Ordered - OLD.Order_Quantity
+                    WHERE Product_ID = OLD.Product_ID;
+                    INSERT INTO Product_Sales (Product_ID, Total_Ordered) VALUES (NEW.Product_ID, NEW.Order_Quantity)
+                    ON CONFLICT (Product_ID) DO UPDATE SET Total_Ordered = Total_Ordered + excluded.Total_Ordered;
+                END;
+
+                CREATE TRIGGER Product_Sales_Delete
+                AFTER DELETE ON Orders
+                FOR EACH ROW
+                BEGIN
+                    UPDATE Product_Sales
+                    SET Total_Ordered = Total_Ordered - OLD.Order_Quantity
+                    WHERE Product_ID = OLD.Product_ID;
+                END;
+
+                -- The view is kept for ad hoc queries, it now reads the rollup in index order
+                DROP VIEW IF EXISTS BestSellingProducts;
+                CREATE VIEW BestSellingProducts AS
+                SELECT
+                    p.Product_ID AS Product_ID,
+                    p.Product_Name AS Product_Name,
+                    p.Category_ID AS Category_ID,
+                    p.Price AS Price,
+                    p.Stock_Level AS Stock_Level,
+                    p.Supplier_ID AS Supplier_ID,
+                    p.Product_Image AS Product_Image,
+                    s.Total_Ordered AS Total_Ordered
+                FROM Product_Sales AS s
+                INNER JOIN Products AS p ON s.Product_ID = p.Product_ID
+                WHERE s.Total_Ordered > 0
+                ORDER BY s.Total_Ordered DESC, s.Product_ID
+                LIMIT 6;
+                """,
+    ),
+    Migration(
+        version=4,
+        description="Replace the CustomerBasketValue view with trigger-maintained basket totals",
+        upgrade="""
+                DROP TABLE IF EXISTS Basket_Totals;
+                CREATE TABLE Basket_Totals
+                (Basket_ID INTEGER PRIMARY KEY,
+                Item_Count INTEGER NOT NULL,
+                Total_Basket_Value INTEGER NOT NULL
+                );
+
+                INSERT INTO Basket_Totals (Basket_ID, Item_Count, Total_Basket_Value)
+                SELECT bc.Basket_ID, SUM(bc.Quantity), SUM(bc.Quantity * p.Price)
+                FROM Basket_Contents AS bc
+                INNER JOIN Products AS p ON bc.Product_ID = p.Product_ID
+                GROUP BY bc.Basket_ID;
+
+                CREATE TRIGGER Basket_Totals_Insert
+                AFTER INSERT ON Basket_Contents
+                FOR EACH ROW
+                BEGIN
+                    INSERT INTO Basket_Totals (Basket_ID, Item_Count, Total_Basket_Value)
+                    VALUES (NEW.Basket_ID, NEW.Quantity,
+                            NEW.Quantity * (SELECT Price FROM Products WHERE Product_ID = NEW.Product_ID))
+                    ON CONFLICT (Basket_ID) DO UPDATE
+                    SET Item_Count = Item_Count + excluded.Item_Count,
+                        Total_Basket_Value = Total_Basket_Value + excluded.Total_Basket_Value;
+                END;
+
+                CREATE TRIGGER Basket_Totals_Update
+                AFTER UPDATE OF Basket_ID, Product_ID, Quantity ON Basket_Contents
+                FOR EACH ROW
+                BEGIN
+                    UPDATE Basket_Totals
+                    SET Item_Count = Item_Count - OLD.Quantity,
+                        Total_Basket_Value = Total_Basket_Value -
+                                             OLD.Quantity * (SELECT Price FROM Products WHERE Product_ID = OLD.Product_ID)
+                    WHERE Basket_ID = OLD.Basket_ID;
+                    INSERT INTO Basket_Totals (Basket_ID, Item_Count, Total_Basket_Value)
+                    VALUES (NEW.Basket_ID, NEW.Quantity,
+                            NEW.Quantity * (SELECT Price FROM Products WHERE Product_ID = NEW.Product_ID))
+                    ON CONFLICT (Basket_ID) DO UPDATE
+                    SET Item_Count = Item_Count + excluded.Item_Count,
+                        Total_Basket_Value = Total_Basket_Value + excluded.Total_Basket_Value;
+                END;
+
+                CREATE TRIGGER Basket_Totals_Delete
+                AFTER DELETE ON Basket_Contents
+                FOR EACH ROW
+                BEGIN
+                    UPDATE Basket_Totals
+                    SET Item_Count = Item_Count - OLD.Quantity,
+                        Total_Basket_Value = Total_Basket_Value -
+                                             OLD.Quantity * (SELECT Price FROM Products WHERE Product_ID = OLD.Product_ID)
+                    WHERE Basket_ID = OLD.Basket_ID;
+                END;
+
+                -- Reprice every basket holding the product, found through Basket_Contents_Product_ID_idx
+                CREATE TRIGGER Basket_Totals_Price
+                AFTER UPDATE OF Price ON Products
+                FOR EACH ROW WHEN NEW.Price IS NOT OLD.Price
+                BEGIN
+                    UPDATE Basket_Totals
+                    SET Total_Basket_Value = Total_Basket_Value + (NEW.Price - OLD.Price) *
+                        (SELECT Quantity FROM Basket_Contents
+                         WHERE Basket_ID = Basket_Totals.Basket_ID AND Product_ID = NEW.Product_ID)
+                    WHERE Basket_ID IN (SELECT Basket_ID FROM Basket_Contents WHERE Product_ID = NEW.Product_ID);
+                END;
+
+                CREATE TRIGGER Basket_Totals_Basket_Delete
+                AFTER DELETE ON Customer_Basket
+                FOR EACH ROW
+                BEGIN
+                    DELETE FROM Basket_Totals WHERE Basket_ID = OLD.Basket_ID;
+                END;
+
+                DROP VIEW IF EXISTS CustomerBasketValue;
+                CREATE VIEW CustomerBasketValue AS
+                SELECT
+                    t.Basket_ID AS Basket_ID,
+                    cb.Customer_ID AS Customer_ID,
+                    t.Total_Basket_Value AS Total_Basket_Value
+                FROM Basket_Totals AS t
+                INNER JOIN Customer_Basket AS cb ON t.Basket_ID = cb.Basket_ID
+                WHERE t.Item_Count > 0;
+                """,
+    ),
+    Migration(
+        version=5,
+        description="Add the Product_Search full-text index over product, category and supplier names",
+        upgrade="""
+                CREATE INDEX IF NOT EXISTS Products_Category_ID_idx ON Products (Category_ID);
+                CREATE INDEX IF NOT EXISTS Products_Supplier_ID_idx ON Products (Supplier_ID);
+
+                -- The rowid of each search row is the Product_ID
+                DROP TABLE IF EXISTS Product_Search;
+                CREATE VIRTUAL TABLE Product_Search USING fts5(
+                    Product_Name, Category_Name, Supplier_Name,
+                    tokenize = 'unicode61 remove_diacritics 2',
+                    prefix = '1 2 3'
+                );
+
+                INSERT INTO Product_Search (rowid, Product_Name, Category_Name, Supplier_Name)
+                SELECT p.Product_ID, p.Product_Name, c.Category_Name, s.Supplier_Name
+                FROM Products AS p
+                INNER JOIN Category AS c ON p.Category_ID = c.Category_ID
+                INNER JOIN Suppliers AS s ON p.Supplier_ID = s.Supplier_ID;
+
+                CREATE TRIGGER Product_Search_Insert
+                AFTER INSERT ON Products
+                FOR EACH ROW
+                BEGIN
+                    INSERT INTO Product_Search (rowid, Product_Name, Category_Name, Supplier_Name)
+                    VALUES (NEW.Product_ID, NEW.Product_Name,
+                            (SELECT Category_Name FROM Category WHERE Category_ID = NEW.Category_ID),
+                            (SELECT Supplier_Name FROM Suppliers WHERE Supplier_ID = NEW.Supplier_ID));
+                END;
+
+                CREATE TRIGGER Product_Search_Update
+                AFTER UPDATE OF Product_ID, Product_Name, Category_ID, Supplier_ID ON Products
+                FOR EACH ROW
+                BEGIN
+                    DELETE FROM Product_Search WHERE rowid = OLD.Product_ID;
+                    INSERT INTO Product_Search (rowid, Product_Name, Category_Name, Supplier_Name)
+                    VALUES (NEW.Product_ID, NEW.Product_Name,
+                            (SELECT Category_Name FROM Category WHERE Category_ID = NEW.Category_ID),
+                            (SELECT Supplier_Name FROM Suppliers WHERE Supplier_ID = NEW.Supplier_ID));
+                END;
+
+                CREATE TRIGGER Product_Search_Delete
+                AFTER DELETE ON Products
+                FOR EACH ROW
+                BEGIN
+                    DELETE FROM Product_Search WHERE rowid = OLD.Product_ID;
+                END;
+
+                CREATE TRIGGER Product_Search_Category
+                AFTER UPDATE OF Category_Name ON Category
+                FOR EACH ROW
+                BEGIN
+                    UPDATE Product_Search SET Category_Name = NEW.Category_Name
+                    WHERE rowid IN (SELECT Product_ID FROM Products WHERE Category_ID = NEW.Category_ID);
+                END;
+
+                CREATE TRIGGER Product_Search_Supplier
+                AFTER UPDATE OF Supplier_Name ON Suppliers
+                FOR EACH ROW
+                BEGIN
+                    UPDATE Product_Search SET Supplier_Name = NEW.Supplier_Name
+                    WHERE rowid IN (SELECT Product_ID FROM Products WHERE Supplier_ID = NEW.Supplier_ID);
+                END;
+                """,
+    ),
+    Migration(
+        version=6,
+        description="Move the product images into the content-addressed Images table",
+        upgrade=move_images_to_store,
+    ),
+    Migration(
+        version=7,
+        description="Add the Image_Renditions table of pre-resized product images",
+        upgrade="""
+                -- The renditions are generated from Images (see DatabaseConnection.backfill_renditions)
+                DROP TABLE IF EXISTS Image_Renditions;
+                CREATE TABLE Image_Renditions
+                (Image_ID INTEGER NOT NULL REFERENCES Images (Image_ID) ON DELETE CASCADE,
+                Size INTEGER NOT NULL,
+                Rendition_Data BLOB NOT NULL,
+                PRIMARY KEY (Image_ID, Size)
+                );
+                """,
+    ),
+    Migration(
+        version=8,
+        description="Take stock in the order writes instead of a trigger per ordered product",
+        upgrade="""
+                -- Trigger3 updated Products once for every Orders row and let the stock go negative,
+                -- checkout() and place_order() now take the stock with one conditional UPDATE
+                DROP TRIGGER IF EXISTS Trigger3;
+                """,
+    ),
+    Migration(
+        version=9,
+        description="Split Orders into Order_Headers and Order_Lines",
+        upgrade="""
+                DROP TABLE IF EXISTS Order_Lines;
+                DROP TABLE IF EXISTS Order_Headers;
+                CREATE TABLE Order_Headers
+                (Order_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+                Order_Date TEXT NOT NULL,
+                Customer_ID INTEGER NOT NULL REFERENCES Customers (Customer_ID),
+                Shipping_ID INTEGER NOT NULL REFERENCES Shipping (Shipping_ID),
+                Billing_ID INTEGER NOT NULL REFERENCES Billing (Billing_ID),
+                Order_Status TEXT NOT NULL
+                );
+                CREATE INDEX Order_Headers_Customer_ID_idx ON Order_Headers (Customer_ID);
+
+                CREATE TABLE Order_Lines
+                (Order_ID INTEGER NOT NULL REFERENCES Order_Headers (Order_ID) ON DELETE CASCADE,
+                Product_ID INTEGER NOT NULL REFERENCES Products (Product_ID),
+                Order_Quantity INTEGER NOT NULL,
+                PRIMARY KEY (Order_ID, Product_ID)
+                );
+                CREATE INDEX Order_Lines_Product_ID_idx ON Order_Lines (Product_ID);
+
+                -- The rows of one order shared the date, customer, shipping, billing and status,
+                -- each order keeps the lowest Order_ID of its rows
+                INSERT INTO Order_Headers (Order_ID, Order_Date, Customer_ID, Shipping_ID, Billing_ID, Order_Status)
+                SELECT MIN(Order_ID), Order_Date, Customer_ID, Shipping_ID, Billing_ID, Order_Status
+                FROM Orders
+                GROUP BY Order_Date, Customer_ID, Shipping_ID, Billing_ID, Order_Status;
+
+                INSERT INTO Order_Lines (Order_ID, Product_ID, Order_Quantity)
+                SELECT h.Order_ID, o.Product_ID, SUM(o.Order_Quantity)
+                FROM Orders AS o
+                INNER JOIN Order_Headers AS h ON h.Order_Date = o.Order_Date AND
+                                                 h.Customer_ID = o.Customer_ID AND
+                                                 h.Shipping_ID = o.Shipping_ID AND
+                                                 h.Billing_ID = o.Billing_ID AND
+                                                 h.Order_Status = o.Order_Status
+                GROUP BY h.Order_ID, o.Product_ID;
+
+                -- Dropping Orders drops its indexes and the Product_Sales triggers, they now follow Order_Lines
+                DROP TABLE Orders;
+
+                CREATE TRIGGER Product_Sales_Insert
+                AFTER INSERT ON Order_Lines
+                FOR EACH ROW
+                BEGIN
+                    INSERT INTO Product_Sales (Product_ID, Total_Ordered) VALUES (NEW.Product_ID, NEW.Order_Quantity)
+                    ON CONFLICT (Product_ID) DO UPDATE SET Total_Ordered = Total_Ordered + excluded.Total_Ordered;
+                END;
+
+                CREATE TRIGGER Product_Sales_Update
+                AFTER UPDATE OF Product_ID, Order_Quantity ON Order_Lines
+                FOR EACH ROW
+                BEGIN
+                    UPDATE Product_Sales
+                    SET Total_Ordered = Total_Ordered - OLD.Order_Quantity
+                    WHERE Product_ID = OLD.Product_ID;
+                    INSERT INTO Product_Sales (Product_ID, Total_Ordered) VALUES (NEW.Product_ID, NEW.Order_Quantity)
+                    ON CONFLICT (Product_ID) DO UPDATE SET Total_Ordered = Total_Ordered + excluded.Total_Ordered;
+                END;
+
+                CREATE TRIGGER Product_Sales_Delete
+                AFTER DELETE ON Order_Lines
+                FOR EACH ROW
+                BEGIN
+                    UPDATE Product_Sales
+                    SET Total_Ordered = Total_Ordered - OLD.Order_Quantity
+                    WHERE Product_ID = OLD.Product_ID;
+                END;
+
+                -- Orders is kept as a read-only view of one row per order line, for ad hoc queries and reports
+                CREATE VIEW Orders AS
+                SELECT
+                    h.Order_ID AS Order_ID,
+                    h.Order_Date AS Order_Date,
+                    h.Customer_ID AS Customer_ID,
+                    l.Product_ID AS Product_ID,
+                    h.Shipping_ID AS Shipping_ID,
+                    h.Billing_ID AS Billing_ID,
+                    l.Order_Quantity AS Order_Quantity,
+                    h.Order_Status AS Order_Status
+                FROM Order_Headers AS h
+                INNER JOIN Order_Lines AS l ON l.Order_ID = h.Order_ID;
+
+                DROP VIEW IF EXISTS Order_Summaries;
+                CREATE VIEW Order_Summaries AS
+                SELECT
+                    h.Order_ID AS Order_ID,
+                    h.Order_Date AS Order_Date,
+                    h.Customer_ID AS Customer_ID,
+                    h.Order_Status AS Order_Status,
+                    COUNT(*) AS Product_Count,
+                    SUM(l.Order_Quantity) AS Item_Count
+                FROM Order_Headers AS h
+                INNER JOIN Order_Lines AS l ON l.Order_ID = h.Order_ID
+                GROUP BY h.Order_ID;
+                """,
+    ),
+    Migration(
+        version=10,
+        description="Store every date as ISO-8601 (YYYY-MM-DD) and index the order, delivery and review dates",
+        upgrade="""
+                -- The pages stored dates as DD/MM/YYYY, which does not sort or compare in date order
+                UPDATE Order_Headers
+                SET Order_Date = substr(Order_Date, 7, 4) || '-' || substr(Order_Date, 4, 2) || '-' ||
+                                 substr(Order_Date, 1, 2)
+                WHERE Order_Date GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]';
+                UPDATE Shipping
+                SET Delivery_Date = substr(Delivery_Date, 7, 4) || '-' || substr(Delivery_Date, 4, 2) || '-' ||
+                                    substr(Delivery_Date, 1, 2)
+                WHERE Delivery_Date GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]';
+                UPDATE Reviews
+                SET Review_Date = substr(Review_Date, 7, 4) || '-' || substr(Review_Date, 4, 2) || '-' ||
+                                  substr(Review_Date, 1, 2)
+                WHERE Review_Date GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]';
+                UPDATE Customer_Basket
+                SET Basket_Created_Date = substr(Basket_Created_Date, 7, 4) || '-' ||
+                                          substr(Basket_Created_Date, 4, 2) || '-' ||
+                                          substr(Basket_Created_Date, 1, 2)
+                WHERE Basket_Created_Date GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]';
+
+                CREATE INDEX IF NOT EXISTS Order_Headers_Order_Date_idx ON Order_Headers (Order_Date);
+                CREATE INDEX IF NOT EXISTS Shipping_Delivery_Date_idx ON Shipping (Delivery_Date);
+                CREATE INDEX IF NOT EXISTS Reviews_Review_Date_idx ON Reviews (Review_Date);
+                """,
+    ),
+    Migration(
+        version=11,
+        description="Index the product sorts so product listings can be read a page at a time",
+        upgrade="""
+                -- Each index also holds the Product_ID / Category_ID (the rowid), which breaks ties between equal keys
+                CREATE INDEX IF NOT EXISTS Products_Product_Name_idx ON Products (Product_Name);
+                CREATE INDEX IF NOT EXISTS Products_Price_idx ON Products (Price);
+                CREATE INDEX IF NOT EXISTS Category_Category_Name_idx ON Category (Category_Name);
+                """,
+    ),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+@dataclass(frozen=True)
+class Rollup:
+    """
+    A summary table kept up to date by triggers, and the query that recomputes it from the tables it summarises.
+    The first column is the primary key of the rollup.
+    """
+    table: str
+    columns: Tuple[str, ...]
+    query: str
+
+
+ROLLUPS: List[Rollup] = [
+    Rollup(
+        table="Product_Sales",
+        columns=("Product_ID", "Total_Ordered"),
+        query="SELECT Product_ID, SUM(Order_Quantity) FROM Order_Lines GROUP BY Product_ID",
+    ),
+    Rollup(
+        table="Basket_Totals",
+        columns=("Basket_ID", "Item_Count", "Total_Basket_Value"),
+        query="""
+              SELECT bc.Basket_ID, SUM(bc.Quantity), SUM(bc.Quantity * p.Price)
+              FROM Basket_Contents AS bc
+              INNER JOIN Products AS p ON bc.Product_ID = p.Product_ID
+              GROUP BY bc.Basket_ID
+              """,
+    ),
+    Rollup(
+        table="Product_Search",
+        columns=("rowid", "Product_Name", "Category_Name", "Supplier_Name"),
+        query="""
+              SELECT p.Product_ID, p.Product_Name, c.Category_Name, s.Supplier_Name
+              FROM Products AS p
+              INNER JOIN Category AS c ON p.Category_ID = c.Category_ID
+              INNER JOIN Suppliers AS s ON p.Supplier_ID = s.Supplier_ID
+              """,
+    ),
+]
+
+
+def get_schema_version(connection: sqlite3.Connection) -> int:
+    """
+    Get the schema version of a database
+
+    Args:
+        connection (sqlite3.Connection): A connection to the database
+
+    Returns:
+        int: The PRAGMA user_version of the database
+    """
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def split_statements(script: str) -> List[str]:
+    """
+    Split an SQL script into its statements, so it can be run one statement at a time inside a transaction
+    (executescript commits any open transaction first)
+
+    Args:
+        script (str): The SQL script
+
+    Returns:
+        List[str]: The statements, semicolons inside strings and trigger bodies don't end a statement
+    """
+    statements = []
+    statement = ""
+    for part in script.split(";"):
+        statement += part + ";"
+        if sqlite3.complete_statement(statement):
+            if statement.strip(" \t\n;"):
+                statements.append(statement.strip())
+            statement = ""
+    if statement.strip(" \t\n;"):
+        statements.append(statement.strip().removesuffix(";"))
+    return statements
+
+
+def apply_migration(sql: "SqlWrapper", migration: Migration) -> None:
+    """
+    Apply a single migration and set the schema version, in one transaction.
+    Inside a transaction() the migration is a savepoint of it, so it is rolled back with it.
+
+    Args:
+        sql (SqlWrapper): The database to migrate
+        migration (Migration): The migration to apply
+
+    Raises:
+        sqlite3.Error: If the migration fails, the database is left at the previous version
+    """
+    with sql.transaction() as transaction:
+        try:
+            if isinstance(migration.upgrade, str):
+                for statement in split_statements(migration.upgrade):
+                    sql.execute(statement)
+            else:
+                migration.upgrade(sql)
+            sql.execute(f"PRAGMA user_version = {int(migration.version)}")
+        except sqlite3.Error as error:
+            # Fails the transaction this one is nested in with the migration's error
+            transaction.error = transaction.error or error
+        finally:
+            # The migration can change any table
+            sql.lookup_cache.clear()
+    if transaction.failed:
+        raise transaction.error
+
+
+def migrate(sql: "SqlWrapper", migrations: List[Migration] = MIGRATIONS) -> List[Migration]:
+    """
+    Upgrade a database to the latest schema version by applying every migration it has not had yet, in order
+
+    Args:
+        sql (SqlWrapper): The database to migrate
+        migrations (List[Migration]): The migrations, in version order
+
+    Returns:
+        List[Migration]: The migrations that were applied
+
+    Raises:
+        sqlite3.DatabaseError: If the database was created by a newer version of the application
+    """
+    with sql.write_lock:
+        version = get_schema_version(sql.db)
+        latest = migrations[-1].version if migrations else 0
+        if version > latest:
+            raise sqlite3.DatabaseError(f"The database schema is version {version}, "
+                                        f"this application only supports up to version {latest}.")
+
+        applied = []
+        for migration in migrations:
+            if migration.version > version:
+                apply_migration(sql, migration)
+                applied.append(migration)
+        return applied
@@ -0,0 +1,217 @@
+import math
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Any, List
+
+_STRING_LITERAL = re.compile(r"[xX]?'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+# Latency histogram buckets are powers of two in microseconds, bucket n counts latencies up to 2^n microseconds
+HISTOGRAM_BUCKETS = 32
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql_query: str) -> str:
+    """
+    Normalize SQL text so every execution of the same statement is counted together.
+    Whitespace is collapsed and literal strings and numbers are replaced with ?.
+
+    Args:
+        sql_query (str): The SQL text
+
+    Returns:
+        str: The normalized SQL text
+    """
+    sql_query = _STRING_LITERAL.sub("?", sql_query)
+    sql_query = _NUMBER_LITERAL.sub("?", sql_query)
+    return _WHITESPACE.sub(" ", sql_query).strip()
+
+
+def latency_bucket(elapsed: float) -> int:
+    """
+    Get the histogram bucket of a latency
+
+    Args:
+        elapsed (float): The latency in seconds
+
+    Returns:
+        int: The index of the bucket
+    """
+    microseconds = elapsed * 1_000_000
+    if microseconds <= 1:
+        return 0
+    return min(math.ceil(math.log2(microseconds)), HISTOGRAM_BUCKETS - 1)
+
+
+class QueryStatistics:
+    """
+    The running statistics of one normalized SQL statement
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Estimate a latency percentile from the histogram
+
+        Args:
+            percentile (float): The percentile, between 0 and 100
+
+        Returns:
+            float: The upper bound of the bucket holding the percentile, in seconds
+        """
+        if self.calls == 0:
+            return 0.0
+        target = math.ceil(self.calls * percentile / 100)
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target:
+                return min(2 ** bucket / 1_000_000, self.max_time)
+        return self.max_time
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "total_time": self.total_time,
+            "mean_time": self.total_time / self.calls if self.calls else 0.0,
+            "max_time": self.max_time,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "rows": self.rows,
+            "histogram": list(self.histogram),
+        }
+
+
+class QueryStats:
+    """
+    Thread-safe per-query instrumentation, keyed by normalized SQL text.
+
+    Records call counts, total and max time, a latency histogram (to estimate p50/p95/p99) and the rows returned
+    or changed by every statement. Statements slower than the slow query threshold are also added to a bounded
+    slow query log along with their EXPLAIN QUERY PLAN.
+    """
+
+    def __init__(self, slow_query_threshold: float = 0.1, slow_log_size: int = 100) -> None:
+        """
+        Args:
+            slow_query_threshold (float): Statements slower than this many seconds are added to the slow query log
+            slow_log_size (int): The number of slow queries kept, the oldest are dropped first
+        """
+        self.slow_query_threshold = slow_query_threshold
+        self._queries: Dict[str, QueryStatistics] = {}
+        self._slow_queries = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+
+    def record(self, sql_query: str, elapsed: float, rows: int = 0) -> None:
+        """
+        Record one execution of a statement
+
+        Args:
+            sql_query (str): The SQL text that was executed
+            elapsed (float): How long the statement took to execute, in seconds
+            rows (int): The number of rows changed by the statement
+        """
+        key = normalize_sql(sql_query)
+        with self._lock:
+            statistics = self._queries.get(key)
+            if statistics is None:
+                statistics = self._queries[key] = QueryStatistics()
+            statistics.calls += 1
+            statistics.total_time += elapsed
+            statistics.max_time = max(statistics.max_time, elapsed)
+            statistics.rows += max(rows, 0)
+            statistics.histogram[latency_bucket(elapsed)] += 1
+
+    def record_fetch(self, sql_query: str, rows: int, elapsed: float) -> None:
+        """
+        Add the rows fetched from a SELECT, and the time spent fetching them, to the statement's statistics
+
+        Args:
+            sql_query (str): The SQL text that was executed
+            rows (int): The number of rows fetched
+            elapsed (float): The time spent fetching the rows, in seconds
+        """
+        key = normalize_sql(sql_query)
+        with self._lock:
+            statistics = self._queries.get(key)
+            if statistics is not None:
+                statistics.rows += rows
+                statistics.total_time += elapsed
+
+    def is_slow(self, elapsed: float) -> bool:
+        return self.slow_query_threshold is not None and elapsed >= self.slow_query_threshold
+
+    def log_slow_query(self, sql_query: str, elapsed: float, query_plan: List[str]) -> None:
+        """
+        Add a statement to the slow query log
+
+        Args:
+            sql_query (str): The SQL text that was executed
+            elapsed (float): How long the statement took to execute, in seconds
+            query_plan (List[str]): The EXPLAIN QUERY PLAN of the statement
+        """
+        with self._lock:
+            self._slow_queries.append({
+                "sql": normalize_sql(sql_query),
+                "elapsed": elapsed,
+                "query_plan": query_plan,
+                "timestamp": time.time(),
+            })
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the statistics of every statement recorded since the last reset
+
+        Returns:
+            Dict[str, Dict[str, Any]]: The statistics of each normalized statement, slowest total time first
+        """
+        with self._lock:
+            snapshot = {sql_query: statistics.snapshot() for sql_query, statistics in self._queries.items()}
+        return dict(sorted(snapshot.items(), key=lambda item: item[1]["total_time"], reverse=True))
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        """
+        Get the slow query log
+
+        Returns:
+            List[Dict[str, Any]]: The slow queries, oldest first
+        """
+        with self._lock:
+            return list(self._slow_queries)
+
+    def reset(self) -> None:
+        """
+        Clear every statistic and the slow query log
+        """
+        with self._lock:
+            self._queries.clear()
+            self._slow_queries.clear()
+
+    def report(self, limit: int = 10) -> str:
+        """
+        Format the statements with the highest total time as a table
+
+        Args:
+            limit (int): The number of statements to include
+
+        Returns:
+            str: The report
+        """
+        lines = [f"{'Calls':>7} {'Total ms':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'Max ms':>8} {'Rows':>8}  SQL"]
+        for sql_query, statistics in list(self.snapshot().items())[:limit]:
+            lines.append(f"{statistics['calls']:>7} {statistics['total_time'] * 1000:>10.2f} "
+                         f"{statistics['p50'] * 1000:>8.2f} {statistics['p95'] * 1000:>8.2f} "
+                         f"{statistics['p99'] * 1000:>8.2f} {statistics['max_time'] * 1000:>8.2f} "
+                         f"{statistics['rows']:>8}  {sql_query[:80]}")
+        return "\n".join(lines)
@@ -0,0 +1,38 @@
+import io
+from typing import Tuple
+
+from PIL import Image
+
+# The sizes the pages draw product images at: the product cards (150px) and the product info page (320px)
+THUMBNAIL_SIZE = 150
+DETAIL_SIZE = 320
+RENDITION_SIZES: Tuple[int, ...] = (THUMBNAIL_SIZE, DETAIL_SIZE)
+
+# The renditions are drawn on the white image canvases
+BACKGROUND = (255, 255, 255)
+
+
+def make_rendition(image: bytes, size: int) -> bytes:
+    """
+    Resize an image to fit in a size x size square, the way the pages used to on every render.
+
+    The rendition is stored as a binary PPM, which is raw RGB pixels behind a short header, so drawing it is a copy
+    rather than a decompress and resize. Transparent images are flattened onto the white canvas background.
+
+    Args:
+        image (bytes): The original image file contents
+        size (int): The longest side of the rendition in pixels
+
+    Returns:
+        bytes: The rendition as a PPM file
+    """
+    with Image.open(io.BytesIO(image)) as original:
+        original.thumbnail((size, size), Image.LANCZOS)
+        rendition = original.convert("RGBA")
+
+    flattened = Image.new("RGB", rendition.size, BACKGROUND)
+    flattened.paste(rendition, mask=rendition.getchannel("A"))
+
+    output = io.BytesIO()
+    flattened.save(output, format="PPM")
+    return output.getvalue()
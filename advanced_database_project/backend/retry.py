@@ -0,0 +1,133 @@
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Any, Dict
+
+# The primary result codes of errors that go away once the other connection finishes
+BUSY_ERROR_CODES = {sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED}
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How a statement is retried when the database is busy or locked by another connection or process.
+
+    SQLite's busy_timeout already waits for a lock inside a single attempt. Some busy errors are returned straight
+    away without waiting (e.g. to avoid a deadlock between two writers), so the statement is retried after a jittered
+    exponential backoff: attempt n sleeps a random time between 0 and min(max_delay, base_delay * 2^n) seconds.
+    """
+    max_attempts: int = 5
+    base_delay: float = 0.01
+    max_delay: float = 1.0
+
+    def delay(self, attempt: int) -> float:
+        """
+        Get how long to sleep before retrying
+
+        Args:
+            attempt (int): The number of attempts that have failed so far, starting at 1
+
+        Returns:
+            float: The delay in seconds
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+def is_busy_error(error: sqlite3.Error) -> bool:
+    """
+    Check if an error was caused by another connection holding a lock
+
+    Args:
+        error (sqlite3.Error): The error raised by SQLite
+
+    Returns:
+        bool: True for SQLITE_BUSY and SQLITE_LOCKED, including their extended result codes
+    """
+    error_code = getattr(error, "sqlite_errorcode", None)
+    return error_code is not None and error_code & 0xFF in BUSY_ERROR_CODES
+
+
+class RetryStats:
+    """
+    Thread-safe counters of the busy retries made by a SqlWrapper
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats = {
+            "busy_errors": 0,
+            "retries": 0,
+            "wait_time": 0.0,
+            "recovered": 0,
+            "failures": 0,
+        }
+
+    def record(self, **counts: float) -> None:
+        with self._lock:
+            for name, count in counts.items():
+                self._stats[name] += count
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the retry statistics
+
+        Returns:
+            Dict[str, Any]: busy_errors - busy/locked errors seen, retries - statements run again,
+                            wait_time - seconds spent backing off, recovered - statements that succeeded after a retry,
+                            failures - statements that were still busy after the last attempt
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def reset(self) -> None:
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+
+def call_with_retry(function: Callable[..., Any], *args: Any,
+                    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+                    stats: RetryStats | None = None) -> Any:
+    """
+    Call a function, retrying it with a jittered exponential backoff while SQLite reports the database is busy
+
+    Args:
+        function (Callable): The function to call, e.g. cursor.execute or connection.commit
+        args (Any): The arguments of the function
+        policy (RetryPolicy): How many times to try and how long to back off
+        stats (RetryStats | None): The statistics to record the retries in
+
+    Returns:
+        Any: The return value of the function
+
+    Raises:
+        sqlite3.OperationalError: The busy error, if the database is still busy after the last attempt
+    """
+    attempt = 1
+    while True:
+        try:
+            result = function(*args)
+        except sqlite3.OperationalError as e:
+            if not is_busy_error(e):
+                raise
+            if stats is not None:
+                stats.record(busy_errors=1)
+            if attempt >= policy.max_attempts:
+                if stats is not None:
+                    stats.record(failures=1)
+                raise
+            delay = policy.delay(attempt)
+            time.sleep(delay)
+            if stats is not None:
+                stats.record(retries=1, wait_time=delay)
+            attempt += 1
+            continue
+
+        if attempt > 1 and stats is not None:
+            stats.record(recovered=1)
+        return result
@@ -0,0 +1,117 @@
+import sqlite3
+from collections import namedtuple
+from functools import lru_cache, partial
+from typing import Literal, Tuple, Callable, Any, Dict, List, Iterator
+
+RowFormat = Literal["dict", "tuple", "record"]
+ROW_FORMATS = ("dict", "tuple", "record")
+
+
+class Record(tuple):
+    """
+    Base class of the compact record classes generated for each query shape.
+
+    A record is a namedtuple, so it stores no per-row keys, and can be read by attribute (record.Price),
+    by position (record[3]) or by column name like a dict (record["Price"]), so it can be used anywhere
+    the dict rows were used.
+    """
+    __slots__ = ()
+    _index: Dict[str, int] = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                key = self._index[key]
+            except KeyError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+    def get(self, key: str, default: Any = None) -> Any:
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self) -> List[str]:
+        return list(self._index)
+
+    def values(self) -> List[Any]:
+        return list(self)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return zip(self._index, self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(zip(self._index, self))
+
+
+@lru_cache(maxsize=256)
+def record_class(columns: Tuple[str, ...]) -> type:
+    """
+    Get the record class for a query shape. Classes are generated once per distinct set of columns.
+
+    Args:
+        columns (Tuple[str, ...]): The column names returned by the query, in order
+
+    Returns:
+        type: A slotted namedtuple subclass of Record
+    """
+    base = namedtuple("Row", columns, rename=True)
+    return type("Record", (base, Record), {
+        "__slots__": (),
+        "_index": {column: i for i, column in enumerate(columns)},
+    })
+
+
+def validate_row_format(row_format: str) -> RowFormat:
+    """
+    Check a row format is supported
+
+    Args:
+        row_format (str): The row format to check
+
+    Returns:
+        RowFormat: The row format
+
+    Raises:
+        ValueError: If the row format is not supported
+    """
+    if row_format not in ROW_FORMATS:
+        raise ValueError(f"Unknown row format '{row_format}'. Choose from: {', '.join(ROW_FORMATS)}")
+    return row_format
+
+
+def prepare_cursor(cursor: sqlite3.Cursor, row_format: RowFormat) -> sqlite3.Cursor:
+    """
+    Set the row factory of a cursor for a row format.
+    Only the dict format needs sqlite3.Row, the other formats are built from the raw tuples.
+
+    Args:
+        cursor (sqlite3.Cursor): The cursor that will run the query
+        row_format (RowFormat): The format the rows will be returned in
+
+    Returns:
+        sqlite3.Cursor: The same cursor
+    """
+    cursor.row_factory = sqlite3.Row if row_format == "dict" else None
+    return cursor
+
+
+def row_converter(cursor: sqlite3.Cursor, row_format: RowFormat) -> Callable[[Any], Any] | None:
+    """
+    Get the function that converts the rows fetched from an executed cursor into the requested format
+
+    Args:
+        cursor (sqlite3.Cursor): A cursor that has executed a query, prepared with prepare_cursor()
+        row_format (RowFormat): The format to convert the rows to
+
+    Returns:
+        Callable[[Any], Any] | None: The conversion function, None if the rows are already in the right format
+    """
+    if row_format == "dict":
+        return dict
+    if row_format == "record" and cursor.description is not None:
+        # tuple.__new__ skips the length check namedtuple._make does, the row always matches the description
+        return partial(tuple.__new__, record_class(tuple(column[0] for column in cursor.description)))
+    return None
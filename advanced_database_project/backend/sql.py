@@ -1,27 +1,422 @@
+import re
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager, nullcontext, AbstractContextManager
 from pathlib import Path
-from typing import Literal, Tuple, List, Any, Dict
+from itertools import batched
+from typing import Literal, Tuple, List, Any, Dict, Iterator, Iterable, Set
+
+from advanced_database_project.backend.connection_pool import ConnectionPool
+from advanced_database_project.backend.lookup_cache import LookupCache, ALL_TABLES, written_tables
+from advanced_database_project.backend.query_stats import QueryStats
+from advanced_database_project.backend.retry import RetryPolicy, RetryStats, DEFAULT_RETRY_POLICY, call_with_retry
+from advanced_database_project.backend.storage_profiles import StorageProfile, DEFAULT_PROFILE, get_profile, apply_profile
+from advanced_database_project.backend.rows import RowFormat, validate_row_format, prepare_cursor, row_converter
+
+
+_READ_ONLY_STATEMENT = re.compile(r"\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+
+def is_read_only_statement(sql_query: str) -> bool:
+    """
+    Check if a statement only reads, so it can run on a read-only connection
+
+    Args:
+        sql_query (str): The SQL text
+
+    Returns:
+        bool: True for SELECT statements (including ones starting with a WITH clause that don't write a table)
+    """
+    return _READ_ONLY_STATEMENT.match(sql_query) is not None and written_tables(sql_query) == set()
+
+
+class Transaction:
+    """
+    A transaction (or a savepoint when nested) opened with SqlWrapper.transaction()
+    """
+
+    def __init__(self, savepoint: str | None = None) -> None:
+        self.savepoint = savepoint
+        self.error = None
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
 
 
 class SqlWrapper:
     """
     SQL Wrapper to create a connection to the database automatically and handle queries
 
-    SQL is configured to return Dict instead of tuples, with the keys as the column names and the values as the value
+    SQL is configured to return Dict instead of tuples, with the keys as the column names and the values as the value.
+    The row format can be changed for the whole wrapper or per query: "tuple" returns the raw tuples and "record"
+    returns a compact namedtuple per query shape that can still be indexed by column name (see rows.py).
+
+    SELECTs and writes use separate connections:
+    - SELECTs run on read-only (mode=ro) connections from a ConnectionPool, so reads can run off the Tk main thread.
+      A read connection is checked out for each statement and returned to the pool once its rows have been read,
+      so any number of threads can read with a pool of a few connections. While a thread streams an iter_query,
+      its other reads run on the writer, so they see its own writes. Every read sees a snapshot of the database,
+      so long scans (the XML backup, reports) never block or are blocked by writes.
+      This needs the write-ahead log, with a storage profile without it (or an in-memory database) SELECTs run on
+      the writer too.
+    - Writes (and every query inside a transaction(), so a unit of work reads its own writes) go through a single
+      writer connection. Writers are serialized by write_lock, a thread holds it for the whole of a transaction.
+      Each thread has its own cursor on the writer, so cursor.lastrowid is never shared between threads.
+
+    Every connection is configured with a storage profile (journal mode, synchronous, cache and mmap sizes),
+    see storage_profiles.py for the available profiles.
+
+    Every statement run through execute() is timed and counted in query_stats (see query_stats.py),
+    statements slower than slow_query_threshold seconds are logged with their query plan.
+
+    Several processes can share the database file. Each connection waits up to busy_timeout seconds for a lock,
+    and statements and commits that still fail with SQLITE_BUSY/SQLITE_LOCKED are retried with a jittered
+    exponential backoff (see retry.py). The writer takes the write lock as soon as a transaction begins
+    (BEGIN IMMEDIATE), so two writers never deadlock upgrading a read lock.
+
+    Lookups of rarely written reference data can be kept in lookup_cache with cached_select_query (see
+    lookup_cache.py). Every write through the writer invalidates the results read from the table it writes,
+    when the statement runs and again when its transaction commits or rolls back.
     """
 
-    def __init__(self, db_file: str = r".\database") -> None:
+    def __init__(self, db_file: str = r".\database", pool_size: int = 5,
+                 profile: str | StorageProfile = DEFAULT_PROFILE,
+                 row_format: RowFormat = "dict",
+                 slow_query_threshold: float | None = 0.1,
+                 busy_timeout: float = 5.0,
+                 retry_policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+                 lookup_cache_size: int = 256,
+                 lookup_cache_ttl: float | None = 300.0) -> None:
         self.db_file = db_file
-        self.db = sqlite3.connect(self.db_file)
-        self.db.row_factory = sqlite3.Row
-        self.cursor = self.db.cursor()
-        self.cursor.execute("PRAGMA foreign_keys=ON")
+        self.profile = get_profile(profile)
+        self.row_format = validate_row_format(row_format)
+        self.query_stats = QueryStats(slow_query_threshold=slow_query_threshold)
+        self.busy_timeout = busy_timeout
+        self.retry_policy = retry_policy
+        self.retry_stats = RetryStats()
+        self.lookup_cache = LookupCache(max_size=lookup_cache_size, ttl=lookup_cache_ttl)
+        self._local = threading.local()
+        # A private connection data_version is read on, opened the first time it is needed
+        self._version_connection = None
+        self._version_lock = threading.Lock()
+        # The tables written by the writer's open transaction, invalidated again when it ends (see _invalidate)
+        self._written_tables = set()
+
+        # The writer is opened first, it creates the database file the read-only connections need
+        self.write_lock = threading.RLock()
+        self.writer = sqlite3.connect(self.db_file, check_same_thread=False, isolation_level="IMMEDIATE")
+        self.configure_connection(self.writer)
+
+        # An in-memory database is private to its connection, so it is read through the writer.
+        # So is a database without the write-ahead log, where a reader's lock would block the writer's commits
+        self.read_pool = None
+        if self.db_file != ":memory:" and self.writer.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            self.read_pool = ConnectionPool(f"{Path(self.db_file).resolve().as_uri()}?mode=ro", size=pool_size,
+                                            on_connect=self.configure_read_connection, uri=True)
 
     def __str__(self):
         return f"SQL Database wrapper for: {self.db_file}"
 
-    def execute(self, sql_query: str, sql_parameters: Tuple = tuple()) -> None:
-        self.cursor.execute(sql_query, sql_parameters)
+    def configure_connection(self, connection: sqlite3.Connection) -> None:
+        """
+        Configure a newly opened pool connection
+
+        Args:
+            connection (sqlite3.Connection): The connection to configure
+        """
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA foreign_keys=ON")
+        connection.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        apply_profile(connection, self.profile)
+
+    def configure_read_connection(self, connection: sqlite3.Connection) -> None:
+        """
+        Configure a newly opened read-only connection.
+        The journal mode belongs to the database, so it is left to the writer.
+
+        Args:
+            connection (sqlite3.Connection): The connection to configure
+        """
+        connection.row_factory = sqlite3.Row
+        connection.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        apply_profile(connection, self.profile, read_only=True)
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """
+        The writer connection, shared by every thread
+        """
+        return self.writer
+
+    @property
+    def cursor(self) -> sqlite3.Cursor:
+        """
+        The calling thread's cursor on the writer connection
+        """
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self.writer.cursor()
+        return cursor
+
+    @contextmanager
+    def read_connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Check a read-only connection out of the read pool while the block runs, each block gets its own connection
+        and so its own snapshot.
+        Reads made while the calling thread is streaming an iter_query run on the writer instead, so they see the
+        latest commits (the thread's own writes included) and never wait for a second connection from the pool.
+
+        Yields:
+            sqlite3.Connection: The read-only connection, or the writer for an in-memory database
+        """
+        if self.read_pool is None or getattr(self._local, "streaming", 0):
+            yield self.writer
+            return
+        with self.read_pool.connection() as connection:
+            yield connection
+
+    @contextmanager
+    def _streaming(self) -> Iterator[None]:
+        """
+        Mark the calling thread as streaming an iter_query while the block runs (see read_connection)
+        """
+        self._local.streaming = getattr(self._local, "streaming", 0) + 1
+        try:
+            yield
+        finally:
+            self._local.streaming -= 1
+
+    def connection_for(self, sql_query: str) -> AbstractContextManager[sqlite3.Connection]:
+        """
+        Choose the connection a query runs on.
+        Inside a transaction everything runs on the writer, so the transaction can read its own changes.
+
+        Args:
+            sql_query (str): The SQL text
+
+        Returns:
+            AbstractContextManager[sqlite3.Connection]: Holds a read-only connection for SELECTs while the block
+                                                        runs (see read_connection), otherwise the writer
+        """
+        if self.current_transaction() is None and is_read_only_statement(sql_query):
+            return self.read_connection()
+        return nullcontext(self.writer)
+
+    def release_connection(self) -> None:
+        """
+        Close the calling thread's writer cursor.
+        Read connections are returned to the pool after each statement, so there is nothing else to release.
+        Background workers should call this when they are finished with the database.
+        """
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is not None:
+            del self._local.cursor
+            cursor.close()
+
+    def data_version(self) -> Tuple[int, int]:
+        """
+        Get a value that changes whenever the database changes, whether the change was made by this wrapper or
+        by another process, so in-memory copies of the data (see catalog.py) know when to reload.
+
+        PRAGMA data_version is specific to the connection it is read on, and only changes when another connection
+        commits, so it is always read on the same private read-only connection, which sees the writer's commits too.
+        An in-memory database is read through the writer, so the writer's total_changes is included as well.
+
+        Returns:
+            Tuple[int, int]: The data_version of the private connection and the writer's total_changes
+        """
+        if self.read_pool is None:
+            with self.write_lock:
+                return self.writer.execute("PRAGMA data_version").fetchone()[0], self.writer.total_changes
+        with self._version_lock:
+            if self._version_connection is None:
+                self._version_connection = sqlite3.connect(f"{Path(self.db_file).resolve().as_uri()}?mode=ro",
+                                                           uri=True, check_same_thread=False)
+                self.configure_read_connection(self._version_connection)
+            return (self._version_connection.execute("PRAGMA data_version").fetchone()[0],
+                    self.writer.total_changes)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Get the read connection pool statistics
+
+        Returns:
+            Dict[str, Any]: The connection pool statistics, see ConnectionPool.stats()
+        """
+        return self.read_pool.stats() if self.read_pool is not None else {}
+
+    def query_stats_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the per-query statistics recorded since the last reset
+
+        Returns:
+            Dict[str, Dict[str, Any]]: The statistics of each normalized statement, see QueryStats.snapshot()
+        """
+        return self.query_stats.snapshot()
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        """
+        Get the slow query log
+
+        Returns:
+            List[Dict[str, Any]]: The slow queries with their query plans, see QueryStats.slow_queries()
+        """
+        return self.query_stats.slow_queries()
+
+    def lookup_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get the lookup cache statistics
+
+        Returns:
+            Dict[str, Any]: The hit, miss and invalidation counts of the lookup cache, see LookupCache.snapshot()
+        """
+        return self.lookup_cache.snapshot()
+
+    def busy_retry_stats(self) -> Dict[str, Any]:
+        """
+        Get the busy/locked retry statistics
+
+        Returns:
+            Dict[str, Any]: The retry statistics, see RetryStats.snapshot()
+        """
+        return self.retry_stats.snapshot()
+
+    def reset_query_stats(self) -> None:
+        """
+        Clear the per-query statistics and the slow query log
+        """
+        self.query_stats.reset()
+
+    def explain_query_plan(self, sql_query: str, sql_parameters: Tuple = tuple()) -> List[str]:
+        """
+        Get the query plan SQLite uses for a statement
+
+        Args:
+            sql_query (str): An SQL Query
+            sql_parameters (Tuple): Parameters for the SQL query
+
+        Returns:
+            List[str]: The detail of each step of the plan, an empty list if the statement cannot be explained
+        """
+        with self.connection_for(sql_query) as connection:
+            cursor = connection.cursor()
+            cursor.row_factory = None
+            try:
+                # The writer is shared by every thread, so it is only used while holding write_lock
+                with self._lock_for(cursor):
+                    return [row[3] for row in cursor.execute(f"EXPLAIN QUERY PLAN {sql_query}", sql_parameters)]
+            except sqlite3.Error:
+                return []
+            finally:
+                cursor.close()
+
+    def _lock_for(self, cursor: sqlite3.Cursor) -> AbstractContextManager:
+        """
+        Statements on the writer hold write_lock while they run, reads on the read-only connections need no lock
+        """
+        return self.write_lock if cursor.connection is self.writer else nullcontext()
+
+    def execute(self, sql_query: str, sql_parameters: Tuple = tuple(),
+                cursor: sqlite3.Cursor | None = None) -> sqlite3.Cursor:
+        """
+        Execute a single SQL statement
+
+        Args:
+            sql_query (str): An SQL Query to execute
+            sql_parameters (Tuple): Parameters for an SQL query
+            cursor (sqlite3.Cursor | None): The cursor to execute on, defaults to the calling thread's cursor
+
+        Returns:
+            sqlite3.Cursor: The cursor the statement was executed on
+        """
+        cursor = self.cursor if cursor is None else cursor
+        start = time.perf_counter()
+        try:
+            with self._lock_for(cursor):
+                cursor = call_with_retry(cursor.execute, sql_query, sql_parameters,
+                                         policy=self.retry_policy, stats=self.retry_stats)
+                if cursor.connection is self.writer:
+                    self._invalidate(written_tables(sql_query))
+                return cursor
+        finally:
+            elapsed = time.perf_counter() - start
+            self.query_stats.record(sql_query, elapsed, cursor.rowcount)
+            if self.query_stats.is_slow(elapsed):
+                self.query_stats.log_slow_query(sql_query, elapsed,
+                                                self.explain_query_plan(sql_query, sql_parameters))
+
+    def executemany(self, sql_query: str, sql_parameters: Iterable[Tuple],
+                    cursor: sqlite3.Cursor | None = None) -> sqlite3.Cursor:
+        """
+        Execute a single SQL statement once for every set of parameters
+
+        Args:
+            sql_query (str): An SQL Query to execute
+            sql_parameters (Iterable[Tuple]): The parameters for each execution of the query
+            cursor (sqlite3.Cursor | None): The cursor to execute on, defaults to the calling thread's cursor
+
+        Returns:
+            sqlite3.Cursor: The cursor the statement was executed on
+        """
+        cursor = self.cursor if cursor is None else cursor
+        start = time.perf_counter()
+        try:
+            with self._lock_for(cursor):
+                # A generator is consumed by the first attempt, so only sequences of parameters can be retried
+                if isinstance(sql_parameters, (list, tuple)):
+                    cursor = call_with_retry(cursor.executemany, sql_query, sql_parameters,
+                                             policy=self.retry_policy, stats=self.retry_stats)
+                else:
+                    cursor = cursor.executemany(sql_query, sql_parameters)
+                self._invalidate(written_tables(sql_query))
+                return cursor
+        finally:
+            elapsed = time.perf_counter() - start
+            self.query_stats.record(sql_query, elapsed, cursor.rowcount)
+            if self.query_stats.is_slow(elapsed):
+                # The parameters have been consumed, so the plan is not captured for bulk writes
+                self.query_stats.log_slow_query(sql_query, elapsed, [])
+
+    def commit(self) -> None:
+        """
+        Commit the writer's open transaction, retrying while the database is busy
+        """
+        with self.write_lock:
+            call_with_retry(self.writer.commit, policy=self.retry_policy, stats=self.retry_stats)
+            self._end_writes()
+
+    def rollback(self) -> None:
+        """
+        Roll back the writer's open transaction
+        """
+        with self.write_lock:
+            self.writer.rollback()
+            self._end_writes()
+
+    def _invalidate(self, tables: Set[str] | None) -> None:
+        """
+        Invalidate the cached lookups read from the tables a statement on the writer wrote to.
+        While the writer's transaction is open, another thread can still read the old rows and cache them again,
+        so the tables are remembered and invalidated once more when the transaction ends (see _end_writes).
+
+        Args:
+            tables (Set[str] | None): The tables written, see written_tables(). None if any table may have changed.
+        """
+        if tables is not ALL_TABLES and not tables:
+            return
+        self.lookup_cache.invalidate(tables)
+        if self.writer.in_transaction and self._written_tables is not ALL_TABLES:
+            self._written_tables = ALL_TABLES if tables is ALL_TABLES else self._written_tables | tables
+
+    def _end_writes(self) -> None:
+        """
+        Invalidate the cached lookups read from the tables written by the transaction that has just ended
+        """
+        if self._written_tables is ALL_TABLES or self._written_tables:
+            self.lookup_cache.invalidate(self._written_tables)
+        self._written_tables = set()
 
     def run_sql_script(self, sql_file_path: Path) -> None:
         """
@@ -34,13 +429,17 @@ class SqlWrapper:
             sql_script = file.read()
 
 
-        self.cursor.executescript(sql_script)
-        self.db.commit()
+        with self.write_lock:
+            self.cursor.executescript(sql_script)
+            self.commit()
+        # A script can write to any table
+        self.lookup_cache.clear()
 
     def select_query(self, sql_query: str,
                      sql_parameters: Tuple | Any = tuple(),
                      fetch: Literal['all', 'many', 'one'] = "all",
-                     num_fetch: int = 1) -> List[Dict[str, Any]] | Dict[str, Any] | None:
+                     num_fetch: int = 1,
+                     row_format: RowFormat | None = None) -> List[Dict[str, Any]] | Dict[str, Any] | None:
         """
         Creates a SELECT query
 
@@ -51,6 +450,8 @@ class SqlWrapper:
                                                    If set to "one" returns only 1.
                                                    If set to "many" returns a set number of rows, specified by num_fetch
             num_fetch (int): The number of items to fetch if "many" selected for fetch
+            row_format (RowFormat | None): The format of each row ("dict", "tuple" or "record"),
+                                           defaults to the row format of the wrapper
 
         Returns:
             List[Dict[str, Any]]: If multiple results are being fetched (fetch set to all/many),
@@ -59,20 +460,115 @@ class SqlWrapper:
             None: If only one result is expected (fetch set to one), but nothing was returned, None is returned.
 
         """
+        if fetch == "all":
+            return list(self.iter_query(sql_query, sql_parameters, row_format=row_format))
+
         if not isinstance(sql_parameters, tuple):
             sql_parameters = (sql_parameters,)
-        self.execute(sql_query, sql_parameters)
+        row_format = self.row_format if row_format is None else validate_row_format(row_format)
 
-        results = None
-        if fetch == "all":
-            results = [dict(row) for row in self.cursor.fetchall()]
-        elif fetch == "many":
-            results = [dict(row) for row in self.cursor.fetchmany(num_fetch)]
-        elif fetch == "one":
-            results = None if (result := self.cursor.fetchone()) is None else dict(result)
+        with self.connection_for(sql_query) as connection:
+            cursor = prepare_cursor(connection.cursor(), row_format)
+            try:
+                cursor = self.execute(sql_query, sql_parameters, cursor=cursor)
+                convert = row_converter(cursor, row_format)
+
+                start = time.perf_counter()
+                results = None
+                rows = 0
+                if fetch == "many":
+                    results = cursor.fetchmany(num_fetch)
+                    rows = len(results)
+                    if convert is not None:
+                        results = [convert(row) for row in results]
+                elif fetch == "one":
+                    results = cursor.fetchone()
+                    rows = int(results is not None)
+                    if results is not None and convert is not None:
+                        results = convert(results)
+            finally:
+                cursor.close()
+        self.query_stats.record_fetch(sql_query, rows, time.perf_counter() - start)
 
         return results
 
+    def cached_select_query(self, tables: Iterable[str], sql_query: str,
+                            sql_parameters: Tuple | Any = tuple(),
+                            fetch: Literal['all', 'one'] = "all") -> List[Dict[str, Any]] | Dict[str, Any] | None:
+        """
+        A read-through select_query for lookups of reference data.
+        The result is kept in lookup_cache until one of the tables it reads is written, or its time to live ends,
+        so repeated lookups do not touch SQLite at all.
+        Inside a transaction the query always runs, as it can read the transaction's uncommitted writes.
+
+        Args:
+            tables (Iterable[str]): Every table the query reads
+            sql_query (str): An SQL Query to execute
+            sql_parameters (Tuple | str): Parameters for an SQL query
+            fetch (Literal['all', 'one']): Fetch all the rows returned, or only 1
+
+        Returns:
+            List[Dict[str, Any]]: If all the results are fetched, a list of the results
+            Dict[str, Any]: If only one result is fetched, just a single result is returned.
+            None: If only one result is expected, but nothing was returned
+        """
+        if not isinstance(sql_parameters, tuple):
+            sql_parameters = (sql_parameters,)
+        if self.current_transaction() is not None:
+            return self.select_query(sql_query, sql_parameters, fetch=fetch)
+        return self.lookup_cache.get_or_load((sql_query, sql_parameters, fetch), tables,
+                                             lambda: self.select_query(sql_query, sql_parameters, fetch=fetch))
+
+    def iter_query(self, sql_query: str,
+                   sql_parameters: Tuple | Any = tuple(),
+                   batch_size: int = 100,
+                   row_format: RowFormat | None = None) -> Iterator[Dict[str, Any]]:
+        """
+        Creates a SELECT query and lazily yields the rows.
+        Rows are pulled from SQLite in batches of batch_size, so only one batch is held in memory at a time
+        no matter how large the result set is.
+
+        The query runs on its own cursor, so other queries can be made while the results are being consumed.
+        The query is executed when the first row is requested. Outside a transaction the rows come from one
+        snapshot of the database, writes committed while they are being consumed are not seen.
+
+        Args:
+            sql_query (str): An SQL Query to execute
+            sql_parameters (Tuple | str): Parameters for an SQL query
+            batch_size (int): The number of rows to fetch from SQLite at a time
+            row_format (RowFormat | None): The format of each row ("dict", "tuple" or "record"),
+                                           defaults to the row format of the wrapper
+
+        Yields:
+            Dict[str, Any]: Each row returned by the query
+        """
+        if not isinstance(sql_parameters, tuple):
+            sql_parameters = (sql_parameters,)
+        row_format = self.row_format if row_format is None else validate_row_format(row_format)
+
+        # The read connection is held until the last row has been read, or the generator is closed
+        with self.connection_for(sql_query) as connection, self._streaming():
+            cursor = prepare_cursor(connection.cursor(), row_format)
+            fetched = 0
+            fetch_time = 0.0
+            try:
+                cursor = self.execute(sql_query, sql_parameters, cursor=cursor)
+                convert = row_converter(cursor, row_format)
+                while True:
+                    start = time.perf_counter()
+                    rows = cursor.fetchmany(batch_size)
+                    fetch_time += time.perf_counter() - start
+                    if not rows:
+                        break
+                    fetched += len(rows)
+                    if convert is None:
+                        yield from rows
+                    else:
+                        yield from map(convert, rows)
+            finally:
+                cursor.close()
+                self.query_stats.record_fetch(sql_query, fetched, fetch_time)
+
     def update_table(self, sql_query: str,
                      sql_parameters: Tuple | Any = tuple(),
                      commit=True) -> None | Exception:
@@ -82,7 +578,8 @@ class SqlWrapper:
         Args:
             sql_query (str): An SQL Query to execute
             sql_parameters (Tuple | str): Parameters for an SQL query
-            commit (bool): Commit changes to database immediately
+            commit (bool): Commit changes to database immediately. Ignored inside a transaction(),
+                           the changes are committed when the transaction ends.
 
         Returns:
             None: If the SQL Query is successful
@@ -90,20 +587,174 @@ class SqlWrapper:
         """
         if not isinstance(sql_parameters, tuple):
             sql_parameters = (sql_parameters,)
+        with self.write_lock:
+            try:
+                self.execute(sql_query, sql_parameters)
+                if commit and self.current_transaction() is None:
+                    self.commit()
+            except sqlite3.Error as e:
+                return self._handle_write_error(e)
+
+    def update_many(self, sql_query: str,
+                    sql_parameters: Iterable[Tuple],
+                    chunk_size: int = 1000,
+                    commit=True) -> List[None | Exception]:
+        """
+        Creates a INSERT/UPDATE/DELETE query and runs it for every set of parameters with executemany.
+
+        The parameters are consumed in chunks of chunk_size, and each chunk runs inside one explicit transaction,
+        so a bulk write pays for one commit per chunk instead of one per row.
+        If a chunk fails, only that chunk is rolled back and the remaining chunks are still written.
+        Inside a transaction() each chunk is a savepoint instead, and a failed chunk fails the whole transaction.
+
+        Args:
+            sql_query (str): An SQL Query to execute
+            sql_parameters (Iterable[Tuple]): The parameters for each row, this can be a generator
+            chunk_size (int): The number of rows to write per transaction
+            commit (bool): Commit each chunk as it is written. If False the caller is responsible for committing.
+
+        Returns:
+            List[None | Exception]: The result of each chunk, in order.
+                                    None is returned if the chunk is successful
+                                    An exception is returned if the chunk failed.
+        """
+        if chunk_size < 1:
+            raise ValueError("The chunk size must be at least 1.")
+
+        results = []
+        for chunk in batched(sql_parameters, chunk_size):
+            if commit:
+                with self.transaction() as transaction:
+                    try:
+                        self.executemany(sql_query, chunk)
+                    except sqlite3.Error as e:
+                        self._handle_write_error(e)
+                results.append(transaction.error)
+            else:
+                with self.write_lock:
+                    try:
+                        self.executemany(sql_query, chunk)
+                    except sqlite3.Error as e:
+                        results.append(self._handle_write_error(e))
+                        continue
+                results.append(None)
+        return results
+
+    def _handle_write_error(self, error: sqlite3.Error) -> sqlite3.Error:
+        """
+        Handle a failed INSERT/UPDATE/DELETE.
+        Outside a transaction the changes are rolled back straight away.
+        Inside a transaction the transaction is marked as failed, so it is rolled back when it ends.
+
+        Args:
+            error (sqlite3.Error): The error raised by the query
+
+        Returns:
+            sqlite3.Error: The same error, so it can be returned to the caller
+        """
+        transaction = self.current_transaction()
+        if transaction is None:
+            self.rollback()
+        elif transaction.error is None:
+            transaction.error = error
+
+        if not isinstance(error, sqlite3.IntegrityError):
+            print("Database Error!", error)
+        return error
+
+    def current_transaction(self) -> Transaction | None:
+        """
+        Get the innermost transaction open on the calling thread
+
+        Returns:
+            Transaction: The innermost open transaction
+            None: If the calling thread is not inside a transaction
+        """
+        transactions = getattr(self._local, "transactions", None)
+        return transactions[-1] if transactions else None
+
+    @contextmanager
+    def transaction(self) -> Iterator[Transaction]:
+        """
+        A unit of work. Every write made inside the with block is committed once when the block ends,
+        instead of update_table committing after each query:
+
+            with db.transaction() as transaction:
+                db.create_shipping(...)
+                db.place_orders(...)
+            if transaction.error is not None:
+                ...
+
+        If any write inside the block fails (update_table returns an exception) or the block raises,
+        everything is rolled back instead. Transactions can be nested, the inner ones are savepoints that
+        roll back on their own and then fail the transaction they are inside.
+
+        Yields:
+            Transaction: The transaction, its error is set to the first error from a write inside the block
+        """
+        transactions = getattr(self._local, "transactions", None)
+        if transactions is None:
+            transactions = self._local.transactions = []
+
+        # The outermost transaction holds the writer until it ends, so other threads' writes wait for it
+        outermost = not transactions
+        if outermost:
+            self.write_lock.acquire()
         try:
-            self.execute(sql_query, sql_parameters)
-        except sqlite3.IntegrityError as e:
-            self.db.rollback()
-            return e
-        except sqlite3.Error as e:
-            self.db.rollback()
-            print("Database Error!", e)
-            return e
-        if commit:
-            self.db.commit()
+            if outermost:
+                transaction = Transaction()
+                if not self.db.in_transaction:
+                    self.execute("BEGIN IMMEDIATE")
+            else:
+                transaction = Transaction(savepoint=f"savepoint_{len(transactions)}")
+                self.execute(f"SAVEPOINT {transaction.savepoint}")
+
+            transactions.append(transaction)
+            try:
+                yield transaction
+            except BaseException:
+                transactions.pop()
+                self._end_transaction(transaction, rollback=True)
+                raise
+            transactions.pop()
+            self._end_transaction(transaction, rollback=transaction.error is not None)
+        finally:
+            if outermost:
+                self.write_lock.release()
+
+    def _end_transaction(self, transaction: Transaction, rollback: bool) -> None:
+        """
+        Commit or roll back a transaction that has been removed from the transaction stack
+
+        Args:
+            transaction (Transaction): The transaction to end
+            rollback (bool): Roll back the transaction instead of committing it
+        """
+        if transaction.savepoint is None:
+            if rollback:
+                self.rollback()
+            else:
+                self.commit()
+            return
+
+        if rollback:
+            parent = self.current_transaction()
+            if parent is not None and parent.error is None:
+                parent.error = transaction.error or sqlite3.OperationalError("A nested transaction was rolled back.")
+        # Some errors make SQLite roll back the whole transaction itself, taking the savepoint with it
+        if not self.db.in_transaction:
+            return
+        if rollback:
+            self.execute(f"ROLLBACK TO {transaction.savepoint}")
+        self.execute(f"RELEASE {transaction.savepoint}")
 
     def close(self) -> None:
-        self.db.close()
+        self.release_connection()
+        if self._version_connection is not None:
+            self._version_connection.close()
+        if self.read_pool is not None:
+            self.read_pool.close()
+        self.writer.close()
 
 
 if __name__ == "__main__":
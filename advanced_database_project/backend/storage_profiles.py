@@ -0,0 +1,182 @@
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, Any, List
+
+
+@dataclass(frozen=True)
+class StorageProfile:
+    """
+    A named, coherent set of SQLite storage PRAGMAs.
+
+    cache_size follows the SQLite convention: a negative value is a size in KiB, a positive value is a page count.
+    """
+    name: str
+    description: str
+    journal_mode: str
+    synchronous: str
+    cache_size: int
+    mmap_size: int
+    temp_store: str
+    wal_autocheckpoint: int
+
+
+# PRAGMA synchronous and PRAGMA temp_store are read back as integers
+SYNCHRONOUS_LEVELS = {"OFF": 0, "NORMAL": 1, "FULL": 2, "EXTRA": 3}
+TEMP_STORE_LEVELS = {"DEFAULT": 0, "FILE": 1, "MEMORY": 2}
+
+PROFILES = {
+    "durable": StorageProfile(
+        name="durable",
+        description="Rollback journal with a full fsync on every commit. SQLite's defaults, the safest option.",
+        journal_mode="DELETE",
+        synchronous="FULL",
+        cache_size=-2000,
+        mmap_size=0,
+        temp_store="DEFAULT",
+        wal_autocheckpoint=1000,
+    ),
+    "durable_wal": StorageProfile(
+        name="durable_wal",
+        description="Write-ahead log with a full fsync on every commit. Nothing that was committed is ever lost, "
+                    "and the read-only connections read a snapshot without blocking the writer.",
+        journal_mode="WAL",
+        synchronous="FULL",
+        cache_size=-2000,
+        mmap_size=0,
+        temp_store="DEFAULT",
+        wal_autocheckpoint=1000,
+    ),
+    "balanced": StorageProfile(
+        name="balanced",
+        description="Write-ahead log with synchronous=NORMAL. Commits no longer fsync, readers never block the writer. "
+                    "A power loss can lose the last transactions but never corrupts the database.",
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        cache_size=-16000,
+        mmap_size=64 * 1024 * 1024,
+        temp_store="MEMORY",
+        wal_autocheckpoint=1000,
+    ),
+    "bulk_load": StorageProfile(
+        name="bulk_load",
+        description="In-memory rollback journal without fsyncs, for rebuilding or importing the database. "
+                    "A crash during a load can corrupt the database, so only use this when it can be rebuilt.",
+        journal_mode="MEMORY",
+        synchronous="OFF",
+        cache_size=-64000,
+        mmap_size=256 * 1024 * 1024,
+        temp_store="MEMORY",
+        wal_autocheckpoint=10000,
+    ),
+}
+
+DEFAULT_PROFILE = "durable_wal"
+
+
+def get_profile(profile: str | StorageProfile) -> StorageProfile:
+    """
+    Look up a storage profile by name
+
+    Args:
+        profile (str | StorageProfile): The name of the profile, or a profile which is returned unchanged
+
+    Returns:
+        StorageProfile: The storage profile
+
+    Raises:
+        ValueError: If there is no profile with that name
+    """
+    if isinstance(profile, StorageProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown storage profile '{profile}'. Choose from: {', '.join(PROFILES)}") from None
+
+
+def read_settings(connection: sqlite3.Connection) -> Dict[str, Any]:
+    """
+    Read the current storage settings of a connection
+
+    Args:
+        connection (sqlite3.Connection): The connection to read the settings from
+
+    Returns:
+        Dict[str, Any]: The value of each PRAGMA a StorageProfile controls
+    """
+    settings = {}
+    for pragma in ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "wal_autocheckpoint"):
+        row = connection.execute(f"PRAGMA {pragma}").fetchone()
+        settings[pragma] = None if row is None else row[0]
+    return settings
+
+
+def verify_profile(connection: sqlite3.Connection, profile: StorageProfile, read_only: bool = False) -> List[str]:
+    """
+    Check a connection is running with the settings of a profile
+
+    Args:
+        connection (sqlite3.Connection): The connection to check
+        profile (StorageProfile): The profile the connection should be using
+        read_only (bool): The connection is read-only, so the journal mode is not checked
+
+    Returns:
+        List[str]: A description of every setting that does not match. The list is empty if the profile is applied.
+    """
+    expected = {
+        "journal_mode": profile.journal_mode.lower(),
+        "synchronous": SYNCHRONOUS_LEVELS[profile.synchronous],
+        "cache_size": profile.cache_size,
+        "mmap_size": profile.mmap_size,
+        "temp_store": TEMP_STORE_LEVELS[profile.temp_store],
+        "wal_autocheckpoint": profile.wal_autocheckpoint,
+    }
+    actual = read_settings(connection)
+    if actual["journal_mode"] is not None:
+        actual["journal_mode"] = actual["journal_mode"].lower()
+
+    if read_only:
+        del expected["journal_mode"]
+
+    mismatches = []
+    for pragma, value in expected.items():
+        # SQLite silently caps mmap_size at its compile time maximum (which can be 0)
+        if pragma == "mmap_size" and actual[pragma] is not None and actual[pragma] <= value:
+            continue
+        if actual[pragma] != value:
+            mismatches.append(f"{pragma} is {actual[pragma]!r}, expected {value!r}")
+    return mismatches
+
+
+def apply_profile(connection: sqlite3.Connection, profile: str | StorageProfile,
+                  read_only: bool = False) -> StorageProfile:
+    """
+    Apply a storage profile to a connection and verify every setting took effect
+
+    Args:
+        connection (sqlite3.Connection): The connection to configure
+        profile (str | StorageProfile): The profile, or the name of the profile, to apply
+        read_only (bool): The connection is read-only (mode=ro), it cannot change the journal mode of the database
+
+    Returns:
+        StorageProfile: The profile that was applied
+
+    Raises:
+        sqlite3.OperationalError: If a setting could not be applied, e.g. leaving WAL mode while another
+                                  connection has the database open
+    """
+    profile = get_profile(profile)
+
+    if not read_only:
+        connection.execute(f"PRAGMA journal_mode={profile.journal_mode}").fetchone()
+    connection.execute(f"PRAGMA synchronous={profile.synchronous}")
+    connection.execute(f"PRAGMA cache_size={int(profile.cache_size)}")
+    connection.execute(f"PRAGMA mmap_size={int(profile.mmap_size)}").fetchone()
+    connection.execute(f"PRAGMA temp_store={profile.temp_store}")
+    connection.execute(f"PRAGMA wal_autocheckpoint={int(profile.wal_autocheckpoint)}").fetchone()
+
+    mismatches = verify_profile(connection, profile, read_only)
+    if mismatches:
+        raise sqlite3.OperationalError(
+            f"Could not apply the '{profile.name}' storage profile: {'; '.join(mismatches)}")
+    return profile
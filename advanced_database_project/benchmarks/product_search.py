@@ -0,0 +1,82 @@
+"""
+Compare the product search latency of the full-text index with the LIKE '%term%' scan it replaced.
+
+Run from the root of the repository:
+
+ > python -m advanced_database_project.benchmarks.product_search
+
+ > python -m advanced_database_project.benchmarks.product_search --products 1000000
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from advanced_database_project.backend.db_connection import DatabaseConnection
+
+SQL_SCRIPT = Path(__file__).resolve().parents[2] / "create_database_script.sql"
+
+WORDS = ["Gaming", "Wireless", "Mechanical", "External", "Portable", "Ultra", "Compact", "Pro", "Silent", "Smart",
+         "Laptop", "Mouse", "Keyboard", "Monitor", "Drive", "Chair", "Headset", "Camera", "Router", "Speaker"]
+SEARCHES = ["gam", "wireless mouse", "ultra port", "sil key", "smart cam"]
+
+LIKE_QUERY = """
+             SELECT p.Product_ID
+             FROM Products AS p
+             INNER JOIN Category AS c ON p.Category_ID = c.Category_ID
+             WHERE p.Product_Name LIKE ? AND p.Price >= ? AND p.Price <= ?
+             ORDER BY p.Product_Name
+             """
+
+
+def create_products(db: DatabaseConnection, products: int) -> None:
+    """
+    Add generated products to the catalog, the triggers index them as they are written
+
+    Args:
+        db (DatabaseConnection): The database to add the products to
+        products (int): The number of products to add
+    """
+    generator = random.Random(0)
+    db.update_many("""
+                   INSERT INTO Products (Product_Name, Category_ID, Price, Stock_Level, Supplier_ID)
+                   VALUES (?, ?, ?, ?, ?)
+                   """, ((" ".join(generator.sample(WORDS, 3)) + f" {i}", 1 + i % 16, generator.randint(1, 5000),
+                          100, 1 + i % 16) for i in range(products)), chunk_size=10_000)
+
+
+def time_search(function, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def main(arguments: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the full-text product search")
+    parser.add_argument("--products", type=int, default=100_000, help="The number of products in the catalog")
+    parser.add_argument("--repeats", type=int, default=5, help="The number of times each search is timed")
+    args = parser.parse_args(arguments)
+
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseConnection(str(Path(directory) / "benchmark.db"), profile="bulk_load")
+        db.create_database(SQL_SCRIPT)
+        create_products(db, args.products)
+
+        print(f"{args.products} products")
+        print(f"{'Search':<16} {'Matches':>8} {'FTS5 (ms)':>10} {'LIKE (ms)':>10}")
+        for search in SEARCHES:
+            # Only the number of rows is compared, the LIKE query only matches the whole phrase in the name
+            matches = len(db.select_products(search, filter_price=(100, 1000)))
+            fts_time = time_search(lambda: db.select_products(search, filter_price=(100, 1000)), args.repeats)
+            like_time = time_search(lambda: db.select_query(LIKE_QUERY, (f"%{search}%", 100, 1000),
+                                                            row_format="tuple"), args.repeats)
+            print(f"{search:<16} {matches:>8} {fts_time * 1000:>10.1f} {like_time * 1000:>10.1f}")
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Compare the time and memory of each SqlWrapper row format when fetching a product listing sized result set.
+
+Run from the root of the repository:
+
+ > python -m advanced_database_project.benchmarks.row_formats
+
+ > python -m advanced_database_project.benchmarks.row_formats --rows 250000
+"""
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+from advanced_database_project.backend.sql import SqlWrapper
+from advanced_database_project.backend.rows import ROW_FORMATS
+
+LISTING_QUERY = """
+                SELECT Product_ID, Product_Name, Category_ID, Price, Stock_Level, Supplier_ID
+                FROM Products
+                """
+
+
+def create_products(sql: SqlWrapper, rows: int) -> None:
+    """
+    Fill a Products table shaped like the real one (without the images)
+
+    Args:
+        sql (SqlWrapper): The database to create the table in
+        rows (int): The number of products to create
+    """
+    sql.update_table("""
+                     CREATE TABLE Products
+                     (Product_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+                     Product_Name TEXT NOT NULL,
+                     Category_ID INTEGER NOT NULL,
+                     Price INTEGER NOT NULL,
+                     Stock_Level INTEGER NOT NULL,
+                     Supplier_ID INTEGER NOT NULL)
+                     """)
+    sql.db.executemany("""
+                       INSERT INTO Products (Product_Name, Category_ID, Price, Stock_Level, Supplier_ID)
+                       VALUES (?, ?, ?, ?, ?)
+                       """, ((f"Product {i}", i % 10, i % 5000, i % 100, i % 25) for i in range(rows)))
+    sql.db.commit()
+
+
+def benchmark_format(sql: SqlWrapper, row_format: str) -> Dict[str, float]:
+    """
+    Fetch the whole listing in a row format, then read the price of every row.
+    Dicts are read by key, tuples by position and records by attribute.
+
+    Args:
+        sql (SqlWrapper): The database holding the products
+        row_format (str): The row format to benchmark
+
+    Returns:
+        Dict[str, float]: The fetch time, the access time and the memory held by the result in bytes
+    """
+    gc.collect()
+    start = time.perf_counter()
+    results = sql.select_query(LISTING_QUERY, row_format=row_format)
+    fetch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if row_format == "dict":
+        total = sum(row["Price"] for row in results)
+    elif row_format == "tuple":
+        total = sum(row[3] for row in results)
+    else:
+        total = sum(row.Price for row in results)
+    access_time = time.perf_counter() - start
+    assert total >= 0
+    del results
+
+    # Measure the memory separately, tracemalloc slows down the allocations it is tracing
+    gc.collect()
+    tracemalloc.start()
+    results = sql.select_query(LISTING_QUERY, row_format=row_format)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+
+    return {"fetch_time": fetch_time, "access_time": access_time, "memory": memory}
+
+
+def main(arguments: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the SqlWrapper row formats")
+    parser.add_argument("--rows", type=int, default=100_000, help="The number of rows to fetch")
+    args = parser.parse_args(arguments)
+
+    with tempfile.TemporaryDirectory() as directory:
+        sql = SqlWrapper(str(Path(directory) / "benchmark.db"))
+        create_products(sql, args.rows)
+
+        print(f"{args.rows} rows")
+        print(f"{'Format':<8} {'Fetch (ms)':>12} {'Access (ms)':>12} {'Memory (MiB)':>14} {'Bytes/row':>10}")
+        for row_format in ROW_FORMATS:
+            result = benchmark_format(sql, row_format)
+            print(f"{row_format:<8} {result['fetch_time'] * 1000:>12.1f} {result['access_time'] * 1000:>12.1f} "
+                  f"{result['memory'] / 2 ** 20:>14.1f} {result['memory'] / args.rows:>10.0f}")
+
+        sql.close()
+
+
+if __name__ == "__main__":
+    main()
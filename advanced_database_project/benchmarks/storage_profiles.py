@@ -0,0 +1,73 @@
+"""
+Compare the read and write throughput of each SQLite storage profile against the real schema.
+
+Run from the root of the repository:
+
+ > python -m advanced_database_project.benchmarks.storage_profiles
+
+ > python -m advanced_database_project.benchmarks.storage_profiles --writes 2000 --reads 500 --profiles durable balanced
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.storage_profiles import PROFILES
+
+SQL_SCRIPT = Path(__file__).resolve().parents[2] / "create_database_script.sql"
+
+
+def benchmark_profile(profile: str, writes: int, reads: int) -> Dict[str, float]:
+    """
+    Benchmark a single storage profile on a freshly created database
+
+    Args:
+        profile (str): The name of the storage profile to benchmark
+        writes (int): The number of committed single row writes to time
+        reads (int): The number of read rounds to time. Each round runs the product listing, basket and
+                     best-seller queries the GUI runs when browsing.
+
+    Returns:
+        Dict[str, float]: The writes and reads per second
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseConnection(str(Path(directory) / "benchmark.db"), profile=profile)
+        db.create_database(SQL_SCRIPT)
+
+        start = time.perf_counter()
+        for i in range(writes):
+            db.add_review(1 + i % 17, 1 + i % 16, 1 + i % 5, f"Benchmark review {i}", "2024-01-01")
+        write_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(reads):
+            db.select_products()
+            db.get_basket_items_by_basket_id(1 + i % 17)
+            db.select_best_selling_products()
+        read_time = time.perf_counter() - start
+
+        db.close()
+
+    return {
+        "writes_per_second": writes / write_time,
+        "reads_per_second": reads * 3 / read_time,
+    }
+
+
+def main(arguments: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite storage profiles")
+    parser.add_argument("--writes", type=int, default=500, help="Committed single row writes per profile")
+    parser.add_argument("--reads", type=int, default=500, help="Read rounds per profile")
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES.keys(), default=list(PROFILES))
+    args = parser.parse_args(arguments)
+
+    print(f"{'Profile':<12} {'Writes/s':>12} {'Reads/s':>12}")
+    for profile in args.profiles:
+        result = benchmark_profile(profile, args.writes, args.reads)
+        print(f"{profile:<12} {result['writes_per_second']:>12.0f} {result['reads_per_second']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import io
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from PIL import Image, ImageTk
+
+from advanced_database_project.backend.db_connection import DatabaseConnection
+
+# Tk keeps a 32-bit copy of every pixel of a PhotoImage
+PHOTO_IMAGE_BYTES_PER_PIXEL = 4
+
+
+class _CachedImage:
+    """
+    A decoded product image, the PhotoImage made from it once a page has shown it, and the bytes they hold
+    """
+    __slots__ = ("image", "photo_image", "nbytes")
+
+    def __init__(self, image: Image.Image) -> None:
+        self.image = image
+        self.photo_image = None
+        self.nbytes = image.width * image.height * len(image.getbands())
+
+
+class ImageCache:
+    """
+    A process-wide LRU cache of decoded product images and their Tk PhotoImages, shared by every page,
+    so showing, filtering and scrolling past a product never reads or decodes its image again.
+
+    Images are keyed by (database, Image_ID, size). Images are stored once per content (see insert_image),
+    so a product whose image changes gets a new Image_ID and the Image_ID already identifies the version.
+
+    The cache is bounded by the bytes the decoded pixels take up rather than a count of images, as a detail image
+    is several times the size of a thumbnail. The least recently used images are evicted first. A page keeps a
+    reference to every PhotoImage it shows, so evicting one never blanks an image that is on screen.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        """
+        Args:
+            max_bytes (int): The most bytes of decoded pixels to keep
+        """
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._entries: OrderedDict[Tuple[str, int, int | None], _CachedImage] = OrderedDict()
+        self._bytes = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+        }
+
+    def get_image(self, db: DatabaseConnection, image_id: int | None, size: int | None = None) -> Image.Image | None:
+        """
+        Get a decoded product image, reading and decoding it only the first time it is asked for
+
+        Args:
+            db (DatabaseConnection): The database the image is stored in
+            image_id (int | None): The Image ID of the product
+            size (int | None): The rendition size (see renditions.py), or None for the original image
+
+        Returns:
+            Image.Image: The decoded image
+            None: If the product has no image, or its image is missing or unreadable
+        """
+        entry = self._entry(db, image_id, size)
+        return entry.image if entry is not None else None
+
+    def get_photo_image(self, db: DatabaseConnection, image_id: int | None,
+                        size: int | None = None) -> ImageTk.PhotoImage | None:
+        """
+        Get the Tk PhotoImage of a product image, made only the first time it is shown by any page
+
+        Args:
+            db (DatabaseConnection): The database the image is stored in
+            image_id (int | None): The Image ID of the product
+            size (int | None): The rendition size (see renditions.py), or None for the original image
+
+        Returns:
+            ImageTk.PhotoImage: The image to show. The widget showing it must keep a reference to it.
+            None: If the product has no image, or its image is missing or unreadable
+        """
+        with self._lock:
+            entry = self._entry(db, image_id, size)
+            if entry is None:
+                return None
+            if entry.photo_image is None:
+                entry.photo_image = ImageTk.PhotoImage(entry.image)
+                photo_image_bytes = entry.image.width * entry.image.height * PHOTO_IMAGE_BYTES_PER_PIXEL
+                entry.nbytes += photo_image_bytes
+                self._bytes += photo_image_bytes
+                self._evict()
+            return entry.photo_image
+
+    def _entry(self, db: DatabaseConnection, image_id: int | None, size: int | None) -> _CachedImage | None:
+        """
+        Get the cache entry of an image, reading and decoding the image if it is not cached
+        """
+        if image_id is None:
+            return None
+        key = (db.db_file, image_id, size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry
+            self._stats["misses"] += 1
+
+            image_data = db.get_image(image_id, size)
+            if image_data is None:
+                return None
+            image = Image.open(io.BytesIO(image_data))
+            # Decode now, rather than the first time the pixels are used
+            image.load()
+
+            entry = self._entries[key] = _CachedImage(image)
+            self._bytes += entry.nbytes
+            self._evict()
+            return entry
+
+    def _evict(self) -> None:
+        """
+        Evict the least recently used images until the cache is within its budget.
+        The most recently used image is always kept, even if it is larger than the budget on its own.
+        """
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.nbytes
+            self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        """
+        Drop every cached image, e.g. after the database is rebuilt and the Image IDs may have been reused
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the cache statistics
+
+        Returns:
+            Dict[str, Any]: hits - images found in the cache, misses - images read from the database,
+                            evictions - images dropped to stay within max_bytes,
+                            images - the images cached, bytes - the bytes of decoded pixels they hold
+        """
+        with self._lock:
+            return {**self._stats, "images": len(self._entries), "bytes": self._bytes}
+
+
+# Shared by every page, so an image decoded for one page is reused by all the others
+IMAGE_CACHE = ImageCache()
@@ -1,7 +1,5 @@
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
-import io
 from typing import List, Dict, Any
 import matplotlib.pyplot as plt
 import numpy as np
@@ -9,7 +7,14 @@ import re
 
 from advanced_database_project.gui.pages.checkout_page import CheckoutPage
 from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.dates import display_date
+from advanced_database_project.backend.renditions import THUMBNAIL_SIZE
 from advanced_database_project.gui.base_page import BasePage
+from advanced_database_project.gui.image_cache import IMAGE_CACHE
+
+# Orders are read a page at a time, newest first, the last entry of the dropdown reads the next page
+ORDERS_PAGE_SIZE = 10
+LOAD_MORE_ORDERS = "Load more orders..."
 
 
 class BasketPage(BasePage):
@@ -17,6 +22,7 @@ class BasketPage(BasePage):
     A tkinter page to display the user's basket.
     Includes a scrollable list of product cards, total price, checkout button,
     and options to remove items or change quantities.
+    The order history dropdown loads the newest orders first, and older orders on demand.
     """
 
     def __init__(self, pages: Dict[str, BasePage], db: DatabaseConnection, user: Dict[str, Any],
@@ -26,6 +32,7 @@ class BasketPage(BasePage):
 
         self.basket_items = []
         self.orders = []
+        self.all_orders_loaded = True
         self.total_price = 0
 
         self.orders_var = tk.StringVar()
@@ -39,7 +46,8 @@ class BasketPage(BasePage):
         Override the default show function from BasePage - requery the database for new items in basket
         """
         self.basket_items = self.db.get_basket_items_by_basket_id(self.basket["Basket_ID"])
-        self.orders = self.db.get_orders_by_customer_id(self.user["Customer_ID"])
+        self.orders = self.db.get_orders_by_customer_id(self.user["Customer_ID"], "DESC", limit=ORDERS_PAGE_SIZE)
+        self.all_orders_loaded = len(self.orders) < ORDERS_PAGE_SIZE
         self.total_price = self.calculate_total_price()
         self.refresh_page()
         self.update_scroll_region(None, self.canvas)
@@ -94,9 +102,34 @@ class BasketPage(BasePage):
 
         selected_orders_dropdown = ttk.Combobox(
             orders_frame, font=("Arial", 10), textvariable=self.orders_var, width=40,
-            values=[f"Order ID {order["Order_ID"]} - {order["Order_Quantity"]} {order["Product_Name"]}" for order in self.orders],
-            state="readonly")
+            values=self.order_options(), state="readonly")
         selected_orders_dropdown.pack(side="left", padx=5)
+        selected_orders_dropdown.bind("<<ComboboxSelected>>",
+                                      lambda _: self.select_order(selected_orders_dropdown))
+
+    def order_options(self) -> List[str]:
+        """
+        The entries of the order history dropdown, ending with an entry to load older orders if there are more
+        """
+        options = [f"Order ID {order["Order_ID"]} - {display_date(order["Order_Date"])} - {order["Order_Status"]}"
+                   for order in self.orders]
+        return options if self.all_orders_loaded else options + [LOAD_MORE_ORDERS]
+
+    def select_order(self, dropdown: ttk.Combobox) -> None:
+        """
+        Read the next page of older orders when the last entry of the order history dropdown is chosen
+
+        Args:
+            dropdown (ttk.Combobox): The order history dropdown
+        """
+        if self.orders_var.get() != LOAD_MORE_ORDERS:
+            return
+        page = self.db.get_orders_by_customer_id(self.user["Customer_ID"], "DESC", limit=ORDERS_PAGE_SIZE,
+                                                 after=self.orders[-1]["Order_ID"])
+        self.all_orders_loaded = len(page) < ORDERS_PAGE_SIZE
+        self.orders += page
+        self.orders_var.set("")
+        dropdown.configure(values=self.order_options())
 
     def create_product_card(self, parent: tk.Frame, item: Dict[str, Any]) -> None:
         """
@@ -114,17 +147,14 @@ class BasketPage(BasePage):
         product_card.columnconfigure(2, weight=0)
         product_card.columnconfigure(3, weight=0)
 
-        if item["Product_Image"] is not None:
-            image = Image.open(io.BytesIO(item["Product_Image"]))
-            image.thumbnail((150, 150), Image.LANCZOS)
-
-            ph = ImageTk.PhotoImage(image)
-
+        # Decoded once and shared with every other page, see image_cache.py
+        ph = IMAGE_CACHE.get_photo_image(self.db, item["Image_ID"], THUMBNAIL_SIZE)
+        if ph is not None:
             product_image = tk.Canvas(
                 product_card, width=162, height=162, bg="#fff", bd=0, highlightthickness=0)
 
-            x_offset = (162 - image.width) // 2
-            y_offset = (162 - image.height) // 2
+            x_offset = (162 - ph.width()) // 2
+            y_offset = (162 - ph.height()) // 2
 
             product_image.create_image(x_offset, y_offset, anchor="nw", image=ph)
 
@@ -211,7 +241,7 @@ class BasketPage(BasePage):
             self.navigate_to(self.pages["Checkout"])
 
     def track_order(self):
-        if self.orders_var.get():
+        if self.orders_var.get() and self.orders_var.get() != LOAD_MORE_ORDERS:
             selected_order_id = int(re.search(r"Order ID (\d+)", self.orders_var.get()).group(1))
             selected_order = self.db.get_order_by_order_id(selected_order_id)
 
@@ -243,7 +273,7 @@ class BasketPage(BasePage):
             plt.scatter([x_positions[completed_until]], [1.2], color='red', zorder=5, label="Current Stage")
             plt.text(x_positions[completed_until], 1.4, selected_order["Order_Status"], ha='center', color='red', fontsize=12)
 
-            plt.text(x_positions[0], -0.4, f"Time: {selected_order["Order_Date"]}", ha='center', color='blue', fontsize=10)
+            plt.text(x_positions[0], -0.4, f"Time: {display_date(selected_order["Order_Date"])}", ha='center', color='blue', fontsize=10)
 
             plt.xticks(x_positions, [])
             plt.yticks([])
@@ -2,7 +2,7 @@ import tkinter as tk
 from tkinter import messagebox
 import hashlib
 import sqlite3
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 from typing import Dict, Any, List, Tuple
 
 from advanced_database_project.gui.base_page import BasePage
@@ -134,25 +134,24 @@ class CheckoutPage(BasePage):
         if error:
             return
 
-        self.db.create_shipping(
-            self.user["Customer_ID"], self.vars["shipping_address_street_number"].get(),
-            self.vars["shipping_address_street"].get(), self.vars["shipping_address_postcode"].get(),
-            (datetime.now() + timedelta(3)).strftime("%d/%m/%Y"))
-        shipping_id = self.db.cursor.lastrowid
-
-        self.db.create_billing(
-            self.user["Customer_ID"], self.vars["billing_address_street_number"].get(),
-            self.vars["billing_address_street"].get(), self.vars["billing_address_postcode"].get(),
+        # The whole basket is ordered as one unit of work, so a failure never leaves a half placed order
+        error = self.db.checkout(
+            self.basket["Basket_ID"], self.user["Customer_ID"], date.today(),
+            date.today() + timedelta(3),
+            self.vars["shipping_address_street_number"].get(), self.vars["shipping_address_street"].get(),
+            self.vars["shipping_address_postcode"].get(),
+            self.vars["billing_address_street_number"].get(), self.vars["billing_address_street"].get(),
+            self.vars["billing_address_postcode"].get(),
             self.vars["card_number"].get(), self.vars["card_expiry"].get(), self.vars["name_on_card"].get(),
             self.vars["cvc"].get())
-        billing_id = self.db.cursor.lastrowid
 
-        for product in self.db.get_basket_items_by_basket_id(self.basket["Basket_ID"]):
-            self.db.place_order(datetime.now().strftime("%d/%m/%Y"), self.user["Customer_ID"],
-                                int(product["Product_ID"]), shipping_id, billing_id, int(product["Quantity"]),
-                                "Ordered")
+        if isinstance(error, sqlite3.IntegrityError):
+            self.error_label.configure(text=f"Your order could not be placed. {error}")
+            return
+        if error is not None:
+            self.error_label.configure(text="Your order could not be placed, please try again.")
+            return
 
-        self.db.clear_basket(self.basket["Basket_ID"])
         self.clear_fields()
 
         self.navigate_to(self.pages["Home"])
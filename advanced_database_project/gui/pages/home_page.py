@@ -1,10 +1,10 @@
 import tkinter as tk
 from typing import List, Dict, Any
-from PIL import ImageTk, Image
-import io
 
 from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.renditions import THUMBNAIL_SIZE
 from advanced_database_project.gui.base_page import BasePage
+from advanced_database_project.gui.image_cache import IMAGE_CACHE
 from advanced_database_project.gui.pages.product_info_page import ProductInfoPage
 
 
@@ -84,16 +84,13 @@ class HomePage(BasePage):
         product_frame.grid(row=row, column=col, padx=10, pady=(10, 20), sticky="nsew")
         product_frame.bind("<ButtonRelease-1>", lambda _, p=product: self.click_product(p))
 
-        if product["Product_Image"] is not None:
-            image = Image.open(io.BytesIO(product["Product_Image"]))
-            image.thumbnail((150, 150), Image.LANCZOS)
-
-            ph = ImageTk.PhotoImage(image)
-
+        # Decoded once and shared with every other page, see image_cache.py
+        ph = IMAGE_CACHE.get_photo_image(self.db, product["Image_ID"], THUMBNAIL_SIZE)
+        if ph is not None:
             product_image = tk.Canvas(product_frame, width=162, height=162, bg="#fff", bd=0, highlightthickness=0)
 
-            x_offset = (162 - image.width) // 2
-            y_offset = (162 - image.height) // 2
+            x_offset = (162 - ph.width()) // 2
+            y_offset = (162 - ph.height()) // 2
 
             product_image.create_image(x_offset, y_offset, anchor="nw", image=ph)
 
@@ -1,6 +1,6 @@
 import tkinter as tk
 from typing import List, Dict, Any
-from datetime import datetime
+from datetime import date
 
 from advanced_database_project.backend.db_connection import DatabaseConnection
 from advanced_database_project.gui.base_page import BasePage
@@ -96,7 +96,7 @@ class LoginPage(BasePage):
 
             basket = self.db.get_basket_by_customer_id(user["Customer_ID"])
             if basket is None:
-                self.db.create_basket_by_customer_id(user["Customer_ID"], datetime.now().strftime("%d/%m/%Y"))
+                self.db.create_basket_by_customer_id(user["Customer_ID"], date.today())
                 self.basket.update(self.db.get_basket_by_customer_id(user["Customer_ID"]))
             else:
                 self.basket.update(basket)
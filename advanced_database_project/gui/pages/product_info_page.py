@@ -1,13 +1,14 @@
 import sqlite3
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
-import io
-from datetime import datetime
+from datetime import date
 from typing import List, Dict, Any
 
 from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.dates import display_date
+from advanced_database_project.backend.renditions import DETAIL_SIZE
 from advanced_database_project.gui.base_page import BasePage
+from advanced_database_project.gui.image_cache import IMAGE_CACHE
 
 
 class ProductInfoPage(BasePage):
@@ -38,7 +39,7 @@ class ProductInfoPage(BasePage):
         """
         Override the default show function from BasePage - rebind the scrollwheel to the scrollable canvas
         """
-        self.product = self.db.select_products(self.product["Product_Name"])[0]
+        self.product = self.db.select_product_by_id(self.product["Product_ID"])
         self.stars = []
         self.refresh_page()
         self.update_scroll_region(None, self.canvas)
@@ -71,16 +72,13 @@ class ProductInfoPage(BasePage):
         product_frame = tk.Frame(self, bg="#f7f7f7")
         product_frame.grid(row=2, column=0, pady=(10, 0), sticky="w")
 
-        if self.product["Product_Image"] is not None:
-            image = Image.open(io.BytesIO(self.product["Product_Image"]))
-            image.thumbnail((320, 320), Image.LANCZOS)
-
-            ph = ImageTk.PhotoImage(image)
-
+        # Decoded once and shared with every other page, see image_cache.py
+        ph = IMAGE_CACHE.get_photo_image(self.db, self.product["Image_ID"], DETAIL_SIZE)
+        if ph is not None:
             product_image = tk.Canvas(product_frame, width=320, height=320, bg="#fff", bd=0, highlightthickness=0)
 
-            x_offset = (320 - image.width) // 2
-            y_offset = (320 - image.height) // 2
+            x_offset = (320 - ph.width()) // 2
+            y_offset = (320 - ph.height()) // 2
 
             product_image.create_image(x_offset, y_offset, anchor="nw", image=ph)
 
@@ -158,7 +156,7 @@ class ProductInfoPage(BasePage):
                                                      font=("Arial", 16), bg="#f7f7f7", fg="#555")
                         review_info_label.pack(anchor="nw")
                 elif key == "Review_Date":
-                    review_info_label = tk.Label(scrollable_frame, text=value + "\n",
+                    review_info_label = tk.Label(scrollable_frame, text=display_date(value) + "\n",
                                                  font=("Arial", 14), bg="#f7f7f7", fg="#555")
                     review_info_label.pack(anchor="nw")
 
@@ -229,7 +227,7 @@ class ProductInfoPage(BasePage):
                 star.configure(highlightbackground="red", highlightcolor="red", highlightthickness=1)
             return
         self.db.add_review(self.user["Customer_ID"], self.product["Product_ID"], self.rating,
-                           self.review_text.get("1.0", "end-1c"), datetime.now().strftime("%d/%m/%Y"))
+                           self.review_text.get("1.0", "end-1c"), date.today())
         self.stars = []
         self.refresh_page()
         self.rating = None
@@ -1,12 +1,12 @@
 import tkinter as tk
 from tkinter import ttk
 from typing import List, Dict, Any
-from PIL import ImageTk, Image
-import io
 
+from advanced_database_project.backend.catalog import Catalog
 from advanced_database_project.backend.db_connection import DatabaseConnection
 from advanced_database_project.gui.base_page import BasePage
 from advanced_database_project.gui.pages.product_info_page import ProductInfoPage
+from advanced_database_project.gui.product_grid import CELL_WIDTH, ProductGrid
 
 
 class ProductsPage(BasePage):
@@ -15,7 +15,9 @@ class ProductsPage(BasePage):
 
     Displays all the products available
     Allows searching of products by name, category and price.
-    Allows sorting of products by name, price.
+    Allows sorting of products by name, category, price and how well they match the search.
+    Products are filtered and sorted in memory by a Catalog, without querying the database.
+    Products are shown in a virtual grid, only the rows in view are drawn, see ProductGrid.
     """
 
     def __init__(self, pages: Dict[str, BasePage], db: DatabaseConnection, user: Dict[str, Any],
@@ -23,7 +25,9 @@ class ProductsPage(BasePage):
         super().__init__(pages, db, user, basket)
         self.configure(bg="#f7f7f7")
 
-        self.products = self.db.select_products()
+        # Filtering and sorting is answered in memory, the catalog reloads itself when the database changes
+        self.catalog = Catalog(self.db)
+        self.products = self.catalog.listing()
         self.categories = ["All Categories"] + [category["Category_Name"] for category in self.db.select_categories()]
 
         # Initialise product search information variables
@@ -35,7 +39,7 @@ class ProductsPage(BasePage):
         self.sort_order = tk.StringVar(value="ASC")
 
         self.canvas = None
-        self.products_frame = None
+        self.product_grid = None
 
         self.create_widgets()
 
@@ -43,9 +47,9 @@ class ProductsPage(BasePage):
         """
         Override the default show function from BasePage - rebind the scrollwheel to the scrollable canvas
         """
-        self.update_scroll_region(None, self.canvas)
         self.canvas.bind_all("<MouseWheel>", lambda event: self.scroll_canvas(event, self.canvas))
-        self.canvas.bind("<Configure>", lambda event: self.update_scroll_region(event, self.canvas))
+        # The scroll region is sized by the grid, as only the rows in view are drawn
+        self.canvas.bind("<Configure>", lambda event: self.product_grid.redraw())
         self.pack()
 
     def create_widgets(self) -> None:
@@ -61,7 +65,7 @@ class ProductsPage(BasePage):
         search_frame = tk.Frame(self, bg="#f7f7f7")
         search_frame.grid(row=2, column=0)
 
-        search_label = tk.Label(search_frame, text="Search Name:", font=("Arial", 12), bg="#f7f7f7")
+        search_label = tk.Label(search_frame, text="Search:", font=("Arial", 12), bg="#f7f7f7")
         search_label.grid(row=2, column=0, pady=5)
 
         search_entry = tk.Entry(search_frame, textvariable=self.search_var, font=("Arial", 12))
@@ -94,7 +98,7 @@ class ProductsPage(BasePage):
         sort_label.grid(row=2, column=0, padx=(0, 10))
 
         sort_criteria_button = tk.Button(
-            sort_frame, textvariable=self.sort_criteria, font=("Arial", 12), command=self.toggle_sort_criteria, width=8)
+            sort_frame, textvariable=self.sort_criteria, font=("Arial", 12), command=self.toggle_sort_criteria, width=9)
         sort_criteria_button.grid(row=2, column=1, padx=(0, 10))
 
         sort_order_button = tk.Button(
@@ -104,16 +108,15 @@ class ProductsPage(BasePage):
         product_list_frame = tk.Frame(self, bg="#f7f7f7")
         product_list_frame.grid(row=3, column=0, sticky="nsew")
 
-        self.canvas = tk.Canvas(product_list_frame, bg="#f7f7f7", height=500)
+        self.canvas = tk.Canvas(product_list_frame, bg="#f7f7f7", height=500, width=6 * CELL_WIDTH)
         self.canvas.grid(row=3, column=0, sticky="nsew")
 
         scrollbar = tk.Scrollbar(product_list_frame, orient="vertical", command=self.canvas.yview)
-        self.canvas.configure(yscrollcommand=scrollbar.set)
+        self.canvas.configure(yscrollcommand=lambda first, last: self.on_scroll(scrollbar, first, last))
 
-        self.products_frame = tk.Frame(self.canvas, bg="#f7f7f7")
-        self.canvas.create_window((0, 0), window=self.products_frame, anchor="nw")
-
-        self.display_products(self.products_frame)
+        # Only the rows in view are drawn, and their cards are reused as the grid scrolls and changes
+        self.product_grid = ProductGrid(self.canvas, self.db, self.click_product)
+        self.product_grid.show_listing(self.products)
 
         product_list_frame.grid_rowconfigure(0, weight=1)
         product_list_frame.grid_columnconfigure(0, weight=1)
@@ -125,54 +128,9 @@ class ProductsPage(BasePage):
         self.pages[product["Product_Name"]] = ProductInfoPage(self.pages, self.db, self.user, self.basket, product)
         self.navigate_to(self.pages[product["Product_Name"]])
 
-    def display_products(self, parent: tk.Frame):
-        """
-        Display products as a grid, with 6 in a column.
+    def product_filters(self) -> Dict[str, Any]:
         """
-        for widget in parent.winfo_children():
-            widget.destroy()
-
-        for i, product in enumerate(self.products):
-            product_frame = tk.Frame(parent, bg="#fff", bd=1, relief="solid", padx=10, pady=10, width=200)
-            product_frame.grid(row=i // 6, column=i % 6, padx=10, pady=10, sticky="nsew")
-            product_frame.bind("<ButtonRelease-1>", lambda _, p=product: self.click_product(p))
-
-            if product["Product_Image"] is not None:
-                image = Image.open(io.BytesIO(product["Product_Image"]))
-                image.thumbnail((150, 150), Image.LANCZOS)
-
-                ph = ImageTk.PhotoImage(image)
-
-                product_image = tk.Canvas(product_frame, width=162, height=162, bg="#fff", bd=0, highlightthickness=0)
-
-                x_offset = (162 - image.width) // 2
-                y_offset = (162 - image.height) // 2
-
-                product_image.create_image(x_offset, y_offset, anchor="nw", image=ph)
-
-                product_image.image = ph
-                product_image.pack()
-                product_image.bind("<ButtonRelease-1>", lambda _, p=product: self.click_product(p))
-
-            if len(product["Product_Name"]) >= 18:
-                name = "\n".join(product["Product_Name"].split(" "))
-            else:
-                name = product["Product_Name"]
-            product_name = tk.Label(
-                product_frame, text=name, font=("Arial", 12, "bold"), bg="#fff", fg="#333", width=15)
-            product_name.pack(pady=(10, 5))
-            product_name.bind("<ButtonRelease-1>", lambda _, p=product: self.click_product(p))
-
-            product_price = tk.Label(
-                product_frame, text=f"${product["Price"]:.2f}", font=("Arial", 12), bg="#fff", fg="#007bff")
-            product_price.pack()
-            product_price.bind("<ButtonRelease-1>", lambda _, p=product: self.click_product(p))
-
-    def update_products(self, a, b, c):
-        """
-        Update the products listed - this is called when filtering or sorting products to update the products
-
-        Params a, b and c are the trace parameters that are unused.
+        The filters and sort chosen on the page, as select_products arguments
         """
         category_var = self.category_var.get().lower()
         if category_var == "all categories":
@@ -188,19 +146,36 @@ class ProductsPage(BasePage):
         except tk.TclError:
             max_price_var = 5000
 
-        self.products = self.db.select_products(filter_name=self.search_var.get().lower(),
-                                                filter_category=category_var,
-                                                filter_price=(min_price_var, max_price_var),
-                                                sort_by=self.sort_criteria.get(),
-                                                sort_order=self.sort_order.get())
-        self.display_products(self.products_frame)
+        return {"filter_name": self.search_var.get().lower(),
+                "filter_category": category_var,
+                "filter_price": (min_price_var, max_price_var),
+                "sort_by": self.sort_criteria.get(),
+                "sort_order": self.sort_order.get()}
+
+    def update_products(self, a, b, c):
+        """
+        Update the products listed - this is called when filtering or sorting products to update the products.
+        The products are only read for the rows in view, as the grid is drawn (see ProductGrid).
+
+        Params a, b and c are the trace parameters that are unused.
+        """
+        self.products = self.catalog.listing(**self.product_filters())
+        self.product_grid.show_listing(self.products)
+
+    def on_scroll(self, scrollbar: tk.Scrollbar, first: str, last: str):
+        """
+        Keep the scrollbar in step with the canvas, and draw the rows scrolled into view
+        """
+        scrollbar.set(first, last)
+        if self.product_grid is not None:
+            self.product_grid.redraw()
 
     def toggle_sort_criteria(self):
         """
-        Cycle through the sorting criteria (Name, Category, Price).
+        Cycle through the sorting criteria (Name, Category, Price, Relevance).
         """
         current = self.sort_criteria.get()
-        criteria = ["Name", "Category", "Price"]
+        criteria = ["Name", "Category", "Price", "Relevance"]
         next_index = (criteria.index(current) + 1) % len(criteria)
         self.sort_criteria.set(criteria[next_index])
         self.update_products(None, None, None)  # Update the product display
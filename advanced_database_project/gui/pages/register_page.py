@@ -1,7 +1,7 @@
 import tkinter as tk
 import sqlite3
 import hashlib
-from datetime import datetime
+from datetime import date
 from typing import Dict, Any
 
 from advanced_database_project.gui.base_page import BasePage
@@ -194,7 +194,7 @@ class RegisterPage(BasePage):
 
                 basket = self.db.get_basket_by_customer_id(self.user["Customer_ID"])
                 if basket is None:
-                    self.db.create_basket_by_customer_id(self.user["Customer_ID"], datetime.now().strftime("%d/%m/%Y"))
+                    self.db.create_basket_by_customer_id(self.user["Customer_ID"], date.today())
                     self.basket.update(self.db.get_basket_by_customer_id(self.user["Customer_ID"]))
                 else:
                     self.basket.update(basket)
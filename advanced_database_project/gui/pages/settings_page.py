@@ -128,7 +128,11 @@ class SettingsPage(BasePage):
         if result == "yes":
             import_path = Path(self.import_path.get())
             if import_path.is_file():
-                self.db.restore_database_from_xml(import_path)
+                error = self.db.restore_database_from_xml(import_path)
+                if error is not None:
+                    # The restore is rolled back, so the current database is kept
+                    messagebox.showerror("Import Failed", f"The database could not be imported:\n{error}")
+                    return
                 self.restart_application()
             else:
                 self.import_entry.config(highlightbackground="red", highlightcolor="red", highlightthickness=1)
@@ -141,9 +145,8 @@ class SettingsPage(BasePage):
                                                         "and all unsave data will be lost.\n "
                                                         "Are you sure you want to do this?")
         if result == "yes":
-            self.db.run_sql_script(Path("create_database_script.sql"))
-            for path in Path("./advanced_database_project/assets/").iterdir():
-                self.db.insert_image(Path(path))
+            self.db.create_database(Path("create_database_script.sql"))
+            self.db.insert_images(Path("./advanced_database_project/assets/").iterdir())
 
             self.restart_application()
 
@@ -0,0 +1,263 @@
+import tkinter as tk
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Sequence
+
+from advanced_database_project.backend.catalog import Listing
+from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.renditions import THUMBNAIL_SIZE
+from advanced_database_project.gui.image_cache import IMAGE_CACHE
+
+# The size of a card, and of the image area of a card that thumbnails are centred in
+CARD_WIDTH = 182
+CARD_HEIGHT = 262
+CARD_IMAGE_SIZE = 162
+CARD_PADDING = 10
+# The space a card takes up in the grid, with the gap around it
+CELL_WIDTH = CARD_WIDTH + 2 * CARD_PADDING
+CELL_HEIGHT = CARD_HEIGHT + 2 * CARD_PADDING
+
+
+class GridDiff(NamedTuple):
+    """
+    The changes needed to turn the displayed grid into a new one
+    """
+    added: List[Hashable]
+    moved: List[Hashable]
+    removed: List[Hashable]
+
+
+def diff_keys(displayed: Sequence[Hashable], new: Sequence[Hashable],
+              displayed_start: int = 0, new_start: int = 0) -> GridDiff:
+    """
+    Compare the keys of the cards displayed with the keys of the cards to display
+
+    Args:
+        displayed (Sequence[Hashable]): The keys of the cards displayed, in grid order
+        new (Sequence[Hashable]): The keys of the cards to display, in grid order
+        displayed_start (int): The grid index of the first card displayed
+        new_start (int): The grid index of the first card to display
+
+    Returns:
+        GridDiff: added - the keys that need a card, moved - the keys whose card changes cell,
+                  removed - the keys whose card is no longer displayed
+    """
+    displayed_index = {key: index for index, key in enumerate(displayed, displayed_start)}
+    added, moved = [], []
+    for index, key in enumerate(new, new_start):
+        old_index = displayed_index.pop(key, None)
+        if old_index is None:
+            added.append(key)
+        elif old_index != index:
+            moved.append(key)
+    return GridDiff(added, moved, list(displayed_index))
+
+
+def card_name(product_name: str) -> str:
+    """
+    Split long product names over several lines, so they fit on a card
+    """
+    return "\n".join(product_name.split(" ")) if len(product_name) >= 18 else product_name
+
+
+class ProductCard:
+    """
+    A product card of the grid, drawn as items on the grid's canvas: a border, the product image, name and price.
+    A card is bound to a product, and can be bound to another one and moved, so its items are reused.
+    """
+
+    def __init__(self, canvas: tk.Canvas, db: DatabaseConnection, on_click: Callable[[Any], None]) -> None:
+        """
+        Args:
+            canvas (tk.Canvas): The canvas the grid is drawn on
+            db (DatabaseConnection): The database the product images are read from
+            on_click (Callable[[Any], None]): Called with the product when the card is clicked
+        """
+        self.canvas = canvas
+        self.db = db
+        self.product = None
+        self.photo_image = None
+        self.x = self.y = 0
+
+        # Every item of the card is tagged with the card's tag, so the card is moved and hidden as one
+        self.tag = f"card{id(self)}"
+        self.border = canvas.create_rectangle(0, 0, CARD_WIDTH, CARD_HEIGHT, fill="#fff", outline="#000",
+                                              tags=self.tag)
+        self.image = canvas.create_image(CARD_PADDING, CARD_PADDING, anchor="nw", tags=self.tag)
+        self.name = canvas.create_text(CARD_WIDTH // 2, CARD_IMAGE_SIZE + 2 * CARD_PADDING, anchor="n",
+                                       justify="center", font=("Arial", 12, "bold"), fill="#333", tags=self.tag)
+        self.price = canvas.create_text(CARD_WIDTH // 2, CARD_HEIGHT - CARD_PADDING, anchor="s",
+                                        font=("Arial", 12), fill="#007bff", tags=self.tag)
+
+        # Bound once, and look up the product at click time, so rebinding a card needs no new bindings
+        canvas.tag_bind(self.tag, "<ButtonRelease-1>", lambda _: on_click(self.product))
+
+    def show_product(self, product: Any) -> bool:
+        """
+        Bind the card to a product, only changing the items whose contents differ
+
+        Args:
+            product (Any): The product record
+
+        Returns:
+            bool: True if any item changed
+        """
+        previous, self.product = self.product, product
+        self.canvas.itemconfigure(self.tag, state="normal")
+        if previous == product:
+            return False
+
+        if previous is None or previous["Product_Name"] != product["Product_Name"]:
+            self.canvas.itemconfigure(self.name, text=card_name(product["Product_Name"]))
+        if previous is None or previous["Price"] != product["Price"]:
+            self.canvas.itemconfigure(self.price, text=f"${product["Price"]:.2f}")
+        if previous is None or previous["Image_ID"] != product["Image_ID"]:
+            # Decoded once and shared with every other page, see image_cache.py.
+            # The card keeps a reference to the PhotoImage for as long as it shows it
+            self.photo_image = IMAGE_CACHE.get_photo_image(self.db, product["Image_ID"], THUMBNAIL_SIZE)
+            x, y = self.x + CARD_PADDING, self.y + CARD_PADDING
+            if self.photo_image is not None:
+                x += (CARD_IMAGE_SIZE - self.photo_image.width()) // 2
+                y += (CARD_IMAGE_SIZE - self.photo_image.height()) // 2
+            self.canvas.itemconfigure(self.image, image=self.photo_image or "")
+            self.canvas.coords(self.image, x, y)
+        return True
+
+    def move_to(self, x: int, y: int) -> None:
+        """
+        Move the card so its top left corner is at (x, y) on the canvas
+        """
+        self.canvas.move(self.tag, x - self.x, y - self.y)
+        self.x, self.y = x, y
+
+    def hide(self) -> None:
+        """
+        Hide the card, it keeps its product until it is bound to another one
+        """
+        self.canvas.itemconfigure(self.tag, state="hidden")
+
+
+class ProductGrid:
+    """
+    Displays a listing of products as a virtual grid of cards drawn on a canvas.
+
+    Only the rows in view, and a few rows either side of them (the overscan) so scrolling never shows an empty
+    row, are drawn. The products and their images are only read for those rows, so the number of canvas items
+    and images stays the same however many products are listed. The scroll region is sized for every row.
+
+    Cards are keyed by Product ID and the grid is reconciled with the rows in view whenever it scrolls or the
+    listing changes. Cards of products scrolled out of view are hidden and put in a pool, products scrolled into
+    view take a card from the pool, creating one only when the pool is empty, and only the cards that change cell
+    are moved. A card only changes the items whose contents differ.
+    """
+
+    def __init__(self, canvas: tk.Canvas, db: DatabaseConnection, on_click: Callable[[Any], None],
+                 columns: int = 6, overscan_rows: int = 2) -> None:
+        """
+        Args:
+            canvas (tk.Canvas): The canvas to draw the grid on
+            db (DatabaseConnection): The database the product images are read from
+            on_click (Callable[[Any], None]): Called with the product when a card is clicked
+            columns (int): The number of cards in a row
+            overscan_rows (int): The rows drawn above and below the rows in view
+        """
+        self.canvas = canvas
+        self.db = db
+        self.on_click = on_click
+        self.columns = columns
+        self.overscan_rows = overscan_rows
+        self.listing: Listing | Sequence[Any] = []
+        self.start = 0
+        self.keys: List[int] = []
+        self.cards: Dict[int, ProductCard] = {}
+        self.pool: List[ProductCard] = []
+        self.stats = {
+            "created": 0,
+            "reused": 0,
+            "moved": 0,
+            "updated": 0,
+            "hidden": 0,
+        }
+
+    def show_listing(self, listing: Listing | Sequence[Any]) -> None:
+        """
+        Show a new listing of products, from the top
+
+        Args:
+            listing (Listing | Sequence[Any]): The products, read a slice at a time
+        """
+        self.listing = listing
+        rows = -(-len(listing) // self.columns)
+        self.canvas.configure(scrollregion=(0, 0, self.columns * CELL_WIDTH, rows * CELL_HEIGHT))
+        self.canvas.yview_moveto(0)
+        self.redraw()
+
+    def visible_rows(self) -> range:
+        """
+        Get the rows to draw, the rows in view and the overscan rows
+
+        Returns:
+            range: The row numbers
+        """
+        top = int(self.canvas.canvasy(0))
+        bottom = top + self.canvas.winfo_height()
+        rows = -(-len(self.listing) // self.columns)
+        return range(max(0, top // CELL_HEIGHT - self.overscan_rows),
+                     min(rows, bottom // CELL_HEIGHT + 1 + self.overscan_rows))
+
+    def redraw(self) -> GridDiff:
+        """
+        Reconcile the cards with the rows in view, called whenever the grid scrolls or is resized
+
+        Returns:
+            GridDiff: The Product IDs added, moved and removed
+        """
+        rows = self.visible_rows()
+        start = rows.start * self.columns
+        products = self.listing[start:rows.stop * self.columns] if rows else []
+        return self.render(products, start)
+
+    def render(self, products: Sequence[Any], start: int = 0) -> GridDiff:
+        """
+        Show a run of products, changing only the cards that differ from the ones displayed
+
+        Args:
+            products (Sequence[Any]): The products to show, in grid order
+            start (int): The grid index of the first product
+
+        Returns:
+            GridDiff: The Product IDs added, moved and removed
+        """
+        keys = [product["Product_ID"] for product in products]
+        diff = diff_keys(self.keys, keys, self.start, start)
+
+        for key in diff.removed:
+            card = self.cards.pop(key)
+            card.hide()
+            self.pool.append(card)
+        self.stats["hidden"] += len(diff.removed)
+
+        moved = set(diff.moved)
+        for index, product in enumerate(products, start):
+            key = product["Product_ID"]
+            card = self.cards.get(key)
+            if card is None:
+                card = self.cards[key] = self._card()
+                moved.add(key)
+            if key in moved:
+                row, column = divmod(index, self.columns)
+                card.move_to(column * CELL_WIDTH + CARD_PADDING, row * CELL_HEIGHT + CARD_PADDING)
+            if card.show_product(product):
+                self.stats["updated"] += 1
+        self.stats["moved"] += len(diff.moved)
+
+        self.keys, self.start = keys, start
+        return diff
+
+    def _card(self) -> ProductCard:
+        """
+        Take a hidden card from the pool, or create one if the pool is empty
+        """
+        if self.pool:
+            self.stats["reused"] += 1
+            return self.pool.pop()
+        self.stats["created"] += 1
+        return ProductCard(self.canvas, self.db, self.on_click)
@@ -1,7 +1,10 @@
 from advanced_database_project.gui.app import App
 from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.storage_profiles import PROFILES, DEFAULT_PROFILE
 
 import argparse
+import sqlite3
+import sys
 from pathlib import Path
 import os
 import atexit
@@ -15,26 +18,54 @@ def cleanup():
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('-r', '--reload-db', action='store_true')
+    parser.add_argument('-p', '--profile', choices=PROFILES.keys(), default=DEFAULT_PROFILE,
+                        help="The SQLite storage profile to run the database with")
+    parser.add_argument('-s', '--query-stats', action='store_true',
+                        help="Print the slowest queries of the session when the application closes")
+    parser.add_argument('-b', '--busy-timeout', type=float, default=5.0,
+                        help="How many seconds a query waits for another process to release the database")
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help="Rebuild the trigger-maintained rollup tables (best sellers, basket totals) before starting")
+    parser.add_argument('--backfill-renditions', action='store_true',
+                        help="Generate the resized product images that are missing before starting")
+    parser.add_argument('-m', '--allow-multiple-instances', action='store_true',
+                        help="Share the database with other running instances instead of refusing to start")
     args = parser.parse_args()
 
-    # Check there is only 1 instance of the application running
-    if os.path.isfile("running_process.pid"):
-        print("Another instance of the script is already running. If not, remove 'running_process.pid' file.")
-        quit()
-
-    with open("running_process.pid", 'w') as pid_file:
-        pid_file.write(str(os.getpid()))
-
-    atexit.register(cleanup)
-
-    # Create database if it doesn't already exist (if tables are missing
-    # the database is automatically regenerated), or the parser is set in the cmd
-    my_file = Path("./database.db")
-    database_connection = DatabaseConnection()
-    if args.reload_db or not my_file.is_file() or not database_connection.check_tables():
-        database_connection.run_sql_script(Path("create_database_script.sql"))
-        for path in Path("./advanced_database_project/assets/").iterdir():
-            database_connection.insert_image(Path(path))
+    # Check there is only 1 instance of the application running, unless sharing the database was asked for
+    if not args.allow_multiple_instances:
+        if os.path.isfile("running_process.pid"):
+            print("Another instance of the script is already running. If not, remove 'running_process.pid' file, "
+                  "or use --allow-multiple-instances.")
+            quit()
+
+        with open("running_process.pid", 'w') as pid_file:
+            pid_file.write(str(os.getpid()))
+
+        atexit.register(cleanup)
+
+    # Create the database if it is new, or the parser is set in the cmd.
+    # An existing database from an older version of the application is upgraded in place
+    database_connection = DatabaseConnection(profile=args.profile, busy_timeout=args.busy_timeout)
+    if args.query_stats:
+        atexit.register(lambda: print(database_connection.query_stats.report(),
+                                      f"Lookup cache: {database_connection.lookup_cache_stats()}", sep="\n"))
+    try:
+        for migration in database_connection.open_database(Path("create_database_script.sql"),
+                                                           Path("./advanced_database_project/assets/").iterdir(),
+                                                           reload=args.reload_db):
+            print(f"Migrated the database to version {migration.version}: {migration.description}")
+    except sqlite3.Error as e:
+        # The database is never recreated here, that would delete its data
+        print(f"The database could not be opened, it has not been changed: {e}\n"
+              f"Try again once no other process is using it, restore a backup, "
+              f"or use --reload-db to recreate it (this deletes all its data).")
+        sys.exit(1)
+
+    if args.rebuild_rollups:
+        database_connection.rebuild_rollups()
+    if args.backfill_renditions:
+        database_connection.backfill_renditions()
 
     # Run the application
     App(database_connection)
@@ -14,8 +14,8 @@ def setup_db():
     After the tests are run, rebuild the database again to clear anything changed from the test
     """
     db = DatabaseConnection()
-    db.run_sql_script(Path("create_database_script.sql"))
+    db.create_database(Path("create_database_script.sql"))
 
     yield db
 
-    db.run_sql_script(Path("create_database_script.sql"))
+    db.create_database(Path("create_database_script.sql"))
@@ -0,0 +1,90 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from advanced_database_project.backend.async_db import AsyncDatabaseConnection
+
+
+@pytest.fixture
+def async_db(tmp_path):
+    """
+    An AsyncDatabaseConnection on a freshly created copy of the database
+    """
+    db = AsyncDatabaseConnection(str(tmp_path / "async.db"), max_workers=3)
+    db.database.create_database(Path("create_database_script.sql"))
+
+    yield db
+
+    asyncio.run(db.close())
+
+
+class TestAsyncDatabaseConnection:
+
+    def test_methods_are_mirrored_as_coroutines(self, async_db):
+        async def browse():
+            return await asyncio.gather(
+                async_db.select_products(),
+                async_db.get_basket_items_by_basket_id(1),
+                async_db.select_categories(),
+            )
+
+        products, basket_items, categories = asyncio.run(browse())
+
+        assert products == async_db.database.select_products()
+        assert basket_items == async_db.database.get_basket_items_by_basket_id(1)
+        assert categories == async_db.database.select_categories()
+
+    def test_generator_methods_return_a_list(self, async_db):
+        rows = asyncio.run(async_db.iter_query("SELECT Category_ID FROM Category"))
+
+        assert isinstance(rows, list)
+        assert len(rows) == len(async_db.database.select_categories())
+
+    def test_thread_bound_methods_are_not_mirrored(self, async_db):
+        with pytest.raises(AttributeError):
+            async_db.transaction()
+
+    def test_run_in_transaction(self, async_db):
+        def add_reviews(db):
+            db.add_review(1, 1, 5, "Async review", "2024-01-01")
+            db.add_review(1, 1000, 5, "Async review", "2024-01-01")
+
+        result = asyncio.run(async_db.run_in_transaction(add_reviews))
+
+        assert type(result) == sqlite3.IntegrityError
+        assert async_db.database.select_query("SELECT * FROM Reviews WHERE Review_Comment = 'Async review'") == []
+
+    def test_concurrency_is_bounded(self, async_db):
+        async_db.max_concurrency = 2
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def slow_query():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.pop()
+
+        async def run_many():
+            await asyncio.gather(*(async_db.run(slow_query) for _ in range(6)))
+
+        asyncio.run(run_many())
+
+        assert max(peak) == 2
+
+    def test_can_be_used_from_several_event_loops(self, async_db):
+        async def run_many():
+            # More calls than workers, so the calls wait on the semaphore
+            return await asyncio.gather(*(async_db.select_categories() for _ in range(8)))
+
+        first = asyncio.run(run_many())
+        second = asyncio.run(run_many())
+
+        assert first == second
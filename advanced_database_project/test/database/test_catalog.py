@@ -0,0 +1,140 @@
+from pathlib import Path
+
+import pytest
+
+from advanced_database_project.backend.catalog import Catalog
+from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.rows import Record
+
+SORTS = ["Name", "Category", "Price", "Relevance"]
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    A freshly created and migrated copy of the database, with some products that tie on every sort key
+    """
+    db = DatabaseConnection(str(tmp_path / "catalog.db"))
+    db.create_database(Path("create_database_script.sql"))
+    db.update_many("""
+                   INSERT INTO Products (Product_Name, Category_ID, Price, Stock_Level, Supplier_ID)
+                   SELECT Product_Name, Category_ID, Price, Stock_Level, Supplier_ID FROM Products WHERE Product_ID = ?
+                   """, [(product_id,) for product_id in (1, 1, 2, 3, 3, 3)])
+
+    yield db
+
+    db.close()
+
+
+@pytest.fixture
+def catalog(db):
+    return Catalog(db)
+
+
+def product_ids(products):
+    return [product["Product_ID"] for product in products]
+
+
+def queries_run(db, lookup):
+    db.reset_query_stats()
+    lookup()
+    return sum(statistics["calls"] for statistics in db.query_stats_snapshot().values())
+
+
+class TestCatalog:
+
+    @pytest.mark.parametrize("sort_by", SORTS)
+    @pytest.mark.parametrize("sort_order", ["ASC", "DESC"])
+    @pytest.mark.parametrize("filters", [{}, {"filter_name": "gaming"}, {"filter_category": "a"},
+                                         {"filter_price": (100, 1000)},
+                                         {"filter_name": "gaming", "filter_category": "laptops",
+                                          "filter_price": (500, 5000)}])
+    def test_matches_select_products(self, db, catalog, sort_by, sort_order, filters):
+        arguments = dict(filters, sort_by=sort_by, sort_order=sort_order)
+        listing = product_ids(db.select_products(**arguments))
+
+        assert product_ids(catalog.select_products(**arguments)) == listing
+        for after in listing:
+            assert product_ids(catalog.select_products(**arguments, limit=3, after=after)) == \
+                   product_ids(db.select_products(**arguments, limit=3, after=after))
+
+    def test_filtering_and_sorting_do_not_query(self, db, catalog):
+        catalog.select_products("gaming")
+
+        def browse():
+            for sort_by in SORTS:
+                for sort_order in ("ASC", "DESC"):
+                    catalog.select_products("gaming", "a", (0, 2000), sort_by, sort_order, limit=30)
+                    catalog.select_products("", "laptops", (100, 500), sort_by, sort_order, limit=30)
+
+        # Only the data_version is read, to check the catalog is up to date
+        assert queries_run(db, browse) == 0
+
+    def test_searches_are_run_once(self, db, catalog):
+        catalog.select_products("gaming")
+
+        db.reset_query_stats()
+        catalog.select_products("gaming", sort_by="Price")
+        catalog.select_products("gaming", filter_price=(10, 20))
+
+        assert not any("Product_Search" in sql_query for sql_query in db.query_stats_snapshot())
+
+    @pytest.mark.parametrize("sql_query", [
+        "UPDATE Products SET Stock_Level = 0 WHERE Product_ID = 2",
+        "UPDATE Products SET Price = 1 WHERE Product_ID = 2",
+        "UPDATE Products SET Product_Name = 'Aardvark' WHERE Product_ID = 2",
+        "UPDATE Products SET Category_ID = 1 WHERE Product_ID = 2",
+        "UPDATE Category SET Category_Name = 'Zebras' WHERE Category_ID = 1",
+        "DELETE FROM Products WHERE Product_ID = (SELECT MAX(Product_ID) FROM Products)",
+        """
+        INSERT INTO Products (Product_Name, Category_ID, Price, Stock_Level, Supplier_ID)
+        VALUES ('Aardvark Gaming Mouse', 2, 0.5, 3, 1)
+        """,
+    ])
+    def test_reloads_when_the_database_changes(self, db, catalog, sql_query):
+        catalog.select_products()
+
+        assert db.update_table(sql_query) is None
+
+        for sort_by in SORTS:
+            for filters in ({}, {"filter_name": "gaming"}, {"filter_category": "zebras"},
+                            {"filter_price": (0, 100)}):
+                assert product_ids(catalog.select_products(**filters, sort_by=sort_by)) == \
+                       product_ids(db.select_products(**filters, sort_by=sort_by))
+
+    def test_unchanged_database_is_not_reloaded(self, db, catalog):
+        assert not catalog.refresh()
+
+        db.update_table("UPDATE Products SET Stock_Level = 7 WHERE Product_ID = 1")
+
+        assert catalog.refresh()
+        assert catalog.products[catalog.positions[1]]["Stock_Level"] == 7
+        assert not catalog.refresh()
+
+    @pytest.mark.parametrize("sort_by", SORTS)
+    @pytest.mark.parametrize("filters", [{}, {"filter_name": "gaming"}, {"filter_category": "a"},
+                                         {"filter_price": (100, 1000)}])
+    def test_listing_matches_select_products(self, db, catalog, sort_by, filters):
+        listing = catalog.listing(**filters, sort_by=sort_by, sort_order="DESC")
+        products = product_ids(db.select_products(**filters, sort_by=sort_by, sort_order="DESC"))
+
+        assert len(listing) == len(products)
+        assert product_ids(listing[2:5]) == products[2:5]
+        assert product_ids(listing[0:len(listing) + 10]) == products
+
+
+class TestRowFormats:
+
+    def test_queries_return_dicts(self, db):
+        assert db.add_item_to_basket(1, 1, 2) is None
+
+        for rows in (db.select_products(), [db.select_product_by_id(1)], db.get_basket_items_by_basket_id(1)):
+            assert rows and all(type(row) is dict for row in rows)
+
+    def test_records_are_opt_in(self, db, catalog):
+        product = db.select_product_by_id(1, row_format="record")
+
+        assert isinstance(product, Record)
+        assert dict(product.items()) == db.select_product_by_id(1)
+        assert all(isinstance(row, Record) for row in db.select_products(limit=5, row_format="record"))
+        assert all(isinstance(row, Record) for row in catalog.select_products(limit=5))
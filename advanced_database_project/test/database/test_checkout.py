@@ -0,0 +1,123 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from advanced_database_project.backend.db_connection import DatabaseConnection
+
+ADDRESS = ("1", "High Street", "AB1 2CD")
+CARD = ("1234567812345678", "01/30", "Test Customer", "123")
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    A freshly created and migrated copy of the database
+    """
+    db = DatabaseConnection(str(tmp_path / "checkout.db"))
+    db.create_database(Path("create_database_script.sql"))
+
+    yield db
+
+    db.close()
+
+
+def checkout(db, basket_id=1, customer_id=1):
+    return db.checkout(basket_id, customer_id, "2024-06-01", "2024-06-04", *ADDRESS, *ADDRESS, *CARD)
+
+
+def stock(db, *product_ids):
+    return {row["Product_ID"]: row["Stock_Level"] for row in db.select_query(
+        f"SELECT Product_ID, Stock_Level FROM Products WHERE Product_ID IN ({', '.join('?' for _ in product_ids)})",
+        sql_parameters=product_ids)}
+
+
+def count(db, table):
+    return db.select_query(f"SELECT COUNT(*) AS Total FROM {table}", fetch="one")["Total"]
+
+
+def fill_basket(db, basket_id, items):
+    db.clear_basket(basket_id)
+    for product_id, quantity in items:
+        assert db.add_item_to_basket(basket_id, product_id, quantity) is None
+
+
+class TestCheckout:
+
+    def test_basket_is_ordered(self, db):
+        fill_basket(db, 1, [(2, 1), (3, 2)])
+        before = stock(db, 2, 3)
+
+        assert checkout(db) is None
+
+        orders = db.select_query("SELECT * FROM Orders WHERE Customer_ID = 1 AND Order_Date = '2024-06-01' "
+                                 "ORDER BY Product_ID")
+        assert [(order["Product_ID"], order["Order_Quantity"]) for order in orders] == [(2, 1), (3, 2)]
+        assert len({(order["Shipping_ID"], order["Billing_ID"]) for order in orders}) == 1
+        assert stock(db, 2, 3) == {2: before[2] - 1, 3: before[3] - 2}
+        assert db.get_basket_items_by_basket_id(1) == []
+        assert db.check_rollups() == {}
+
+    def test_not_enough_stock_changes_nothing(self, db):
+        fill_basket(db, 1, [(2, 1), (3, 2)])
+        db.update_table("UPDATE Products SET Stock_Level = 1 WHERE Product_ID = 3")
+        before = {table: count(db, table) for table in ("Orders", "Shipping", "Billing")}
+
+        error = checkout(db)
+
+        assert isinstance(error, sqlite3.IntegrityError)
+        assert {table: count(db, table) for table in ("Orders", "Shipping", "Billing")} == before
+        assert stock(db, 3) == {3: 1}
+        assert len(db.get_basket_items_by_basket_id(1)) == 2
+
+    def test_empty_basket_is_refused(self, db):
+        db.clear_basket(1)
+        orders = count(db, "Orders")
+
+        assert isinstance(checkout(db), sqlite3.IntegrityError)
+        assert count(db, "Orders") == orders
+
+    @pytest.mark.parametrize("address, card", [((None, "High Street", "AB1 2CD"), CARD),
+                                               (ADDRESS, ("1234567812345678", "01/30", None, "123"))],
+                             ids=["shipping", "billing"])
+    def test_failed_step_ends_the_checkout(self, db, address, card):
+        fill_basket(db, 1, [(2, 1)])
+        before = {table: count(db, table) for table in ("Orders", "Shipping", "Billing")}
+        db.reset_query_stats()
+
+        error = db.checkout(1, 1, "2024-06-01", "2024-06-04", *address, *ADDRESS, *card)
+
+        assert isinstance(error, sqlite3.IntegrityError)
+        # Nothing is written with the ID of a row from an earlier statement
+        assert not any("Order_Headers" in sql_query or "Order_Lines" in sql_query
+                       for sql_query in db.query_stats_snapshot())
+        assert {table: count(db, table) for table in ("Orders", "Shipping", "Billing")} == before
+        assert len(db.get_basket_items_by_basket_id(1)) == 1
+
+    def test_queries_do_not_grow_with_the_basket(self, db):
+        def checkout_queries(basket_id, customer_id, items):
+            fill_basket(db, basket_id, items)
+            db.reset_query_stats()
+            assert checkout(db, basket_id, customer_id) is None
+            return sum(statistics["calls"] for statistics in db.query_stats_snapshot().values())
+
+        assert checkout_queries(1, 1, [(2, 1)]) == checkout_queries(2, 2, [(3, 1), (4, 1), (5, 1), (6, 1)])
+
+    def test_place_order_takes_stock(self, db):
+        before = stock(db, 2)[2]
+
+        assert db.place_order("2024-06-01", 1, 2, 1, 1, before, "Ordered") is None
+        assert stock(db, 2) == {2: 0}
+
+        assert isinstance(db.place_order("2024-06-01", 1, 2, 1, 1, 1, "Ordered"), sqlite3.IntegrityError)
+        assert stock(db, 2) == {2: 0}
+
+    def test_place_orders_is_all_or_nothing(self, db):
+        db.update_table("UPDATE Products SET Stock_Level = 1 WHERE Product_ID = 3")
+        orders = count(db, "Orders")
+
+        results = db.place_orders("2024-06-01", 1, 1, 1, [(2, 1), (3, 2)], "Ordered")
+
+        assert isinstance(results[-1], sqlite3.IntegrityError)
+        assert count(db, "Orders") == orders
+        assert stock(db, 3) == {3: 1}
@@ -0,0 +1,138 @@
+import threading
+
+import pytest
+
+from advanced_database_project.backend.connection_pool import ConnectionPool
+from advanced_database_project.backend.db_connection import DatabaseConnection
+
+
+class TestConnectionPool:
+
+    @staticmethod
+    def create_pool(tmp_path, size=2, timeout=0.1):
+        return ConnectionPool(str(tmp_path / "pool.db"), size=size, timeout=timeout)
+
+    def test_pool_checkout_and_checkin(self, tmp_path):
+        pool = self.create_pool(tmp_path)
+
+        with pool.connection() as first:
+            with pool.connection() as second:
+                assert first is not second
+                assert pool.stats()["in_use"] == 2
+
+        stats = pool.stats()
+        assert stats["in_use"] == 0
+        assert stats["idle"] == 2
+        assert stats["created"] == 2
+        assert stats["checkouts"] == 2
+        pool.close()
+
+    def test_pool_exhausted_times_out(self, tmp_path):
+        pool = self.create_pool(tmp_path, size=1)
+
+        with pool.connection():
+            with pytest.raises(TimeoutError):
+                pool.checkout()
+
+        assert pool.stats()["waits"] == 1
+        pool.close()
+
+    def test_pool_replaces_broken_connection(self, tmp_path):
+        pool = self.create_pool(tmp_path, size=1)
+
+        connection = pool.checkout()
+        pool.checkin(connection)
+        connection.close()
+
+        with pool.connection() as replacement:
+            assert replacement is not connection
+            assert pool.health_check(replacement)
+
+        assert pool.stats()["health_check_failures"] == 1
+        pool.close()
+
+    def test_threads_share_the_writer_and_read_on_the_pool(self, tmp_path):
+        db = DatabaseConnection(str(tmp_path / "threads.db"), pool_size=5)
+        db.update_table("CREATE TABLE Items (Item_ID INTEGER PRIMARY KEY AUTOINCREMENT, Name TEXT)")
+
+        barrier = threading.Barrier(4)
+        results = {}
+
+        def worker(name):
+            barrier.wait()
+            db.update_table("INSERT INTO Items (Name) VALUES (?)", sql_parameters=name)
+            barrier.wait()
+            with db.read_connection() as connection:
+                results[name] = (db.cursor.lastrowid, id(db.db), id(connection))
+                barrier.wait()
+            db.release_connection()
+
+        threads = [threading.Thread(target=worker, args=(f"item{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for name, (lastrowid, _, _) in results.items():
+            row = db.select_query("SELECT Name FROM Items WHERE Item_ID = ?", sql_parameters=lastrowid, fetch="one")
+            assert row["Name"] == name
+        # Writes share the single writer connection, threads reading at the same time use their own connections
+        assert len({writer for _, writer, _ in results.values()}) == 1
+        assert len({reader for _, _, reader in results.values()}) == 4
+        assert db.pool_stats()["in_use"] == 0
+        db.close()
+
+    def test_more_threads_than_connections_can_read(self, tmp_path):
+        db = DatabaseConnection(str(tmp_path / "threads.db"), pool_size=2)
+        db.read_pool.timeout = 1
+        db.update_table("CREATE TABLE Items (Item_ID INTEGER PRIMARY KEY AUTOINCREMENT, Name TEXT)")
+        errors = []
+
+        def worker():
+            try:
+                # Never calls release_connection, each read returns its connection to the pool
+                for _ in range(5):
+                    db.select_query("SELECT COUNT(*) FROM Items")
+                    list(db.iter_query("SELECT * FROM Items"))
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert db.pool_stats()["in_use"] == 0
+        db.close()
+
+    def test_reads_during_an_iterator_do_not_wait_for_the_pool(self, tmp_path):
+        db = DatabaseConnection(str(tmp_path / "threads.db"), pool_size=1)
+        db.read_pool.timeout = 1
+        db.update_table("CREATE TABLE Items (Item_ID INTEGER PRIMARY KEY AUTOINCREMENT, Name TEXT)")
+        db.update_many("INSERT INTO Items (Name) VALUES (?)", [("a",), ("b",)])
+
+        names = [(row["Name"], db.select_query("SELECT COUNT(*) AS Items FROM Items", fetch="one")["Items"])
+                 for row in db.iter_query("SELECT Name FROM Items ORDER BY Item_ID")]
+
+        assert names == [("a", 2), ("b", 2)]
+        assert db.pool_stats()["in_use"] == 0
+        db.close()
+
+    def test_reads_during_an_iterator_see_the_threads_writes(self, tmp_path):
+        db = DatabaseConnection(str(tmp_path / "threads.db"))
+        db.update_table("CREATE TABLE Items (Item_ID INTEGER PRIMARY KEY AUTOINCREMENT, Name TEXT)")
+        db.update_many("INSERT INTO Items (Name) VALUES (?)", [(f"v{i}",) for i in range(10)])
+
+        rows = db.iter_query("SELECT Item_ID FROM Items ORDER BY Item_ID", batch_size=2)
+        next(rows)
+        assert db.update_table("UPDATE Items SET Name = 'changed' WHERE Item_ID = 1") is None
+
+        assert db.select_query("SELECT Name FROM Items WHERE Item_ID = 1", fetch="one") == {"Name": "changed"}
+        # The iterator keeps reading its own snapshot
+        assert len(list(rows)) == 9
+        rows.close()
+        assert db.select_query("SELECT Name FROM Items WHERE Item_ID = 1", fetch="one") == {"Name": "changed"}
+        assert db.pool_stats()["in_use"] == 0
+        db.close()
@@ -0,0 +1,119 @@
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+
+from advanced_database_project.backend.dates import display_date, to_iso_date
+from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.migrations import MIGRATIONS, migrate
+
+SQL_SCRIPT = Path("create_database_script.sql")
+ADDRESS = ("1", "High Street", "AB1 2CD")
+CARD = ("1234567812345678", "01/30", "Test Customer", "123")
+DATE_COLUMNS = [("Order_Headers", "Order_Date"), ("Shipping", "Delivery_Date"), ("Reviews", "Review_Date"),
+                ("Customer_Basket", "Basket_Created_Date")]
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    A freshly created and migrated copy of the database
+    """
+    db = DatabaseConnection(str(tmp_path / "dates.db"))
+    db.create_database(SQL_SCRIPT)
+
+    yield db
+
+    db.close()
+
+
+class TestDates:
+
+    @pytest.mark.parametrize("value", ["2024-01-13", "13/01/2024", date(2024, 1, 13), datetime(2024, 1, 13, 18, 30)])
+    def test_to_iso_date(self, value):
+        assert to_iso_date(value) == "2024-01-13"
+
+    def test_to_iso_date_refuses_other_formats(self):
+        assert to_iso_date(None) is None
+        with pytest.raises(ValueError):
+            to_iso_date("01/13/2024")
+
+    def test_display_date(self):
+        assert display_date("2024-01-13") == "13/01/2024"
+        assert display_date(None) == ""
+
+    def test_migration_converts_stored_dates(self, tmp_path):
+        db = DatabaseConnection(str(tmp_path / "old.db"))
+        db.run_sql_script(SQL_SCRIPT)
+        migrate(db, [migration for migration in MIGRATIONS if migration.version < 10])
+        assert db.select_query("SELECT Review_Date FROM Reviews WHERE Review_ID = 1", fetch="one")["Review_Date"] \
+               == "14/01/2024"
+
+        db.migrate()
+
+        assert db.select_query("SELECT Review_Date FROM Reviews WHERE Review_ID = 1", fetch="one")["Review_Date"] \
+               == "2024-01-14"
+        for table, column in DATE_COLUMNS:
+            assert db.select_query(f"SELECT COUNT(*) AS Total FROM {table} WHERE {column} LIKE '%/%'",
+                                   fetch="one")["Total"] == 0
+        db.close()
+
+    def test_writers_store_iso_dates(self, db):
+        assert db.add_review(1, 2, 5, "Great", "13/01/2024") is None
+        assert db.place_order(date(2024, 1, 13), 1, 2, 1, 1, 1, "Ordered") is None
+
+        assert db.select_reviews_by_product_id(2)[-1]["Review_Date"] == "2024-01-13"
+        assert db.get_orders_by_customer_id(1)[-1]["Order_Date"] == "2024-01-13"
+
+    @pytest.mark.parametrize("write", [
+        lambda db, day: db.create_basket_by_customer_id(1, day),
+        lambda db, day: db.add_review(1, 2, 5, "Great", day),
+        lambda db, day: db.create_shipping(1, *ADDRESS, day),
+        lambda db, day: db.create_order_header(day, 1, 1, 1, "Ordered"),
+        lambda db, day: db.place_order(day, 1, 2, 1, 1, 1, "Ordered"),
+        lambda db, day: db.place_orders(day, 1, 1, 1, [(2, 1), (3, 1)], "Ordered")[0],
+        lambda db, day: db.checkout(1, 1, day, "2024-06-04", *ADDRESS, *ADDRESS, *CARD),
+        lambda db, day: db.checkout(1, 1, "2024-06-01", day, *ADDRESS, *ADDRESS, *CARD),
+    ], ids=["create_basket_by_customer_id", "add_review", "create_shipping", "create_order_header", "place_order",
+            "place_orders", "checkout_order_date", "checkout_delivery_date"])
+    def test_writers_return_unreadable_dates(self, db, write):
+        before = {table: db.select_query(f"SELECT * FROM {table}") for table in db.tables}
+
+        assert isinstance(write(db, "yesterday"), ValueError)
+
+        assert not db.db.in_transaction
+        assert {table: db.select_query(f"SELECT * FROM {table}") for table in db.tables} == before
+
+    @pytest.mark.parametrize("select", [DatabaseConnection.get_orders_by_date_range,
+                                        DatabaseConnection.select_reviews_by_date_range])
+    def test_date_ranges_refuse_unreadable_dates(self, db, select):
+        with pytest.raises(ValueError):
+            select(db, "2024-01-01", "yesterday")
+
+    def test_orders_by_date_range(self, db):
+        orders = db.get_orders_by_date_range("01/02/2024", date(2024, 3, 31))
+
+        assert orders
+        assert all("2024-02-01" <= order["Order_Date"] <= "2024-03-31" for order in orders)
+        assert orders == sorted(orders, key=lambda order: (order["Order_Date"], order["Order_ID"]))
+        assert len(orders) == len([order for order in db.get_orders_by_date_range("2000-01-01", "2100-01-01")
+                                   if "2024-02-01" <= order["Order_Date"] <= "2024-03-31"])
+
+    def test_reviews_by_date_range(self, db):
+        reviews = db.select_reviews_by_date_range("2024-01-01", "2024-01-31")
+
+        assert [review["Review_Date"] for review in reviews] == sorted(review["Review_Date"] for review in reviews)
+        assert any(review["Review_Date"] == "2024-01-14" for review in reviews)
+        assert all(review["Review_Date"].startswith("2024-01") for review in reviews)
+
+    @pytest.mark.parametrize("table, index", [("Order_Headers", "Order_Headers_Order_Date_idx"),
+                                              ("Reviews", "Reviews_Review_Date_idx")])
+    def test_date_ranges_use_the_index(self, db, table, index):
+        column = "Order_Date" if table == "Order_Headers" else "Review_Date"
+        key = "Order_ID" if table == "Order_Headers" else "Review_ID"
+
+        plan = db.explain_query_plan(f"SELECT * FROM {table} WHERE {column} BETWEEN ? AND ? ORDER BY {column}, {key}",
+                                     ("2024-01-01", "2024-12-31"))
+
+        assert any(index in step for step in plan)
+        assert not any(step.startswith("SCAN") and "INDEX" not in step or "TEMP B-TREE" in step for step in plan)
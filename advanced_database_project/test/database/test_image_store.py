@@ -0,0 +1,229 @@
+import io
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.migrations import image_hash
+from advanced_database_project.backend.renditions import RENDITION_SIZES, THUMBNAIL_SIZE, DETAIL_SIZE
+from advanced_database_project.gui.image_cache import ImageCache
+
+SQL_SCRIPT = Path("create_database_script.sql")
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    A freshly created and migrated copy of the database
+    """
+    db = DatabaseConnection(str(tmp_path / "images.db"))
+    db.create_database(SQL_SCRIPT)
+
+    yield db
+
+    db.close()
+
+
+def png(colour, size=(640, 400)):
+    output = io.BytesIO()
+    Image.new("RGBA", size, colour).save(output, format="PNG")
+    return output.getvalue()
+
+
+SHARED_IMAGE = png("red")
+MOUSE_IMAGE = png("blue", size=(200, 500))
+
+
+@pytest.fixture
+def images(tmp_path):
+    """
+    Two image files with the same contents, named after products, and one with different contents
+    """
+    directory = tmp_path / "images"
+    directory.mkdir()
+    (directory / "Gaming Laptop.png").write_bytes(SHARED_IMAGE)
+    (directory / "Gaming Monitor.png").write_bytes(SHARED_IMAGE)
+    (directory / "Wireless Mouse.png").write_bytes(MOUSE_IMAGE)
+    return sorted(directory.iterdir())
+
+
+def image_ids(db):
+    return {row["Product_Name"]: row["Image_ID"] for row in db.select_query("""
+            SELECT Product_Name, Image_ID FROM Products
+            WHERE Product_Name IN ('Gaming Laptop', 'Gaming Monitor', 'Wireless Mouse')
+            """)}
+
+
+def image_count(db, table="Images"):
+    return db.select_query(f"SELECT COUNT(*) AS Total FROM {table}", fetch="one")["Total"]
+
+
+class TestImageStore:
+
+    def test_identical_images_are_stored_once(self, db, images):
+        assert all(result is None for result in db.insert_images(images))
+
+        ids = image_ids(db)
+        assert image_count(db) == 2
+        assert ids["Gaming Laptop"] == ids["Gaming Monitor"] != ids["Wireless Mouse"]
+        assert db.get_image(ids["Wireless Mouse"]) == MOUSE_IMAGE
+
+        assert all(result is None for result in db.insert_images(images))
+        assert image_count(db) == 2
+
+    def test_insert_image_reuses_a_stored_image(self, db, images):
+        db.insert_images(images[:1])
+
+        assert db.insert_image(images[1]) is None
+
+        assert image_count(db) == 1
+        assert db.get_image(image_ids(db)["Gaming Monitor"]) == SHARED_IMAGE
+
+    def test_listings_only_carry_the_image_id(self, db, images):
+        db.insert_images(images)
+
+        product = db.select_products("gaming laptop")[0]
+        assert "Image_ID" in product.keys() and "Image_Data" not in product.keys()
+        assert db.get_image(product["Image_ID"]) == SHARED_IMAGE
+        assert db.get_image(None) is None
+        assert db.get_image(1000) is None
+
+    def test_migration_moves_existing_images(self, tmp_path):
+        db = DatabaseConnection(str(tmp_path / "old.db"))
+        db.run_sql_script(SQL_SCRIPT)
+        db.update_table("UPDATE Products SET Product_Image = ? WHERE Product_Name IN ('Gaming Laptop', 'Gaming Monitor')",
+                        SHARED_IMAGE)
+
+        db.migrate()
+
+        ids = image_ids(db)
+        assert image_count(db) == 1
+        assert ids["Gaming Laptop"] == ids["Gaming Monitor"] and ids["Wireless Mouse"] is None
+        assert db.select_query("SELECT Image_Hash FROM Images", fetch="one")["Image_Hash"] == \
+               image_hash(SHARED_IMAGE)
+        assert "Product_Image" not in [column["name"] for column in db.select_query("PRAGMA table_info(Products)")]
+        db.close()
+
+    @pytest.mark.parametrize("include_images", [True, False])
+    def test_backup_round_trip(self, db, images, tmp_path, include_images):
+        db.insert_images(images)
+        ids = image_ids(db)
+
+        db.backup_database_to_xml(tmp_path / "backup.xml", include_images=include_images)
+        db.restore_database_from_xml(tmp_path / "backup.xml")
+
+        if include_images:
+            assert image_ids(db) == ids
+            assert db.get_image(ids["Gaming Laptop"]) == SHARED_IMAGE
+        else:
+            assert image_count(db) == 0
+            assert set(image_ids(db).values()) == {None}
+        assert db.check_schema_version()
+
+
+class TestImageRenditions:
+
+    def test_renditions_are_generated_at_ingest(self, db, images):
+        db.insert_images(images)
+        ids = image_ids(db)
+
+        assert image_count(db, "Image_Renditions") == 2 * len(RENDITION_SIZES)
+        thumbnail = Image.open(io.BytesIO(db.get_image(ids["Gaming Laptop"], THUMBNAIL_SIZE)))
+        assert (thumbnail.format, thumbnail.mode, thumbnail.size) == ("PPM", "RGB", (150, 94))
+        assert Image.open(io.BytesIO(db.get_image(ids["Wireless Mouse"], DETAIL_SIZE))).size == (128, 320)
+        # Other sizes are resized from the original every time they are loaded
+        assert Image.open(io.BytesIO(db.get_image(ids["Wireless Mouse"], 64))).size == (26, 64)
+        assert image_count(db, "Image_Renditions") == 2 * len(RENDITION_SIZES)
+
+    def test_missing_renditions_are_made_from_the_original(self, db, images):
+        db.insert_images(images)
+        mouse = image_ids(db)["Wireless Mouse"]
+        db.update_table("DELETE FROM Image_Renditions WHERE Image_ID = ?", mouse)
+
+        thumbnail = Image.open(io.BytesIO(db.get_image(mouse, THUMBNAIL_SIZE)))
+
+        assert (thumbnail.format, thumbnail.size) == ("PPM", (60, 150))
+        # The rendition is stored, so the original is only resized once
+        assert image_count(db, "Image_Renditions") == 2 * len(RENDITION_SIZES) - 1
+        assert db.backfill_renditions() == [None]
+
+    def test_transparency_is_flattened_onto_white(self, db, tmp_path):
+        (tmp_path / "Gaming Laptop.png").write_bytes(png((0, 0, 0, 0)))
+
+        assert db.insert_image(tmp_path / "Gaming Laptop.png") is None
+
+        thumbnail = Image.open(io.BytesIO(db.get_image(image_ids(db)["Gaming Laptop"], THUMBNAIL_SIZE)))
+        assert thumbnail.getpixel((0, 0)) == (255, 255, 255)
+
+    def test_backfill_only_generates_missing_renditions(self, db, images):
+        db.insert_images(images)
+        mouse = image_ids(db)["Wireless Mouse"]
+        db.update_table("DELETE FROM Image_Renditions WHERE Image_ID = ? AND Size = ?", (mouse, DETAIL_SIZE))
+
+        assert db.backfill_renditions() == [None]
+        assert db.backfill_renditions() == []
+        assert image_count(db, "Image_Renditions") == 2 * len(RENDITION_SIZES)
+
+    def test_unreadable_images_are_reported(self, db, tmp_path):
+        (tmp_path / "Gaming Laptop.png").write_bytes(b"not an image")
+
+        assert isinstance(db.insert_image(tmp_path / "Gaming Laptop.png"), OSError)
+        assert db.get_image(image_ids(db)["Gaming Laptop"]) == b"not an image"
+
+    def test_restore_regenerates_renditions(self, db, images, tmp_path):
+        db.insert_images(images)
+        db.backup_database_to_xml(tmp_path / "backup.xml")
+
+        db.restore_database_from_xml(tmp_path / "backup.xml")
+
+        assert image_count(db, "Image_Renditions") == 2 * len(RENDITION_SIZES)
+
+
+class TestImageCache:
+
+    def test_images_are_decoded_once(self, db, images):
+        db.insert_images(images)
+        ids = image_ids(db)
+        cache = ImageCache()
+
+        thumbnail = cache.get_image(db, ids["Gaming Laptop"], THUMBNAIL_SIZE)
+        db.reset_query_stats()
+
+        assert cache.get_image(db, ids["Gaming Monitor"], THUMBNAIL_SIZE) is thumbnail
+        assert db.query_stats_snapshot() == {}
+        assert cache.get_image(db, ids["Gaming Laptop"], DETAIL_SIZE).size == (320, 200)
+        assert cache.snapshot()["hits"] == 1 and cache.snapshot()["misses"] == 2
+
+    def test_products_without_an_image(self, db, images):
+        db.insert_images(images)
+        cache = ImageCache()
+
+        assert cache.get_image(db, None, THUMBNAIL_SIZE) is None
+        assert cache.get_image(db, 1000, THUMBNAIL_SIZE) is None
+        assert cache.snapshot()["images"] == 0
+
+    def test_images_without_renditions_are_drawn(self, db, images):
+        db.insert_images(images)
+        laptop = image_ids(db)["Gaming Laptop"]
+        db.update_table("DELETE FROM Image_Renditions")
+        cache = ImageCache()
+
+        assert cache.get_image(db, laptop, THUMBNAIL_SIZE).size == (150, 94)
+
+    def test_least_recently_used_images_are_evicted_to_fit_the_budget(self, db, images):
+        db.insert_images(images)
+        ids = image_ids(db)
+        thumbnail_bytes = 150 * 94 * 3
+        cache = ImageCache(max_bytes=thumbnail_bytes + 128 * 320 * 3)
+
+        cache.get_image(db, ids["Gaming Laptop"], THUMBNAIL_SIZE)
+        cache.get_image(db, ids["Wireless Mouse"], DETAIL_SIZE)
+        assert cache.snapshot()["evictions"] == 0
+        cache.get_image(db, ids["Gaming Laptop"], THUMBNAIL_SIZE)
+        cache.get_image(db, ids["Wireless Mouse"], THUMBNAIL_SIZE)
+
+        assert cache.snapshot()["evictions"] == 1
+        assert cache.snapshot()["bytes"] <= cache.max_bytes
+        cache.get_image(db, ids["Gaming Laptop"], THUMBNAIL_SIZE)
+        assert cache.snapshot()["hits"] == 2
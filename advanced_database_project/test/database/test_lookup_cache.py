@@ -0,0 +1,149 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.lookup_cache import LookupCache, written_tables
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    A freshly created and migrated copy of the database
+    """
+    db = DatabaseConnection(str(tmp_path / "cache.db"))
+    db.create_database(Path("create_database_script.sql"))
+    db.lookup_cache.reset()
+
+    yield db
+
+    db.close()
+
+
+def queries_run(db, lookup):
+    db.reset_query_stats()
+    lookup()
+    return sum(statistics["calls"] for statistics in db.query_stats_snapshot().values())
+
+
+class TestLookupCache:
+
+    @pytest.mark.parametrize("sql_query, tables", [
+        ("INSERT INTO Category (Category_Name) VALUES (?)", {"category"}),
+        ("INSERT OR IGNORE INTO Images (Image_Hash) VALUES (?)", {"images"}),
+        ("  UPDATE Suppliers SET Supplier_Name = ?", {"suppliers"}),
+        ('DELETE FROM "Customers" WHERE Customer_ID = ?', {"customers"}),
+        ("DROP TABLE IF EXISTS Category", None),
+        ("SAVEPOINT savepoint_1", set()),
+        ("INSERT INTO main.Category (Category_Name) VALUES (?)", {"category"}),
+        ("WITH Empty AS (SELECT Category_ID FROM Category) DELETE FROM Products WHERE Category_ID IN Empty",
+         {"products"}),
+        ("""
+         WITH RECURSIVE Counter (n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM Counter WHERE n < 5),
+         Names AS MATERIALIZED (SELECT 'Name (' || n || ')' AS Name FROM Counter)
+         INSERT INTO Category (Category_Name) SELECT Name FROM Names
+         """, {"category"}),
+        ("WITH Prices AS (SELECT Price FROM Products) SELECT MAX(Price) FROM Prices", set()),
+        ("WITH Broken AS (SELECT 1", None),
+        ("VACUUM", None),
+    ])
+    def test_written_tables(self, sql_query, tables):
+        assert written_tables(sql_query) == tables
+
+    def test_least_recently_used_is_evicted(self):
+        cache = LookupCache(max_size=2)
+        for key in ("a", "b", "a", "c"):
+            cache.get_or_load(key, ["Category"], lambda: key.upper())
+
+        assert cache.get_or_load("a", [], lambda: "reloaded") == "A"
+        assert cache.get_or_load("b", [], lambda: "reloaded") == "reloaded"
+        assert cache.snapshot()["evictions"] == 2
+
+    def test_results_expire(self, monkeypatch):
+        cache = LookupCache(ttl=10)
+        cache.get_or_load("a", ["Category"], lambda: 1)
+
+        now = time.monotonic()
+        monkeypatch.setattr("time.monotonic", lambda: now + 11)
+
+        assert cache.get_or_load("a", ["Category"], lambda: 2) == 2
+        assert cache.snapshot()["expired"] == 1
+
+    def test_results_read_during_a_write_are_not_cached(self):
+        cache = LookupCache()
+
+        def load():
+            cache.invalidate(["Category"])
+            return "old"
+
+        assert cache.get_or_load("a", ["Category"], load) == "old"
+        assert cache.get_or_load("a", ["Category"], lambda: "new") == "new"
+
+    def test_callers_get_a_copy(self):
+        cache = LookupCache()
+        cache.get_or_load("a", ["Category"], lambda: {"Category_Name": "Laptops"})["Category_Name"] = "Changed"
+
+        assert cache.get_or_load("a", ["Category"], dict) == {"Category_Name": "Laptops"}
+
+
+class TestCachedLookups:
+
+    @pytest.mark.parametrize("lookup", ["select_categories", "select_categories_by_id", "select_suppliers_by_id",
+                                        "select_customer_by_id"])
+    def test_repeated_lookups_do_not_query(self, db, lookup):
+        arguments = () if lookup == "select_categories" else (1,)
+        first = getattr(db, lookup)(*arguments)
+
+        assert queries_run(db, lambda: getattr(db, lookup)(*arguments)) == 0
+        assert getattr(db, lookup)(*arguments) == first
+        assert db.lookup_cache_stats()["hits"] == 2
+        assert db.lookup_cache_stats()["misses"] == 1
+
+    def test_writes_invalidate_only_their_table(self, db):
+        db.select_categories_by_id(1)
+        db.select_suppliers_by_id(1)
+
+        assert db.update_table("UPDATE Category SET Category_Name = 'Renamed' WHERE Category_ID = 1") is None
+
+        assert db.select_categories_by_id(1)["Category_Name"] == "Renamed"
+        assert queries_run(db, lambda: db.select_suppliers_by_id(1)) == 0
+        assert db.lookup_cache_stats()["invalidations"] == 1
+
+    def test_other_tables_do_not_invalidate(self, db):
+        db.select_categories()
+
+        db.update_table("UPDATE Products SET Stock_Level = Stock_Level + 1 WHERE Product_ID = 1")
+        db.update_many("INSERT INTO Reviews (Customer_ID, Product_ID, Review_Stars, Review_Comment, Review_Date) "
+                       "VALUES (?, ?, ?, ?, ?)", [(1, 1, 5, "Great", "2024-01-01")])
+
+        assert queries_run(db, db.select_categories) == 0
+
+    def test_transactions_invalidate_when_they_end(self, db):
+        db.select_categories_by_id(1)
+
+        with db.transaction():
+            db.update_table("UPDATE Category SET Category_Name = 'Renamed' WHERE Category_ID = 1")
+            # Another thread reading now still sees the committed name, and caches it again
+            db.lookup_cache.get_or_load(("stale",), ["Category"], lambda: "Laptops")
+            assert db.select_categories_by_id(1)["Category_Name"] == "Renamed"
+
+        assert len(db.lookup_cache) == 0
+        assert db.select_categories_by_id(1)["Category_Name"] == "Renamed"
+
+    def test_rolled_back_writes_invalidate(self, db):
+        db.select_customer_by_id(1)
+
+        with db.transaction() as transaction:
+            db.update_table("UPDATE Customers SET Customer_Firstname = 'Changed' WHERE Customer_ID = 1")
+            transaction.error = Exception("Rolled back")
+
+        assert db.select_customer_by_id(1)["Customer_Firstname"] != "Changed"
+
+    def test_restore_clears_the_cache(self, db, tmp_path):
+        db.select_categories()
+        db.backup_database_to_xml(tmp_path / "backup.xml", include_images=False)
+
+        db.restore_database_from_xml(tmp_path / "backup.xml")
+
+        assert len(db.lookup_cache) == 0
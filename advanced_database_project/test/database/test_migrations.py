@@ -0,0 +1,144 @@
+import sqlite3
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.migrations import Migration, SCHEMA_VERSION, migrate
+
+SQL_SCRIPT = Path("create_database_script.sql")
+# A backup of the database built by the .sql script, written before the schema was versioned, with one product image
+BASELINE_BACKUP = Path(__file__).parent / "data" / "v0_backup.xml"
+SCHEMA = "SELECT type, name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%' ORDER BY type, name"
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    A database built by the .sql script only, at schema version 0
+    """
+    db = DatabaseConnection(str(tmp_path / "migrations.db"))
+    db.run_sql_script(SQL_SCRIPT)
+
+    yield db
+
+    db.close()
+
+
+class TestMigrations:
+
+    def test_database_is_migrated_in_place(self, db):
+        db.add_review(1, 1, 5, "Kept by the migration", "2024-01-01")
+        assert db.schema_version() == 0
+
+        applied = db.migrate()
+
+        assert [migration.version for migration in applied] == list(range(1, SCHEMA_VERSION + 1))
+        assert db.check_schema_version()
+        assert db.select_query("SELECT COUNT(*) AS Total FROM Reviews WHERE Review_Comment = ?",
+                               sql_parameters="Kept by the migration", fetch="one")["Total"] == 1
+        assert db.migrate() == []
+
+    @pytest.mark.parametrize("table, column", [
+        ("Order_Headers", "Customer_ID"), ("Order_Lines", "Product_ID"), ("Reviews", "Product_ID"),
+        ("Customer_Basket", "Customer_ID"), ("Basket_Contents", "Product_ID"),
+        ("Shipping", "Customer_ID"), ("Billing", "Customer_ID"),
+    ])
+    def test_foreign_key_lookups_use_an_index(self, db, table, column):
+        db.migrate()
+
+        plan = db.explain_query_plan(f"SELECT * FROM {table} WHERE {column} = ?", (1,))
+
+        assert any(f"INDEX {table}_{column}_idx" in step for step in plan)
+
+    def test_failed_migration_is_rolled_back(self, db):
+        migrations = [
+            Migration(1, "Add an index", "CREATE INDEX Test_idx ON Orders (Order_Date);"),
+            Migration(2, "Broken", "CREATE INDEX Broken_idx ON Orders (Order_Date); SELECT * FROM Missing;"),
+        ]
+
+        with pytest.raises(sqlite3.OperationalError):
+            migrate(db, migrations)
+
+        assert db.schema_version() == 1
+        assert db.select_query("SELECT name FROM sqlite_master WHERE name = 'Broken_idx'") == []
+        assert not db.db.in_transaction
+
+    def test_python_migration(self, db):
+        def upgrade(sql):
+            sql.update_table("UPDATE Products SET Price = Price * 2")
+
+        before = db.select_query("SELECT SUM(Price) AS Total FROM Products", fetch="one")["Total"]
+        migrate(db, [Migration(1, "Double the prices", upgrade)])
+
+        assert db.schema_version() == 1
+        assert db.select_query("SELECT SUM(Price) AS Total FROM Products", fetch="one")["Total"] == before * 2
+
+    def test_newer_database_is_refused(self, db):
+        db.update_table(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+
+        with pytest.raises(sqlite3.DatabaseError):
+            db.migrate()
+
+    def test_backup_restores_indexes_and_version(self, db, tmp_path):
+        db.migrate()
+        db.backup_database_to_xml(tmp_path / "backup.xml", include_images=False)
+
+        db.restore_database_from_xml(tmp_path / "backup.xml")
+
+        assert db.check_schema_version()
+        assert db.select_query("SELECT name FROM sqlite_master WHERE name = 'Order_Headers_Customer_ID_idx'") != []
+
+    def test_backup_restores_into_a_new_database(self, db, tmp_path):
+        db.migrate()
+        db.place_order("2024-06-01", 1, 2, 1, 1, 1, "Ordered")
+        db.backup_database_to_xml(tmp_path / "backup.xml")
+        objects = db.select_query(SCHEMA)
+
+        restored = DatabaseConnection(str(tmp_path / "restored.db"))
+        restored.restore_database_from_xml(tmp_path / "backup.xml")
+
+        assert restored.check_tables()
+        assert restored.check_schema_version()
+        assert restored.select_query(SCHEMA) == objects
+        assert restored.check_rollups() == {}
+        assert restored.search_products("gaming") == db.search_products("gaming") != []
+        assert restored.select_query("SELECT * FROM Order_Summaries") == db.select_query("SELECT * FROM Order_Summaries")
+        restored.close()
+
+    def test_baseline_backup_restores_over_a_migrated_database(self, db):
+        db.migrate()
+        objects = db.select_query(SCHEMA)
+
+        assert db.restore_database_from_xml(BASELINE_BACKUP) is None
+
+        assert db.check_schema_version()
+        # Backups made before the schema was versioned don't have the triggers of the .sql script
+        assert db.select_query(SCHEMA) == [schema_object for schema_object in objects
+                                           if schema_object["name"] not in ("Trigger1", "Trigger2")]
+        assert db.check_rollups() == {}
+        assert len(db.select_query("SELECT * FROM Order_Summaries")) == 17
+        # The image was moved out of Products into the Images table by the migrations
+        assert db.get_image(db.select_product_by_id(1)["Image_ID"]) is not None
+        assert db.select_query("PRAGMA foreign_key_check") == []
+
+    def test_failed_restore_leaves_the_database_as_it_was(self, db, tmp_path):
+        db.migrate()
+        db.place_order("2024-06-01", 1, 2, 1, 1, 1, "Ordered")
+        db.backup_database_to_xml(tmp_path / "backup.xml", include_images=False)
+        objects = db.select_query(SCHEMA)
+        orders = db.select_query("SELECT * FROM Orders")
+
+        # A backup from a newer version of the application can't be migrated
+        backup = ET.parse(tmp_path / "backup.xml")
+        backup.getroot().set("schema_version", str(SCHEMA_VERSION + 1))
+        backup.write(tmp_path / "newer.xml")
+
+        assert isinstance(db.restore_database_from_xml(tmp_path / "newer.xml"), sqlite3.DatabaseError)
+
+        assert not db.db.in_transaction
+        assert db.check_schema_version()
+        assert db.select_query(SCHEMA) == objects
+        assert db.select_query("SELECT * FROM Orders") == orders
+        assert db.select_query("PRAGMA foreign_keys") == [{"foreign_keys": 1}]
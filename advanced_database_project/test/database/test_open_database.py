@@ -0,0 +1,107 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.migrations import SCHEMA_VERSION
+from advanced_database_project.backend.retry import RetryPolicy
+
+SQL_SCRIPT = Path("create_database_script.sql")
+IMAGES = sorted(Path("./advanced_database_project/assets/").glob("*.png"))[:2]
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    A connection to a database file that doesn't exist yet, connecting creates it empty
+    """
+    db = DatabaseConnection(str(tmp_path / "startup.db"), busy_timeout=0.1, retry_policy=RetryPolicy(max_attempts=1))
+
+    yield db
+
+    db.close()
+
+
+@pytest.fixture
+def old_db(db):
+    """
+    An existing database at schema version 0, with a review added by the user
+    """
+    db.run_sql_script(SQL_SCRIPT)
+    db.add_review(1, 1, 5, "Kept when the database is opened", "2024-01-01")
+    return db
+
+
+def reviews(db):
+    return db.select_query("SELECT Review_Comment FROM Reviews WHERE Review_Comment = 'Kept when the database is opened'")
+
+
+class TestOpenDatabase:
+
+    def test_new_database_is_created(self, db):
+        assert db.is_new_database()
+
+        assert db.open_database(SQL_SCRIPT, IMAGES) == []
+
+        assert not db.is_new_database()
+        assert db.check_tables()
+        assert db.check_schema_version()
+        assert len(db.select_query("SELECT * FROM Images")) == len(IMAGES)
+
+    def test_existing_database_is_migrated_in_place(self, old_db):
+        assert not old_db.is_new_database()
+
+        migrations = old_db.open_database(SQL_SCRIPT, IMAGES)
+
+        assert [migration.version for migration in migrations] == list(range(1, SCHEMA_VERSION + 1))
+        assert old_db.check_schema_version()
+        assert reviews(old_db) != []
+        # The images are only inserted into a new database
+        assert old_db.select_query("SELECT * FROM Images") == []
+
+    def test_up_to_date_database_is_opened(self, old_db):
+        old_db.migrate()
+
+        assert old_db.open_database(SQL_SCRIPT, IMAGES) == []
+        assert reviews(old_db) != []
+
+    def test_failed_migration_keeps_the_data(self, old_db):
+        old_db.update_table(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+
+        with pytest.raises(sqlite3.DatabaseError):
+            old_db.open_database(SQL_SCRIPT, IMAGES)
+
+        assert old_db.schema_version() == SCHEMA_VERSION + 1
+        assert reviews(old_db) != []
+
+    def test_locked_database_keeps_the_data(self, old_db, tmp_path):
+        other_process = sqlite3.connect(tmp_path / "startup.db")
+        other_process.execute("BEGIN EXCLUSIVE")
+        try:
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                old_db.open_database(SQL_SCRIPT, IMAGES)
+        finally:
+            other_process.rollback()
+            other_process.close()
+
+        assert old_db.schema_version() == 0
+        assert reviews(old_db) != []
+
+    def test_missing_tables_are_not_recreated(self, old_db):
+        old_db.migrate()
+        assert old_db.update_table("DROP TABLE Basket_Contents") is None
+
+        with pytest.raises(sqlite3.DatabaseError, match="missing"):
+            old_db.open_database(SQL_SCRIPT, IMAGES)
+
+        assert reviews(old_db) != []
+
+    def test_reload_recreates_the_database(self, old_db):
+        old_db.migrate()
+
+        old_db.open_database(SQL_SCRIPT, IMAGES, reload=True)
+
+        assert old_db.check_schema_version()
+        assert reviews(old_db) == []
+        assert len(old_db.select_query("SELECT * FROM Images")) == len(IMAGES)
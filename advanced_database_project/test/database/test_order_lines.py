@@ -0,0 +1,96 @@
+from pathlib import Path
+
+import pytest
+
+from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.migrations import MIGRATIONS, migrate
+
+SQL_SCRIPT = Path("create_database_script.sql")
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    A freshly created and migrated copy of the database
+    """
+    db = DatabaseConnection(str(tmp_path / "orders.db"))
+    db.create_database(SQL_SCRIPT)
+
+    yield db
+
+    db.close()
+
+
+def order_rows(db):
+    return db.select_query("""
+           SELECT Order_ID, Order_Date, Customer_ID, Product_ID, Shipping_ID, Billing_ID, Order_Quantity, Order_Status
+           FROM Orders ORDER BY Order_ID, Product_ID
+           """, row_format="tuple")
+
+
+class TestOrderLines:
+
+    def test_migration_groups_the_rows_of_each_order(self, tmp_path):
+        db = DatabaseConnection(str(tmp_path / "old.db"))
+        db.run_sql_script(SQL_SCRIPT)
+        migrate(db, [migration for migration in MIGRATIONS if migration.version < 9])
+        db.update_table("""
+                        INSERT INTO Orders (Order_Date, Customer_ID, Product_ID, Shipping_ID, Billing_ID,
+                                            Order_Quantity, Order_Status)
+                        VALUES ('2024-11-01', 1, 2, 1, 1, 1, 'Ordered'), ('2024-11-01', 1, 3, 1, 1, 2, 'Ordered')
+                        """)
+        before = db.select_query("SELECT * FROM Orders ORDER BY Order_ID", row_format="tuple")
+
+        db.migrate()
+
+        headers = db.select_query("SELECT Order_ID FROM Order_Headers WHERE Order_Date = '2024-11-01'")
+        assert len(headers) == 1
+        assert [(line["Product_ID"], line["Order_Quantity"])
+                for line in db.get_order_lines_by_order_id(headers[0]["Order_ID"])] == [(2, 1), (3, 2)]
+        # Only the Order_ID of the second line of the new order changes
+        assert order_rows(db) == [(headers[0]["Order_ID"],) + row[1:] if row[1] == '2024-11-01' else row
+                                  for row in before]
+        assert db.check_rollups() == {}
+        db.close()
+
+    def test_order_history_only_reads_the_headers(self, db):
+        plan = db.explain_query_plan("""
+                                     SELECT Order_ID, Order_Date, Customer_ID, Shipping_ID, Billing_ID, Order_Status
+                                     FROM Order_Headers WHERE Customer_ID = ? ORDER BY Order_ID
+                                     """, (1,))
+
+        assert any("Order_Headers_Customer_ID_idx" in step for step in plan)
+        assert not any("Order_Lines" in step or "TEMP B-TREE" in step for step in plan)
+
+    def test_one_row_per_order(self, db):
+        assert db.place_orders("2024-11-01", 1, 1, 1, [(2, 1), (3, 2)], "Ordered")[-1] is None
+
+        orders = db.get_orders_by_customer_id(1)
+        order = orders[-1]
+        assert [o["Order_ID"] for o in orders] == sorted(o["Order_ID"] for o in orders)
+        assert (order["Order_Date"], order["Order_Status"]) == ("2024-11-01", "Ordered")
+        assert "Product_Name" not in order
+        assert db.get_order_by_order_id(order["Order_ID"]) == order
+        assert [line["Product_ID"] for line in db.get_order_lines_by_order_id(order["Order_ID"])] == [2, 3]
+        assert db.get_order_by_order_id(1000) is None
+
+    def test_deleting_an_order_deletes_its_lines(self, db):
+        db.place_orders("2024-11-01", 1, 1, 1, [(2, 1), (3, 2)], "Ordered")
+        order_id = db.get_orders_by_customer_id(1)[-1]["Order_ID"]
+
+        db.update_table("DELETE FROM Order_Headers WHERE Order_ID = ?", order_id)
+
+        assert db.get_order_lines_by_order_id(order_id) == []
+        assert db.check_rollups() == {}
+
+    def test_restore_keeps_the_orders(self, db, tmp_path):
+        db.place_orders("2024-11-01", 1, 1, 1, [(2, 1), (3, 2)], "Ordered")
+        before = order_rows(db)
+        db.backup_database_to_xml(tmp_path / "backup.xml", include_images=False)
+
+        db.restore_database_from_xml(tmp_path / "backup.xml")
+
+        assert order_rows(db) == before
+        order_id = before[-1][0]
+        db.update_table("DELETE FROM Order_Headers WHERE Order_ID = ?", order_id)
+        assert db.get_order_lines_by_order_id(order_id) == []
@@ -0,0 +1,96 @@
+from pathlib import Path
+
+import pytest
+
+from advanced_database_project.backend.db_connection import DatabaseConnection
+
+SORTS = ["Name", "Category", "Price", "Relevance"]
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    A freshly created and migrated copy of the database, with some products that tie on every sort key
+    """
+    db = DatabaseConnection(str(tmp_path / "pages.db"), slow_query_threshold=0)
+    db.create_database(Path("create_database_script.sql"))
+    db.update_many("""
+                   INSERT INTO Products (Product_Name, Category_ID, Price, Stock_Level, Supplier_ID)
+                   SELECT Product_Name, Category_ID, Price, Stock_Level, Supplier_ID FROM Products WHERE Product_ID = ?
+                   """, [(product_id,) for product_id in (1, 1, 2, 3, 3, 3)])
+
+    yield db
+
+    db.close()
+
+
+def read_in_pages(read_page, page_size):
+    rows, after = [], None
+    while page := read_page(limit=page_size, after=after):
+        assert len(page) <= page_size
+        rows += page
+        after = page[-1]["Product_ID" if "Product_ID" in page[-1].keys() else "Order_ID"]
+    return rows
+
+
+def last_plan(db):
+    return db.slow_queries()[-1]["query_plan"]
+
+
+class TestProductPages:
+
+    @pytest.mark.parametrize("sort_by", SORTS)
+    @pytest.mark.parametrize("sort_order", ["ASC", "DESC"])
+    @pytest.mark.parametrize("search", ["", "gaming"])
+    def test_pages_add_up_to_the_listing(self, db, sort_by, sort_order, search):
+        def read_page(**page):
+            return db.select_products(search, sort_by=sort_by, sort_order=sort_order, **page)
+
+        listing = [product["Product_ID"] for product in read_page()]
+
+        assert len(listing) > 3
+        assert [product["Product_ID"] for product in read_in_pages(read_page, 3)] == listing
+
+    def test_ties_are_broken_on_the_product_id(self, db):
+        products = db.select_products(sort_by="Price", sort_order="DESC")
+
+        assert products == sorted(products, key=lambda product: (-product["Price"], -product["Product_ID"]))
+
+    def test_filters_apply_to_every_page(self, db):
+        listing = db.select_products(filter_price=(100, 1000), sort_by="Price")
+
+        assert read_in_pages(lambda **page: db.select_products(filter_price=(100, 1000), sort_by="Price", **page),
+                             2) == listing
+        assert all(100 <= product["Price"] <= 1000 for product in listing)
+
+    @pytest.mark.parametrize("sort_by, index", [("Name", "Products_Product_Name_idx"),
+                                                ("Price", "Products_Price_idx"),
+                                                ("Category", "Category_Category_Name_idx")])
+    def test_pages_seek_in_the_index_of_the_sort(self, db, sort_by, index):
+        first_page = db.select_products(sort_by=sort_by, limit=3)
+        assert any(index in step for step in last_plan(db))
+        assert not any("TEMP B-TREE" in step for step in last_plan(db))
+
+        db.select_products(sort_by=sort_by, sort_order="DESC", limit=3, after=first_page[-1]["Product_ID"])
+        assert any(index in step and ("<" in step or ">" in step) for step in last_plan(db))
+        assert not any("TEMP B-TREE" in step for step in last_plan(db))
+
+
+class TestOrderPages:
+
+    @pytest.mark.parametrize("sort_order", ["ASC", "DESC"])
+    def test_pages_add_up_to_the_history(self, db, sort_order):
+        for _ in range(4):
+            assert db.place_order("2024-06-01", 1, 2, 1, 1, 1, "Ordered") is None
+
+        history = db.get_orders_by_customer_id(1, sort_order)
+
+        assert [order["Order_ID"] for order in history] == sorted((order["Order_ID"] for order in history),
+                                                                  reverse=sort_order == "DESC")
+        assert read_in_pages(lambda **page: db.get_orders_by_customer_id(1, sort_order, **page), 2) == history
+
+    def test_pages_seek_in_the_customer_index(self, db):
+        db.get_orders_by_customer_id(1, "DESC", limit=2, after=10)
+
+        assert any("Order_Headers_Customer_ID_idx (Customer_ID=? AND rowid<?)" in step for step in last_plan(db))
+        assert not any("TEMP B-TREE" in step for step in last_plan(db))
@@ -0,0 +1,149 @@
+import pytest
+
+from advanced_database_project.gui import product_grid
+from advanced_database_project.gui.product_grid import (CARD_PADDING, CELL_HEIGHT, CELL_WIDTH, GridDiff, ProductGrid,
+                                                        card_name, diff_keys)
+
+
+class FakeCanvas:
+    """
+    A canvas scrolled to a given height, in place of a Tk canvas
+    """
+
+    def __init__(self, height):
+        self.top = 0
+        self.height = height
+        self.scrollregion = None
+
+    def canvasy(self, y):
+        return self.top + y
+
+    def winfo_height(self):
+        return self.height
+
+    def configure(self, scrollregion):
+        self.scrollregion = scrollregion
+
+    def yview_moveto(self, fraction):
+        self.top = 0
+
+
+class FakeCard:
+    """
+    Records where a card is drawn, in place of the canvas items
+    """
+
+    def __init__(self, canvas, db, on_click):
+        self.cell = None
+        self.product = None
+
+    def show_product(self, product):
+        previous, self.product = self.product, product
+        return previous != product
+
+    def move_to(self, x, y):
+        self.cell = ((y - CARD_PADDING) // CELL_HEIGHT, (x - CARD_PADDING) // CELL_WIDTH)
+
+    def hide(self):
+        self.cell = None
+
+
+@pytest.fixture
+def canvas():
+    # Two rows in view
+    return FakeCanvas(2 * CELL_HEIGHT - 1)
+
+
+@pytest.fixture
+def grid(monkeypatch, canvas):
+    monkeypatch.setattr(product_grid, "ProductCard", FakeCard)
+    return ProductGrid(canvas, None, lambda product: None, columns=2, overscan_rows=1)
+
+
+def products(*product_ids, price=1.0):
+    return [{"Product_ID": product_id, "Price": price} for product_id in product_ids]
+
+
+def cells(grid):
+    return {key: card.cell for key, card in grid.cards.items()}
+
+
+class TestDiffKeys:
+
+    @pytest.mark.parametrize("displayed, new, diff", [
+        ([], [1, 2], GridDiff([1, 2], [], [])),
+        ([1, 2, 3], [1, 2, 3], GridDiff([], [], [])),
+        ([1, 2, 3], [1, 2, 3, 4], GridDiff([4], [], [])),
+        ([1, 2, 3], [3, 2, 1], GridDiff([], [3, 1], [])),
+        ([1, 2, 3], [2, 3], GridDiff([], [2, 3], [1])),
+        ([1, 2, 3], [1, 4], GridDiff([4], [], [2, 3])),
+    ])
+    def test_diff(self, displayed, new, diff):
+        assert diff_keys(displayed, new) == diff
+
+    def test_cards_that_keep_their_cell_are_not_moved(self):
+        assert diff_keys([1, 2, 3, 4], [3, 4, 5, 6], displayed_start=0, new_start=2) == GridDiff([5, 6], [], [1, 2])
+
+    def test_long_names_are_split(self):
+        assert card_name("Mechanical Gaming Keyboard") == "Mechanical\nGaming\nKeyboard"
+        assert card_name("Mouse") == "Mouse"
+
+
+class TestProductGrid:
+
+    def test_cards_are_drawn_in_order(self, grid):
+        grid.render(products(1, 2, 3))
+
+        assert cells(grid) == {1: (0, 0), 2: (0, 1), 3: (1, 0)}
+
+    def test_hidden_cards_are_reused(self, grid):
+        grid.render(products(1, 2, 3))
+        first_card = grid.cards[1]
+
+        grid.render(products(2, 4))
+
+        assert grid.stats["hidden"] == 2
+        assert grid.stats["reused"] == 1
+        assert grid.stats["created"] == 3
+        assert cells(grid) == {2: (0, 0), 4: (0, 1)}
+        assert grid.pool == [first_card]
+        assert first_card.cell is None
+
+    def test_only_changed_products_are_updated(self, grid):
+        grid.render(products(1, 2, 3))
+        grid.stats["updated"] = 0
+
+        grid.render(products(1, 2) + products(3, price=2.0))
+
+        assert grid.stats["updated"] == 1
+        assert grid.stats["moved"] == 0
+        assert grid.cards[3].product["Price"] == 2.0
+
+    def test_only_the_rows_in_view_are_drawn(self, grid, canvas):
+        grid.show_listing(products(*range(1000)))
+
+        # The two rows in view and one row of overscan below them
+        assert sorted(grid.cards) == list(range(6))
+        assert canvas.scrollregion == (0, 0, 2 * CELL_WIDTH, 500 * CELL_HEIGHT)
+
+    def test_scrolling_recycles_cards(self, grid, canvas):
+        grid.show_listing(products(*range(1000)))
+
+        for row in range(1, 400):
+            canvas.top = row * CELL_HEIGHT
+            grid.redraw()
+
+        # Rows 399 and 400 are in view, with one row of overscan either side
+        assert sorted(grid.cards) == list(range(796, 804))
+        assert cells(grid)[800] == (400, 0)
+        assert grid.stats["created"] == 8
+        assert len(grid.cards) + len(grid.pool) == 8
+
+    def test_new_listings_start_at_the_top(self, grid, canvas):
+        grid.show_listing(products(*range(1000)))
+        canvas.top = 100 * CELL_HEIGHT
+        grid.redraw()
+
+        grid.show_listing(products(*range(5)))
+
+        assert cells(grid) == {0: (0, 0), 1: (0, 1), 2: (1, 0), 3: (1, 1), 4: (2, 0)}
@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import pytest
+
+from advanced_database_project.backend.db_connection import DatabaseConnection
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    A freshly created and migrated copy of the database
+    """
+    db = DatabaseConnection(str(tmp_path / "search.db"))
+    db.create_database(Path("create_database_script.sql"))
+
+    yield db
+
+    db.close()
+
+
+def names(products):
+    return [product["Product_Name"] for product in products]
+
+
+class TestProductSearch:
+
+    def test_search_expression(self):
+        assert DatabaseConnection.search_expression("gam lap") == '"gam"* "lap"*'
+        assert DatabaseConnection.search_expression('mouse" OR *') == '"mouse"* "OR"*'
+        assert DatabaseConnection.search_expression("  ") is None
+
+    def test_prefix_and_multi_token_search(self, db):
+        assert names(db.select_products("gam")) == ["Gaming Chair", "Gaming Laptop", "Gaming Monitor"]
+        assert names(db.select_products("gam lap")) == ["Gaming Laptop"]
+        assert names(db.select_products("GAMING monitor")) == ["Gaming Monitor"]
+        assert db.select_products("aptop") == []
+
+    def test_search_covers_category_and_supplier_names(self, db):
+        assert names(db.select_products("laptops")) == ["Gaming Laptop"]
+        assert names(db.select_products("mousemasters")) == ["Wireless Mouse"]
+
+    def test_search_keeps_the_price_filter_and_sort(self, db):
+        products = db.select_products("gaming", filter_price=(100, 1000), sort_by="Price", sort_order="DESC")
+
+        assert names(products) == ["Gaming Monitor", "Gaming Chair"]
+
+    def test_relevance_ranks_name_matches_first(self, db):
+        db.update_table("UPDATE Category SET Category_Name = 'Laptop Accessories' WHERE Category_ID = 8")
+
+        assert names(db.select_products("laptop", sort_by="Relevance")) == ["Gaming Laptop", "Cooling Fan"]
+
+    def test_index_follows_product_writes(self, db):
+        db.update_table("UPDATE Products SET Product_Name = 'Ergonomic Chair' WHERE Product_Name = 'Gaming Chair'")
+        db.update_table("INSERT INTO Products (Product_Name, Category_ID, Price, Stock_Level, Supplier_ID) "
+                        "VALUES ('Standing Desk', 1, 300, 5, 1)")
+
+        assert names(db.select_products("ergo")) == ["Ergonomic Chair"]
+        assert names(db.select_products("gam")) == ["Gaming Laptop", "Gaming Monitor"]
+        assert names(db.select_products("standing techsupplies")) == ["Standing Desk"]
+
+        assert db.update_table("DELETE FROM Products WHERE Product_Name = 'Standing Desk'") is None
+        assert db.select_products("standing") == []
+        assert db.check_rollups() == {}
+
+    def test_search_uses_the_full_text_index(self, db):
+        plan = db.explain_query_plan("SELECT rowid FROM Product_Search WHERE Product_Search MATCH ?", ('"gam"*',))
+
+        assert any("VIRTUAL TABLE INDEX" in step for step in plan)
@@ -16,12 +16,13 @@ class TestProdoctsTable:
     def insert_data(setup_db, data):
         return setup_db.update_table("""
                                      INSERT INTO Products 
-                                     (Product_Name, Category_ID, Price, Stock_Level, Supplier_ID, Product_Image)
+                                     (Product_Name, Category_ID, Price, Stock_Level, Supplier_ID, Image_ID)
                                      VALUES (?, ?, ?, ?, ?, ?)
                                      """, sql_parameters=data)
 
     def test_products_table_valid_data_insertion(self, setup_db):
-        self.insert_data(setup_db, ('Gaming Laptop', 1, 1500, 50, 1, b'test'))
+        setup_db.update_table("INSERT INTO Images (Image_Hash, Image_Data) VALUES (?, ?)", ("test", b'test'))
+        self.insert_data(setup_db, ('Gaming Laptop', 1, 1500, 50, 1, setup_db.cursor.lastrowid))
 
         result = self.select_latest_insert(setup_db)
 
@@ -30,13 +31,15 @@ class TestProdoctsTable:
         assert result["Price"] == 1500
         assert result["Stock_Level"] == 50
         assert result["Supplier_ID"] == 1
-        assert result["Product_Image"] == b'test'
+        assert setup_db.get_image(result["Image_ID"]) == b'test'
 
     def test_products_table_referential_integrity(self, setup_db):
         result = self.insert_data(setup_db, ('Gaming Laptop', 1000, 1500, 50, 1, None))
         assert type(result) == sqlite3.IntegrityError
         result = self.insert_data(setup_db, ('Gaming Laptop', 1, 1500, 50, 1000, None))
         assert type(result) == sqlite3.IntegrityError
+        result = self.insert_data(setup_db, ('Gaming Laptop', 1, 1500, 50, 1, 1000))
+        assert type(result) == sqlite3.IntegrityError
 
     def test_products_table_not_null_constraints(self, setup_db):
         result = self.insert_data(setup_db, (None, 1000, 1500, 50, 1, None))
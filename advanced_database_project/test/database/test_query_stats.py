@@ -0,0 +1,66 @@
+import pytest
+
+from advanced_database_project.backend.query_stats import QueryStats, normalize_sql
+from advanced_database_project.backend.sql import SqlWrapper
+
+
+@pytest.fixture
+def sql(tmp_path):
+    """
+    A SqlWrapper that logs every query as slow, on a database with a single Items table
+    """
+    sql = SqlWrapper(str(tmp_path / "stats.db"), slow_query_threshold=0)
+    sql.update_table("CREATE TABLE Items (Item_ID INTEGER PRIMARY KEY AUTOINCREMENT, Name TEXT NOT NULL)")
+    sql.update_many("INSERT INTO Items (Name) VALUES (?)", ((f"item{i}",) for i in range(50)))
+    sql.reset_query_stats()
+
+    yield sql
+
+    sql.close()
+
+
+class TestQueryStats:
+
+    def test_normalize_sql(self):
+        assert normalize_sql("SELECT *\n   FROM Items WHERE Name = 'it''s' AND Item_ID = 12") == \
+               "SELECT * FROM Items WHERE Name = ? AND Item_ID = ?"
+        assert normalize_sql("RELEASE savepoint_1") == "RELEASE savepoint_1"
+
+    def test_percentiles(self):
+        stats = QueryStats()
+        for _ in range(98):
+            stats.record("SELECT 1", 0.000_010)
+        stats.record("SELECT 1", 0.001)
+        stats.record("SELECT 1", 0.5)
+
+        statistics = stats.snapshot()["SELECT ?"]
+        assert statistics["calls"] == 100
+        assert statistics["p50"] == statistics["p95"] == 16 / 1_000_000
+        assert 0.001 <= statistics["p99"] < 0.002
+        assert statistics["max_time"] == 0.5
+
+    def test_queries_are_counted_with_their_rows(self, sql):
+        for i in range(1, 4):
+            sql.select_query("SELECT Name FROM Items WHERE Item_ID <= ?", sql_parameters=i * 10)
+        sql.select_query("SELECT Name FROM Items WHERE Item_ID = ?", sql_parameters=1, fetch="one")
+        sql.update_table("UPDATE Items SET Name = 'renamed' WHERE Item_ID <= 5")
+
+        snapshot = sql.query_stats_snapshot()
+        assert snapshot["SELECT Name FROM Items WHERE Item_ID <= ?"]["calls"] == 3
+        assert snapshot["SELECT Name FROM Items WHERE Item_ID <= ?"]["rows"] == 60
+        assert snapshot["SELECT Name FROM Items WHERE Item_ID = ?"]["rows"] == 1
+        assert snapshot["UPDATE Items SET Name = ? WHERE Item_ID <= ?"]["rows"] == 5
+
+    def test_slow_queries_are_logged_with_their_plan(self, sql):
+        sql.select_query("SELECT Name FROM Items WHERE Item_ID = ?", sql_parameters=1)
+
+        slow_query = sql.slow_queries()[-1]
+        assert slow_query["sql"] == "SELECT Name FROM Items WHERE Item_ID = ?"
+        assert any("INTEGER PRIMARY KEY" in step for step in slow_query["query_plan"])
+
+    def test_reset(self, sql):
+        sql.select_query("SELECT * FROM Items")
+        sql.reset_query_stats()
+
+        assert sql.query_stats_snapshot() == {}
+        assert sql.slow_queries() == []
@@ -0,0 +1,122 @@
+from pathlib import Path
+
+import pytest
+
+from advanced_database_project.backend.db_connection import DatabaseConnection
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    A freshly created and migrated copy of the database
+    """
+    db = DatabaseConnection(str(tmp_path / "rollups.db"))
+    db.create_database(Path("create_database_script.sql"))
+
+    yield db
+
+    db.close()
+
+
+def product_sales_from_orders(db):
+    return {row["Product_ID"]: row["Total"] for row in db.select_query("""
+            SELECT Product_ID, SUM(Order_Quantity) AS Total FROM Orders GROUP BY Product_ID
+            """)}
+
+
+def product_sales(db):
+    return {row["Product_ID"]: row["Total_Ordered"] for row in db.select_query("""
+            SELECT Product_ID, Total_Ordered FROM Product_Sales WHERE Total_Ordered > 0
+            """)}
+
+
+class TestBestSellerRollup:
+
+    def test_rollup_matches_orders_after_the_migration(self, db):
+        assert product_sales(db) == product_sales_from_orders(db)
+
+    def test_rollup_follows_order_writes(self, db):
+        assert db.place_order("2024-02-01", 1, 1, 1, 1, 7, "Ordered") is None
+        db.update_table("UPDATE Order_Lines SET Order_Quantity = Order_Quantity + 2 WHERE Order_ID = 1")
+        db.update_table("UPDATE Order_Lines SET Product_ID = 3 WHERE Order_ID = 2")
+        db.update_table("DELETE FROM Order_Headers WHERE Order_ID = 3")
+
+        assert product_sales(db) == product_sales_from_orders(db)
+
+    def test_best_sellers_are_read_in_index_order(self, db):
+        plan = db.explain_query_plan("""
+                                     SELECT Product_ID FROM Product_Sales
+                                     WHERE Total_Ordered > 0
+                                     ORDER BY Total_Ordered DESC, Product_ID
+                                     LIMIT 6
+                                     """)
+
+        assert any("Product_Sales_Total_Ordered_idx" in step for step in plan)
+        assert not any("TEMP B-TREE" in step for step in plan)
+
+    def test_best_sellers_are_the_most_ordered_products(self, db):
+        expected = sorted(product_sales_from_orders(db).items(), key=lambda item: (-item[1], item[0]))[:6]
+
+        assert [product["Product_ID"] for product in db.select_best_selling_products()] == \
+               [product_id for product_id, _ in expected]
+
+    def test_rebuild_repairs_the_rollup(self, db):
+        db.update_table("UPDATE Product_Sales SET Total_Ordered = 1000 WHERE Product_ID = 1")
+
+        assert db.rebuild_rollups() is None
+        assert product_sales(db) == product_sales_from_orders(db)
+
+    def test_restore_keeps_the_rollup_and_triggers(self, db, tmp_path):
+        db.backup_database_to_xml(tmp_path / "backup.xml", include_images=False)
+        db.restore_database_from_xml(tmp_path / "backup.xml")
+
+        assert product_sales(db) == product_sales_from_orders(db)
+        db.place_order("2024-02-01", 1, 2, 1, 1, 3, "Ordered")
+        assert product_sales(db) == product_sales_from_orders(db)
+
+
+def basket_totals_from_contents(db):
+    return {row["Basket_ID"]: (row["Items"], row["Total"]) for row in db.select_query("""
+            SELECT bc.Basket_ID, SUM(bc.Quantity) AS Items, SUM(bc.Quantity * p.Price) AS Total
+            FROM Basket_Contents AS bc INNER JOIN Products AS p ON bc.Product_ID = p.Product_ID
+            GROUP BY bc.Basket_ID
+            """)}
+
+
+class TestBasketTotals:
+
+    def test_totals_match_the_baskets_after_the_migration(self, db):
+        assert db.check_rollups() == {}
+
+    def test_totals_follow_basket_and_price_changes(self, db):
+        db.clear_basket(1)
+        assert db.get_customer_basket_value(1) is None
+
+        assert db.add_item_to_basket(1, 2, 1) is None
+        assert db.add_item_to_basket(1, 3, 2) is None
+        db.update_basket_item(1, 3, 1)
+        db.update_table("UPDATE Products SET Price = Price + 5 WHERE Product_ID = 2")
+
+        prices = {row["Product_ID"]: row["Price"]
+                  for row in db.select_query("SELECT Product_ID, Price FROM Products WHERE Product_ID IN (2, 3)")}
+        value = db.get_customer_basket_value(1)
+        assert value["Item_Count"] == 2
+        assert value["Total_Basket_Value"] == prices[2] + prices[3]
+
+        db.remove_basket_item(1, 2)
+        assert db.get_customer_basket_value(1)["Total_Basket_Value"] == prices[3]
+        assert db.check_rollups() == {}
+
+    def test_basket_value_is_a_primary_key_lookup(self, db):
+        plan = db.explain_query_plan("SELECT Total_Basket_Value FROM Basket_Totals WHERE Basket_ID = ?", (1,))
+
+        assert any("INTEGER PRIMARY KEY" in step for step in plan)
+
+    def test_checker_finds_and_repairs_wrong_totals(self, db):
+        db.update_table("UPDATE Basket_Totals SET Total_Basket_Value = -1 WHERE Basket_ID = 1")
+        db.update_table("UPDATE Product_Sales SET Total_Ordered = Total_Ordered + 1 WHERE Product_ID = 2")
+
+        assert db.check_rollups(repair=True) == {"Product_Sales": [2], "Basket_Totals": [1]}
+        assert db.check_rollups() == {}
+        value = db.get_customer_basket_value(1)
+        assert (value["Item_Count"], value["Total_Basket_Value"]) == basket_totals_from_contents(db)[1]
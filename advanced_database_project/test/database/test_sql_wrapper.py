@@ -0,0 +1,202 @@
+import sqlite3
+import threading
+
+import pytest
+
+from advanced_database_project.backend.retry import RetryPolicy
+from advanced_database_project.backend.sql import SqlWrapper
+
+
+@pytest.fixture
+def sql(tmp_path):
+    """
+    A SqlWrapper on an empty database with a single Items table
+    """
+    sql = SqlWrapper(str(tmp_path / "wrapper.db"))
+    sql.update_table("CREATE TABLE Items (Item_ID INTEGER PRIMARY KEY AUTOINCREMENT, Name TEXT NOT NULL)")
+    for i in range(250):
+        sql.update_table("INSERT INTO Items (Name) VALUES (?)", sql_parameters=f"item{i}")
+
+    yield sql
+
+    sql.close()
+
+
+class TestSqlWrapper:
+
+    def test_iter_query_yields_every_row_lazily(self, sql):
+        rows = sql.iter_query("SELECT Item_ID, Name FROM Items ORDER BY Item_ID", batch_size=7)
+
+        first = next(rows)
+        assert first == {"Item_ID": 1, "Name": "item0"}
+        assert [row["Item_ID"] for row in rows] == list(range(2, 251))
+
+    def test_iter_query_does_not_disturb_other_queries(self, sql):
+        names = []
+        for row in sql.iter_query("SELECT Item_ID FROM Items ORDER BY Item_ID", batch_size=10):
+            names.append(sql.select_query("SELECT Name FROM Items WHERE Item_ID = ?",
+                                          sql_parameters=row["Item_ID"], fetch="one")["Name"])
+
+        assert names == [f"item{i}" for i in range(250)]
+
+    def test_select_query_all_matches_iter_query(self, sql):
+        assert sql.select_query("SELECT * FROM Items") == list(sql.iter_query("SELECT * FROM Items"))
+
+    def test_row_formats(self, sql):
+        query = "SELECT Item_ID, Name FROM Items WHERE Item_ID = ?"
+
+        assert sql.select_query(query, sql_parameters=1, fetch="one", row_format="dict") == \
+               {"Item_ID": 1, "Name": "item0"}
+        assert sql.select_query(query, sql_parameters=1, fetch="one", row_format="tuple") == (1, "item0")
+
+        record = sql.select_query(query, sql_parameters=1, fetch="one", row_format="record")
+        assert record == (1, "item0")
+        assert record.Name == record["Name"] == record[1] == "item0"
+        assert dict(record.items()) == {"Item_ID": 1, "Name": "item0"}
+
+    def test_record_class_is_shared_per_query_shape(self, sql):
+        first, second = sql.select_query("SELECT Item_ID, Name FROM Items LIMIT 2", row_format="record")
+        other = sql.select_query("SELECT Name FROM Items LIMIT 1", row_format="record")[0]
+
+        assert type(first) is type(second)
+        assert type(first) is not type(other)
+        assert not hasattr(first, "__dict__")
+
+    def test_unknown_row_format(self, sql):
+        with pytest.raises(ValueError):
+            sql.select_query("SELECT * FROM Items", row_format="json")
+
+    def test_update_many_writes_every_chunk(self, sql):
+        results = sql.update_many("INSERT INTO Items (Name) VALUES (?)",
+                                  ((f"bulk{i}",) for i in range(2500)), chunk_size=1000)
+
+        assert results == [None, None, None]
+        assert sql.select_query("SELECT COUNT(*) AS Total FROM Items WHERE Name LIKE 'bulk%'",
+                                fetch="one")["Total"] == 2500
+
+    def test_update_many_rolls_back_only_the_failed_chunk(self, sql):
+        rows = [(f"ok{i}",) for i in range(10)] + [(None,)] + [(f"ok{i}",) for i in range(10, 25)]
+
+        results = sql.update_many("INSERT INTO Items (Name) VALUES (?)", rows, chunk_size=10)
+
+        assert results[0] is None
+        assert type(results[1]) == sqlite3.IntegrityError
+        assert results[2] is None
+        names = [row["Name"] for row in sql.select_query("SELECT Name FROM Items WHERE Name LIKE 'ok%'")]
+        assert names == [f"ok{i}" for i in range(10)] + [f"ok{i}" for i in range(19, 25)]
+
+    @staticmethod
+    def count_items(sql, name):
+        return sql.select_query("SELECT COUNT(*) AS Total FROM Items WHERE Name = ?", sql_parameters=name,
+                                fetch="one")["Total"]
+
+    def test_transaction_commits_once_at_the_end(self, sql):
+        with sql.transaction() as transaction:
+            sql.update_table("INSERT INTO Items (Name) VALUES (?)", sql_parameters="unit")
+            sql.update_table("INSERT INTO Items (Name) VALUES (?)", sql_parameters="unit")
+            assert sql.db.in_transaction
+
+        assert not transaction.failed
+        assert not sql.db.in_transaction
+        assert self.count_items(sql, "unit") == 2
+
+    def test_transaction_rolls_back_when_a_write_fails(self, sql):
+        with sql.transaction() as transaction:
+            sql.update_table("INSERT INTO Items (Name) VALUES (?)", sql_parameters="half")
+            result = sql.update_table("INSERT INTO Items (Name) VALUES (?)", sql_parameters=None)
+
+        assert type(result) == sqlite3.IntegrityError
+        assert transaction.error is result
+        assert self.count_items(sql, "half") == 0
+
+    def test_transaction_rolls_back_when_the_block_raises(self, sql):
+        with pytest.raises(RuntimeError):
+            with sql.transaction():
+                sql.update_table("INSERT INTO Items (Name) VALUES (?)", sql_parameters="raised")
+                raise RuntimeError("Checkout failed")
+
+        assert self.count_items(sql, "raised") == 0
+
+    def test_nested_transaction_is_a_savepoint(self, sql):
+        with sql.transaction() as outer:
+            sql.update_table("INSERT INTO Items (Name) VALUES (?)", sql_parameters="outer")
+            with sql.transaction() as inner:
+                assert inner.savepoint is not None
+                sql.update_table("INSERT INTO Items (Name) VALUES (?)", sql_parameters="inner")
+            assert self.count_items(sql, "inner") == 1
+
+        assert not outer.failed
+        assert self.count_items(sql, "outer") == 1
+        assert self.count_items(sql, "inner") == 1
+
+    def test_failed_nested_transaction_fails_the_outer_transaction(self, sql):
+        with sql.transaction() as outer:
+            sql.update_table("INSERT INTO Items (Name) VALUES (?)", sql_parameters="outer")
+            results = sql.update_many("INSERT INTO Items (Name) VALUES (?)", [("inner",), (None,)])
+
+        assert type(results[0]) == sqlite3.IntegrityError
+        assert outer.error is results[0]
+        assert self.count_items(sql, "outer") == 0
+        assert self.count_items(sql, "inner") == 0
+
+    def test_reads_use_a_read_only_connection(self, sql):
+        with sql.connection_for("UPDATE Items SET Name = 'x'") as connection:
+            assert connection is sql.db
+        with sql.connection_for("WITH Old AS (SELECT Item_ID FROM Items) DELETE FROM Items WHERE Item_ID IN Old") \
+                as connection:
+            assert connection is sql.db
+        with sql.connection_for("SELECT * FROM Items") as connection:
+            assert connection is not sql.db
+            with pytest.raises(sqlite3.OperationalError):
+                connection.execute("DELETE FROM Items")
+
+    def test_transaction_reads_its_own_writes(self, sql):
+        with sql.transaction():
+            sql.update_table("INSERT INTO Items (Name) VALUES (?)", sql_parameters="pending")
+            assert self.count_items(sql, "pending") == 1
+
+    def test_reads_see_a_snapshot_while_writes_commit(self, sql):
+        rows = sql.iter_query("SELECT Name FROM Items ORDER BY Item_ID", batch_size=10)
+        next(rows)
+
+        assert sql.update_table("INSERT INTO Items (Name) VALUES (?)", sql_parameters="during") is None
+
+        assert sum(1 for _ in rows) == 249
+        assert self.count_items(sql, "during") == 1
+
+    @staticmethod
+    def lock_database(sql, seconds):
+        """
+        Hold the write lock of the database from another connection, like another process would
+        """
+        other = sqlite3.connect(sql.db_file, timeout=0, check_same_thread=False)
+        other.execute("BEGIN IMMEDIATE")
+        timer = threading.Timer(seconds, other.rollback)
+        timer.start()
+        return timer, other
+
+    def test_busy_writes_are_retried(self, sql):
+        sql.db.execute("PRAGMA busy_timeout=0")
+        sql.retry_policy = RetryPolicy(max_attempts=50, base_delay=0.005, max_delay=0.02)
+        timer, other = self.lock_database(sql, 0.1)
+
+        assert sql.update_table("INSERT INTO Items (Name) VALUES (?)", sql_parameters="busy") is None
+
+        timer.join()
+        other.close()
+        stats = sql.busy_retry_stats()
+        assert stats["retries"] >= 1 and stats["recovered"] == 1 and stats["failures"] == 0
+        assert self.count_items(sql, "busy") == 1
+
+    def test_busy_write_fails_after_the_last_attempt(self, sql):
+        sql.db.execute("PRAGMA busy_timeout=0")
+        sql.retry_policy = RetryPolicy(max_attempts=3, base_delay=0.001)
+        timer, other = self.lock_database(sql, 1)
+
+        result = sql.update_table("INSERT INTO Items (Name) VALUES (?)", sql_parameters="busy")
+
+        timer.cancel()
+        other.close()
+        assert type(result) == sqlite3.OperationalError
+        assert sql.busy_retry_stats()["busy_errors"] == 3
+        assert sql.busy_retry_stats()["failures"] == 1
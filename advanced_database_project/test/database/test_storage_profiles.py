@@ -0,0 +1,46 @@
+import sqlite3
+
+import pytest
+
+from advanced_database_project.backend.db_connection import DatabaseConnection
+from advanced_database_project.backend.storage_profiles import PROFILES, get_profile, apply_profile, verify_profile
+
+
+class TestStorageProfiles:
+
+    @pytest.mark.parametrize("profile", PROFILES.keys())
+    def test_profile_is_applied_to_connections(self, tmp_path, profile):
+        db = DatabaseConnection(str(tmp_path / "profile.db"), profile=profile)
+
+        assert verify_profile(db.db, PROFILES[profile]) == []
+        assert db.select_query("PRAGMA journal_mode", fetch="one")["journal_mode"] == \
+               PROFILES[profile].journal_mode.lower()
+        assert db.select_query("PRAGMA foreign_keys", fetch="one")["foreign_keys"] == 1
+        db.close()
+
+    def test_durable_profile_keeps_the_rollback_journal(self, tmp_path):
+        db = DatabaseConnection(str(tmp_path / "profile.db"), profile="durable", busy_timeout=0.1)
+        db.update_table("CREATE TABLE Items (Item_ID INTEGER PRIMARY KEY, Name TEXT)")
+        db.update_many("INSERT INTO Items (Name) VALUES (?)", [("a",), ("b",)])
+
+        # Without the write-ahead log a reader would block the writer, so reads run on the writer
+        assert db.read_pool is None
+        rows = db.iter_query("SELECT Name FROM Items", batch_size=1)
+        next(rows)
+        assert db.update_table("UPDATE Items SET Name = 'changed'") is None
+        rows.close()
+        db.close()
+
+    def test_profile_mismatch_is_reported(self, tmp_path):
+        connection = sqlite3.connect(tmp_path / "mismatch.db")
+        apply_profile(connection, "bulk_load")
+
+        mismatches = verify_profile(connection, get_profile("durable"))
+
+        assert any(mismatch.startswith("journal_mode") for mismatch in mismatches)
+        assert any(mismatch.startswith("synchronous") for mismatch in mismatches)
+        connection.close()
+
+    def test_unknown_profile(self, tmp_path):
+        with pytest.raises(ValueError):
+            DatabaseConnection(str(tmp_path / "unknown.db"), profile="fastest")
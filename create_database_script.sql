@@ -1,5 +1,8 @@
 PRAGMA foreign_keys = ON;
 
+-- The script builds schema version 0, the migrations in backend/migrations.py upgrade it --
+PRAGMA user_version = 0;
+
 -- Drop tables if they exists --
 DROP TABLE IF EXISTS Orders;
 DROP TABLE IF EXISTS Billing;